@@ -0,0 +1,263 @@
+"""
+Benchmarks for this graph
+@author David Guan
+
+Times the Graph operations on synthetic hub and spoke networks of growing size and writes the results as json
+i.e. python benchmark.py --sizes 1000 10000 100000 --output results.json
+Compare two runs, i.e. from before and after a commit, with
+python benchmark.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Graph'))
+
+from graph import Graph
+from columnar import ColumnarStore
+from synthetic import write_network
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def measure(function, repeat):
+    """
+    Runs a function several times
+    :param function: the function, called with no arguments
+    :param repeat: number of runs
+    :return: the fastest and the median time in seconds
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[0], times[len(times) // 2]
+
+
+def operations(graph, location, directory, queries, generator):
+    """
+    The operations to time on a loaded network, each one is run on its own after the network is loaded
+    Operations that change the network undo their change so every run sees the same network
+    :param graph: the loaded graph
+    :param location: location of the json the graph was loaded from
+    :param directory: directory for the files written
+    :param queries: number of queries per run of the search operations
+    :param generator: random number generator picking the cities
+    :return: list of the names, the functions and the number of queries in one call
+    """
+    codes = list(graph.vertices.keys())
+    pairs = [(generator.choice(codes), generator.choice(codes)) for i in range(queries)]
+    routes = [graph.djikstra(source, target) for source, target in pairs]
+    hub = graph.hubs(1)[0][0]
+    snapshot = os.path.join(directory, 'network.snap')
+    saved = os.path.join(directory, 'save.json')
+
+    def add_from_json():
+        Graph().add_from_json(location)
+
+    def djikstra():
+        for source, target in pairs:
+            graph.djikstra(source, target)
+
+    def astar():
+        for source, target in pairs:
+            graph.astar(source, target)
+
+    def alternatives():
+        for source, target in pairs:
+            graph.alternatives(source, target, 5)
+
+    def route_info():
+        for route in routes:
+            graph.route_info(route)
+
+    def shortest_path_tree():
+        graph._search(pairs[0][0])
+
+    def remove_city():
+        city = graph.vertices[hub].to_dict()
+        edges = [(edge.distance, edge.destination) for edge in graph.edges[hub]]
+        graph.remove_city(hub)
+        graph.add_city(city)
+        with graph.batch() as batch:
+            for distance, destination in edges:
+                batch.add_route(distance, hub, destination)
+
+    def add_route():
+        for source, target in pairs:
+            if source != target and target not in graph.edges[source]:
+                graph.add_route(1000, source, target)
+                graph.remove_route(source, target)
+
+    def edit_city():
+        for source, target in pairs:
+            graph.edit_city(source, "population", graph.vertices[source].population + 1)
+
+    def batch():
+        with graph.batch() as changes:
+            for source, target in pairs:
+                changes.edit_city(source, "population", graph.vertices[source].population + 1)
+
+    def hubs():
+        graph.hubs(10)
+
+    def statistics():
+        graph.longest_flight()
+        graph.shortest_flight()
+        graph.biggest_city()
+        graph.average_distance()
+
+    def reachable():
+        for source, target in pairs:
+            graph.reachable(source, hops=2)
+
+    def reach_sets():
+        graph.reach_sets([code for code, degree in graph.hubs(64)], hops=3)
+
+    def nearest_cities():
+        for source, target in pairs:
+            graph.nearest_cities(source, 5)
+
+    def save_to_json():
+        graph.save_to_json(saved)
+
+    def save_snapshot():
+        graph.save_snapshot(snapshot)
+
+    def add_from_snapshot():
+        Graph().add_from_snapshot(snapshot)
+
+    def lazy_snapshot():
+        Graph().add_from_snapshot(snapshot, lazy=True)
+
+    def columnar():
+        ColumnarStore(graph).longest_flight()
+
+    listed = [("add_from_json", add_from_json, 1), ("djikstra", djikstra, queries), ("astar", astar, queries),
+              ("alternatives", alternatives, queries),
+              ("route_info", route_info, queries), ("shortest_path_tree", shortest_path_tree, 1),
+              ("remove_city", remove_city, 1), ("add_route", add_route, queries), ("edit_city", edit_city, queries),
+              ("batch", batch, queries), ("hubs", hubs, 1), ("statistics", statistics, 1),
+              ("nearest_cities", nearest_cities, queries), ("reachable", reachable, queries),
+              ("reach_sets", reach_sets, 1), ("save_to_json", save_to_json, 1),
+              ("save_snapshot", save_snapshot, 1), ("add_from_snapshot", add_from_snapshot, 1),
+              ("lazy_snapshot", lazy_snapshot, 1)]
+    if numpy is not None:
+        listed.append(("columnar", columnar, 1))
+    return listed
+
+
+def run(sizes, repeat, queries, seed, only=None):
+    """
+    Times every operation at every size
+    :param sizes: numbers of cities
+    :param repeat: number of runs of each operation
+    :param queries: number of queries per run of the search operations
+    :param seed: seed of the networks and the queries
+    :param only: names of the operations to time, None for all of them
+    :return: list of the results
+    """
+    results = []
+    directory = tempfile.mkdtemp()
+    try:
+        for size in sizes:
+            location = os.path.join(directory, 'network.json')
+            start = time.perf_counter()
+            network = write_network(location, size, seed=seed)
+            elapsed = time.perf_counter() - start
+            results.append({"size": size, "operation": "generate", "best": elapsed, "median": elapsed, "calls": 1,
+                            "routes": len(network["routes"])})
+            del network
+            graph = Graph()
+            graph.add_from_json(location)
+            for name, function, calls in operations(graph, location, directory, queries, random.Random(seed)):
+                if only and name not in only:
+                    continue
+                best, median = measure(function, repeat)
+                results.append({"size": size, "operation": name, "best": best, "median": median, "calls": calls})
+                print("{:>8} {:<20} {:>12.6f} s".format(size, name, best), file=sys.stderr)
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+def commit():
+    """
+    The git commit being benchmarked
+    :return: the commit hash, or None outside of a git checkout
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new, threshold):
+    """
+    Prints how much every operation sped up or slowed down between two runs
+    :param old: location of the earlier results
+    :param new: location of the later results
+    :param threshold: ratio of the times above which an operation counts as slower
+    :return: number of operations that got slower
+    """
+    with open(old) as file:
+        before = {(result["size"], result["operation"]): result for result in json.load(file)["results"]}
+    with open(new) as file:
+        after = json.load(file)["results"]
+    slower = 0
+    for result in after:
+        key = (result["size"], result["operation"])
+        if key not in before or before[key]["best"] <= 0:
+            continue
+        ratio = result["best"] / before[key]["best"]
+        flag = "slower" if ratio > threshold else ""
+        slower += ratio > threshold
+        print("{:>8} {:<20} {:>12.6f} -> {:>12.6f} s {:>7.2f}x {}".format(
+            key[0], key[1], before[key]["best"], result["best"], ratio, flag))
+    return slower
+
+
+def main():
+    """
+    Runs the benchmarks or compares two runs, depending on the arguments
+    :return: nothing
+    """
+    parser = argparse.ArgumentParser(description="Times the Graph operations on synthetic networks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="names of the operations to time")
+    parser.add_argument("--output", help="file for the json results, printed if left out")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    options = parser.parse_args()
+    if options.compare:
+        sys.exit(1 if compare(options.compare[0], options.compare[1], options.threshold) else 0)
+    report = {"commit": commit(), "python": platform.python_version(), "platform": platform.platform(),
+              "numpy": numpy is not None, "repeat": options.repeat, "queries": options.queries,
+              "seed": options.seed, "results": run(options.sizes, options.repeat, options.queries, options.seed,
+                                                   options.only)}
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(report, file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
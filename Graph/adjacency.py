@@ -0,0 +1,68 @@
+"""
+Adjacency class for this graph
+@author David Guan
+"""
+
+
+class Adjacency:
+    def __init__(self, edges=()):
+        """
+        Constructor for the Adjacency class
+        Holds the outgoing edges of one city keyed by the destination code
+        so that looking up, adding and removing a route doesn't scan a list
+        Iterating over it gives back the edges just like the old list did
+        :param edges: edges to start with, i.e. all the routes of a city read from a snapshot
+        :return: nothing
+        """
+        self._edges = {edge.destination: edge for edge in edges}
+
+    def add(self, edge):
+        """
+        Adds the edge, replacing any edge that already goes to the same destination
+        :param edge: the edge to add
+        :return: the replaced edge or None
+        """
+        old = self._edges.get(edge.destination)
+        self._edges[edge.destination] = edge
+        return old
+
+    def get(self, destination):
+        """
+        Gets the edge to the destination
+        :param destination: destination city code
+        :return: the edge or None if there is no such route
+        """
+        return self._edges.get(destination)
+
+    def remove(self, destination):
+        """
+        Removes the edge to the destination
+        :param destination: destination city code
+        :return: the removed edge or None if there was no such route
+        """
+        return self._edges.pop(destination, None)
+
+    def copy(self):
+        """
+        Copy of the adjacency that shares the edges, which are never changed in place
+        :return: the new Adjacency
+        """
+        adjacency = Adjacency()
+        adjacency._edges = self._edges.copy()
+        return adjacency
+
+    def destinations(self):
+        """
+        All the destinations reachable with a single flight
+        :return: view of the destination codes
+        """
+        return self._edges.keys()
+
+    def __contains__(self, destination):
+        return destination in self._edges
+
+    def __iter__(self):
+        return iter(self._edges.values())
+
+    def __len__(self):
+        return len(self._edges)
@@ -0,0 +1,285 @@
+"""
+Aggregate statistics kept up to date for this graph
+@author David Guan
+"""
+
+import copy
+import itertools
+import threading
+
+from persistent import PersistentMap, PersistentSortedList
+from vertex import is_loaded, load_all
+
+
+class Aggregates:
+    def __init__(self, graph):
+        """
+        Constructor for the Aggregates class
+        Keeps the network statistics up to date as cities and routes are added and removed instead of
+        recomputing them. Sums and counts give the averages in O(1), sorted lists give the biggest and smallest
+        city, the longest and shortest flight and the hubs in O(log n). Everything is kept in persistent
+        collections, so a fork of the graph shares the statistics instead of copying them
+        Cities that haven't been loaded yet are only counted, their populations are added the first time a
+        statistic needs them. After a bulk load the routes are left unsorted until a flight is asked for
+        :param graph: the graph the statistics are for
+        :return: nothing
+        """
+        self.graph = graph
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets everything, for when the graph is emptied
+        :return: nothing
+        """
+        self.population = 0
+        self.cities = 0
+        self.distance = 0
+        self.flights = 0
+        self._pending = PersistentMap()
+        self.degree = PersistentMap()
+        self.weighted = PersistentMap()
+        self._order = 0
+        self._city_entry = PersistentMap()
+        # population, order added and code of every loaded city, so ties go to the city added first
+        self._cities = PersistentSortedList()
+        # distance, start and destination of every route
+        self._routes = PersistentSortedList()
+        # minus the number of outgoing routes and code of every city with routes
+        self._hubs = PersistentSortedList()
+        self._unsorted = False
+
+    def copy(self, graph):
+        """
+        Copy of the statistics for a fork of the graph, sharing the collections with this one
+        :param graph: the fork
+        :return: the new Aggregates
+        """
+        aggregates = copy.copy(self)
+        aggregates.graph = graph
+        aggregates._lock = threading.Lock()
+        for name in ("_pending", "degree", "weighted", "_city_entry", "_cities", "_routes", "_hubs"):
+            setattr(aggregates, name, getattr(self, name).copy())
+        return aggregates
+
+    def rebuild(self, graph):
+        """
+        Works out every statistic again from the whole graph, for after a load that skipped the calls per city
+        and route. The cities and hubs are sorted once instead of being added one at a time
+        :param graph: the graph
+        :return: nothing
+        """
+        self.clear()
+        self.cities = len(graph.vertices)
+        cities = []
+        pending = {}
+        for vertex in graph.vertices.values():
+            if is_loaded(vertex):
+                cities.append(vertex)
+            else:
+                pending[vertex.code] = vertex
+        self._pending = PersistentMap(pending)
+        self._order = len(cities)
+        self.population = sum(vertex.population for vertex in cities)
+        self._city_entry = PersistentMap({vertex.code: order for order, vertex in enumerate(cities)})
+        self._cities = PersistentSortedList((vertex.population, order, vertex.code)
+                                            for order, vertex in enumerate(cities))
+        degree = {}
+        weighted = {}
+        for code, adjacency in graph.edges.items():
+            if len(adjacency):
+                degree[code] = len(adjacency)
+                weighted[code] = sum(edge.distance for edge in adjacency)
+        self.flights = sum(degree.values())
+        self.distance = sum(weighted.values())
+        self.degree = PersistentMap(degree)
+        self.weighted = PersistentMap(weighted)
+        self._hubs = PersistentSortedList((-count, code) for code, count in degree.items())
+        self._unsorted = True
+
+    def add_vertex(self, vertex):
+        """
+        Counts a city that was added to the graph
+        :param vertex: the city
+        :return: nothing
+        """
+        self.cities += 1
+        if not is_loaded(vertex):
+            self._pending[vertex.code] = vertex
+            return
+        self._add_city(vertex)
+
+    def _add_city(self, vertex):
+        """
+        Adds the population of a city and puts it in the sorted cities
+        :param vertex: the city
+        :return: nothing
+        """
+        order = self._order
+        self._order += 1
+        self.population += vertex.population
+        self._city_entry[vertex.code] = order
+        self._cities.add((vertex.population, order, vertex.code))
+
+    def remove_vertex(self, vertex):
+        """
+        Uncounts a city that is being removed from the graph or edited
+        :param vertex: the city, before any edit
+        :return: nothing
+        """
+        self.cities -= 1
+        if self._pending.pop(vertex.code, None) is not None:
+            return
+        self.population -= vertex.population
+        self._cities.remove((vertex.population, self._city_entry.pop(vertex.code), vertex.code))
+
+    def add_edge(self, edge):
+        """
+        Counts a route that was added to the graph, only one direction of it
+        :param edge: the route
+        :return: nothing
+        """
+        self.distance += edge.distance
+        self.flights += 1
+        self._set_degree(edge.start, 1, edge.distance)
+        if not self._unsorted:
+            self._routes.add((edge.distance, edge.start, edge.destination))
+
+    def remove_edge(self, edge):
+        """
+        Uncounts a route that was removed from the graph
+        :param edge: the route
+        :return: nothing
+        """
+        self.distance -= edge.distance
+        self.flights -= 1
+        self._set_degree(edge.start, -1, -edge.distance)
+        if not self._unsorted:
+            self._routes.remove((edge.distance, edge.start, edge.destination))
+
+    def _set_degree(self, code, change, distance):
+        """
+        Changes the number of outgoing routes and their total distance for a city and moves it among the hubs
+        :param code: the city code
+        :param change: 1 for a route added, -1 for one removed
+        :param distance: distance the total changes by
+        :return: nothing
+        """
+        count = self.degree.get(code, 0)
+        if count:
+            self._hubs.remove((-count, code))
+        count += change
+        if count > 0:
+            self.degree[code] = count
+            self.weighted[code] = self.weighted.get(code, 0) + distance
+            self._hubs.add((-count, code))
+        else:
+            del self.degree[code]
+            del self.weighted[code]
+
+    def biggest_city(self):
+        """
+        Biggest city by population size
+        :return: the code, name and population of the city
+        """
+        self._flush()
+        last = self._cities.last()
+        if last is None:
+            raise ValueError("The network is empty")
+        return self._city(self._cities.ceiling((last[0],)))
+
+    def smallest_city(self):
+        """
+        Smallest city by population size
+        :return: the code, name and population of the city
+        """
+        self._flush()
+        first = self._cities.first()
+        if first is None:
+            raise ValueError("The network is empty")
+        return self._city(first)
+
+    def _city(self, entry):
+        """
+        A city from its entry in the sorted cities
+        :param entry: population, order and code of the city
+        :return: the code, name and population of the city
+        """
+        city = self.graph.vertices[entry[2]]
+        return city.code, city.name, city.population
+
+    def average_city_size(self):
+        """
+        Average population size of the cities, rounded down
+        :return: the average
+        """
+        self._flush()
+        return self.population // self.cities
+
+    def longest_flight(self):
+        """
+        Longest flight in the network, ties broken by code
+        :return: start, destination and distance
+        """
+        self._sort_routes()
+        last = self._routes.last()
+        if last is None:
+            raise ValueError("The network is empty")
+        distance, start, destination = self._routes.ceiling((last[0],))
+        return start, destination, distance
+
+    def shortest_flight(self):
+        """
+        Shortest flight in the network, ties broken by code
+        :return: start, destination and distance
+        """
+        self._sort_routes()
+        first = self._routes.first()
+        if first is None:
+            raise ValueError("The network is empty")
+        distance, start, destination = first
+        return start, destination, distance
+
+    def average_distance(self):
+        """
+        Average distance of the flights in the network
+        :return: the average
+        """
+        return self.distance / self.flights
+
+    def hubs(self, k=5):
+        """
+        The cities with the most outgoing routes, ties broken by code
+        The hubs are kept sorted, so this only looks at the top k
+        :param k: number of hubs
+        :return: list of the codes with their number of outgoing routes
+        """
+        return [(code, -value) for value, code in itertools.islice(self._hubs, k)]
+
+    def _flush(self):
+        """
+        Loads the cities that were only counted so far and adds their populations
+        :return: nothing
+        """
+        if not self._pending:
+            return
+        with self._lock:
+            load_all(self._pending.values())
+            for vertex in self._pending.values():
+                self._add_city(vertex)
+            # emptied only once everything is added, so another reader can't see the statistics half done
+            self._pending = PersistentMap()
+
+    def _sort_routes(self):
+        """
+        Sorts the routes of the graph in one go if a bulk load left them unsorted
+        :return: nothing
+        """
+        if not self._unsorted:
+            return
+        with self._lock:
+            if self._unsorted:
+                self._routes = PersistentSortedList((edge.distance, edge.start, edge.destination)
+                                                    for adjacency in self.graph.edges.values() for edge in adjacency)
+                self._unsorted = False
@@ -0,0 +1,240 @@
+"""
+All pairs shortest routes and the route cache for this graph
+@author David Guan
+"""
+
+from array import array
+import collections as col
+import math
+import struct
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"CSAIRAP1"
+HEADER = struct.Struct("<8sQQ")
+
+
+class AllPairs:
+    def __init__(self, graph, method="dijkstra"):
+        """
+        Constructor for the AllPairs class
+        Precomputes the shortest distance and the previous city on the shortest route for every pair of cities
+        The tables take V * V space so this is meant for networks of up to a few thousand cities,
+        use RouteCache on its own for bigger ones
+        :param graph: the graph to compute the routes of
+        :param method: dijkstra runs the heap search from every city, floyd runs a vectorized
+        Floyd-Warshall over the distance matrix and needs numpy
+        :return: nothing
+        """
+        self.codes = list(graph.vertices.keys())
+        for code in graph.edges.keys():
+            if code not in graph.vertices:
+                self.codes.append(code)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.topology_version = graph.topology_version
+        self.fingerprint = fingerprint(graph)
+        if method == "floyd":
+            self._floyd(graph)
+        elif method == "dijkstra":
+            self._dijkstra(graph)
+        else:
+            raise ValueError("Unknown method {}".format(method))
+
+    def _dijkstra(self, graph):
+        """
+        Fills the tables with one heap search from every city
+        :param graph: the graph to compute the routes of
+        :return: nothing
+        """
+        size = len(self.codes)
+        self.dist = array("d", [math.inf]) * (size * size)
+        self.prev = array("i", [-1]) * (size * size)
+        for i, code in enumerate(self.codes):
+            dist, prev = graph._search(code)
+            row = i * size
+            for other, distance in dist.items():
+                j = self.index.get(other)
+                if j is None:
+                    continue
+                self.dist[row + j] = distance
+                if prev[other] is not None:
+                    self.prev[row + j] = self.index[prev[other]]
+
+    def _floyd(self, graph):
+        """
+        Fills the tables with Floyd-Warshall, relaxing a whole matrix at a time for every middle city
+        :param graph: the graph to compute the routes of
+        :return: nothing
+        """
+        if np is None:
+            raise ImportError("numpy is needed for Floyd-Warshall")
+        size = len(self.codes)
+        dist = np.full((size, size), np.inf)
+        prev = np.full((size, size), -1, dtype=np.int32)
+        np.fill_diagonal(dist, 0)
+        for code, _list in graph.edges.items():
+            i = self.index[code]
+            for edge in _list:
+                j = self.index.get(edge.destination)
+                if j is not None and i != j and float(edge.distance) < dist[i, j]:
+                    dist[i, j] = float(edge.distance)
+                    prev[i, j] = i
+        for k in range(size):
+            through = dist[:, k, None] + dist[None, k, :]
+            better = through < dist
+            dist = np.where(better, through, dist)
+            prev = np.where(better, prev[None, k, :], prev)
+        self.dist = array("d", dist.ravel().tobytes())
+        self.prev = array("i", prev.astype(np.int32).ravel().tobytes())
+
+    def distance(self, source, target):
+        """
+        Shortest distance between two cities
+        :param source: the source city
+        :param target: the target city
+        :return: the distance, infinity if the target can't be reached
+        """
+        if source not in self.index or target not in self.index:
+            return math.inf
+        return self.dist[self.index[source] * len(self.codes) + self.index[target]]
+
+    def path(self, source, target):
+        """
+        Shortest route between two cities, built from the previous cities like Graph.djikstra
+        :param source: the source city
+        :param target: the target city
+        :return: the shortest path
+        """
+        if source not in self.index or target not in self.index:
+            return [target]
+        row = self.index[source] * len(self.codes)
+        path = [target]
+        j = self.prev[row + self.index[target]]
+        while j != -1:
+            path.append(self.codes[j])
+            j = self.prev[row + j]
+        path.reverse()
+        return path
+
+    def is_current(self, graph):
+        """
+        Whether the tables still describe the graph
+        :param graph: the graph the tables were computed or loaded for
+        :return: true if no city or route changed since
+        """
+        return self.topology_version == graph.topology_version
+
+    def save(self, location):
+        """
+        Saves the tables so they don't have to be computed again
+        :param location: location of the file
+        :return: nothing
+        """
+        codes = "\0".join(self.codes).encode("utf-8")
+        with open(location, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, self.fingerprint, len(codes)))
+            file.write(codes)
+            file.write(self.dist.tobytes())
+            file.write(self.prev.tobytes())
+
+    @classmethod
+    def load(cls, location, graph):
+        """
+        Loads tables saved with save, checking that they were computed for the same routes as the graph
+        :param location: location of the file
+        :param graph: the graph the tables are used with
+        :return: the AllPairs
+        """
+        with open(location, 'rb') as file:
+            magic, stored, length = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError("{} is not a route table".format(location))
+            if stored != fingerprint(graph):
+                raise ValueError("{} was computed for a different network".format(location))
+            table = cls.__new__(cls)
+            table.codes = file.read(length).decode("utf-8").split("\0") if length else []
+            table.index = {code: i for i, code in enumerate(table.codes)}
+            table.topology_version = graph.topology_version
+            table.fingerprint = stored
+            size = len(table.codes) * len(table.codes)
+            table.dist = array("d")
+            table.dist.fromfile(file, size)
+            table.prev = array("i")
+            table.prev.fromfile(file, size)
+        return table
+
+
+class RouteCache:
+    def __init__(self, graph, maxsize=4096, table=None):
+        """
+        Constructor for the RouteCache class
+        Remembers the most recently asked shortest routes so popular pairs don't run djikstra again
+        Everything is thrown away automatically once a city or route of the graph changes
+        :param graph: the graph to get routes from
+        :param maxsize: number of routes to keep, the least recently used ones are dropped first
+        :param table: precomputed AllPairs to answer from while it is current
+        :return: nothing
+        """
+        self.graph = graph
+        self.maxsize = maxsize
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self._routes = col.OrderedDict()
+        self._version = graph.topology_version
+
+    def shortest_route(self, source, target):
+        """
+        Shortest route between two cities, same as Graph.djikstra
+        :param source: the source city
+        :param target: the target city
+        :return: the shortest path
+        """
+        if self._version != self.graph.topology_version:
+            self.clear()
+            if self.table is not None and not self.table.is_current(self.graph):
+                self.table = None
+        key = (source, target)
+        if key in self._routes:
+            self.hits += 1
+            self._routes.move_to_end(key)
+            return list(self._routes[key])
+        self.misses += 1
+        if self.table is not None:
+            path = self.table.path(source, target)
+        else:
+            path = self.graph.djikstra(source, target)
+        self._routes[key] = tuple(path)
+        if len(self._routes) > self.maxsize:
+            self._routes.popitem(last=False)
+        return path
+
+    def clear(self):
+        """
+        Empties the cache
+        :return: nothing
+        """
+        self._routes.clear()
+        self._version = self.graph.topology_version
+
+    def __len__(self):
+        return len(self._routes)
+
+
+def fingerprint(graph):
+    """
+    Checksum of the cities and routes of the graph that doesn't depend on the order they were added in
+    :param graph: the graph
+    :return: a 64 bit number
+    """
+    total = len(graph.vertices)
+    for code in graph.vertices.keys():
+        total += zlib.crc32(code.encode("utf-8"))
+    for code, _list in graph.edges.items():
+        for edge in _list:
+            total += zlib.crc32("{}\0{}\0{}".format(edge.start, edge.destination, edge.distance).encode("utf-8")) << 32
+    return total & 0xFFFFFFFFFFFFFFFF
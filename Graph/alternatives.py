@@ -0,0 +1,179 @@
+"""
+Alternative routes for this graph
+@author David Guan
+"""
+
+import heapq
+import itertools
+import math
+
+
+def k_shortest_paths(graph, source, target, k):
+    """
+    The k shortest routes between two cities that don't visit a city twice, with Yen's algorithm
+    Every route after the first branches off an earlier one at a spur city. The spur searches leave out the cities
+    before the spur and the routes already taken out of it, which is done while searching so the graph is never
+    changed. The shortest path tree into the target is built once and reused by every spur search, both as an exact
+    A* estimate and as a shortcut: as soon as a search reaches a city whose tree route to the target is still open,
+    that route is the rest of the answer. Once there are enough candidates, a spur search also gives up as soon as
+    it can only find routes longer than the ones that would be kept
+    self.expanded of the graph has the number of cities expanded and self.relaxed the number of routes looked at
+    :param graph: the graph
+    :param source: the source city
+    :param target: the target city
+    :param k: number of routes
+    :return: list of the routes and their distances, shortest first
+    """
+    graph.expanded = graph.relaxed = 0
+    if k <= 0:
+        return []
+    remaining, following = _tree_into(graph, target)
+    if source not in remaining:
+        return []
+    found = [(_tree_path(source, following), remaining[source])]
+    order = itertools.count()
+    candidates = []
+    seen = {tuple(found[0][0])}
+    while len(found) < k:
+        last = found[-1][0]
+        root_distance = 0
+        for i in range(len(last) - 1):
+            root = last[:i + 1]
+            taken = {path[i + 1] for path, distance in found if len(path) > i + 1 and path[:i + 1] == root}
+            needed = k - len(found)
+            limit = math.inf
+            if len(candidates) >= needed:
+                limit = heapq.nsmallest(needed, candidates)[-1][0] - root_distance
+            spur = _spur(graph, last[i], target, set(root[:-1]), taken, remaining, following, limit)
+            if spur is not None:
+                path = root[:-1] + spur[0]
+                if tuple(path) not in seen:
+                    seen.add(tuple(path))
+                    heapq.heappush(candidates, (root_distance + spur[1], next(order), path))
+            root_distance += graph.edges[last[i]].get(last[i + 1]).distance
+        if not candidates:
+            break
+        distance, _, path = heapq.heappop(candidates)
+        found.append((path, distance))
+    return found
+
+
+def _tree_into(graph, target):
+    """
+    Djikstra backwards from the target over the routes, giving the shortest distance from every city to it
+    :param graph: the graph
+    :param target: the target city
+    :return: dictionary of the distance to the target and dictionary of the next city on the way there
+    """
+    remaining = {target: 0}
+    following = {target: None}
+    settled = set()
+    heap = [(0, target)]
+    while heap:
+        distance, vertex_w = heapq.heappop(heap)
+        if vertex_w in settled:
+            continue
+        settled.add(vertex_w)
+        adjacency = graph.edges.get(vertex_w, ())
+        graph.relaxed += len(adjacency)
+        for edge in adjacency:
+            before = graph.edges.get(edge.destination)
+            back = before.get(vertex_w) if before is not None else None
+            if back is None:
+                continue
+            alt = distance + back.distance
+            if alt < remaining.get(edge.destination, math.inf):
+                remaining[edge.destination] = alt
+                following[edge.destination] = vertex_w
+                heapq.heappush(heap, (alt, edge.destination))
+    graph.expanded += len(settled)
+    return remaining, following
+
+
+def _tree_path(code, following):
+    """
+    Walks the shortest path tree from a city to the target
+    :param code: the city
+    :param following: dictionary of the next city on the way to the target
+    :return: the path from the city to the target
+    """
+    path = [code]
+    while following[path[-1]] is not None:
+        path.append(following[path[-1]])
+    return path
+
+
+def _is_open(code, blocked, following, known):
+    """
+    Whether the tree path from a city to the target avoids the blocked cities, the city itself included
+    :param code: the city
+    :param blocked: cities that can't be visited
+    :param following: dictionary of the next city on the way to the target
+    :param known: dictionary of the cities already worked out, shared by the calls of one search
+    :return: true if the tree path is open
+    """
+    path = []
+    city = code
+    while city is not None and city not in known:
+        if city in blocked:
+            known[city] = False
+            break
+        path.append(city)
+        city = following[city]
+    answer = known.get(city, True)
+    for city in path:
+        known[city] = answer
+    return answer
+
+
+def _spur(graph, spur, target, blocked, taken, remaining, following, limit=math.inf):
+    """
+    Shortest route from the spur city to the target leaving out the cities before the spur and the routes out of
+    it that were already taken, with A* using the distances to the target as the estimate
+    Leaving things out only makes routes longer, so the estimate never overshoots. When the city popped has an open
+    tree path, its estimate is exact and lowest of everything still in the heap, so the search stops there
+    :param graph: the graph
+    :param spur: the spur city
+    :param target: the target city
+    :param blocked: cities before the spur
+    :param taken: cities right after the spur on routes already found
+    :param remaining: dictionary of the distance to the target
+    :param following: dictionary of the next city on the way to the target
+    :param limit: longest route from the spur worth finding
+    :return: the path from the spur and its distance, or None if the target can't be reached within the limit
+    """
+    dist = {spur: 0}
+    prev = {spur: None}
+    heap = [(remaining[spur], 0, spur)]
+    known = {}
+    closed = set(blocked)
+    closed.add(spur)
+    while heap:
+        guess, distance, vertex_u = heapq.heappop(heap)
+        if guess > limit:
+            return None
+        if distance > dist[vertex_u]:
+            continue
+        graph.expanded += 1
+        if vertex_u == spur:
+            rest = following[spur] not in taken and _is_open(following[spur], closed, following, known)
+        else:
+            rest = _is_open(vertex_u, closed, following, known)
+        if rest:
+            path = [vertex_u]
+            while prev[path[-1]] is not None:
+                path.append(prev[path[-1]])
+            path.reverse()
+            return path + _tree_path(vertex_u, following)[1:], distance + remaining[vertex_u]
+        adjacency = graph.edges.get(vertex_u, ())
+        graph.relaxed += len(adjacency)
+        for edge in adjacency:
+            city = edge.destination
+            if city in closed or city not in remaining or (vertex_u == spur and city in taken):
+                continue
+            alt = distance + edge.distance
+            if alt < dist.get(city, math.inf):
+                dist[city] = alt
+                prev[city] = vertex_u
+                heapq.heappush(heap, (alt + remaining[city], alt, city))
+    return None
@@ -0,0 +1,182 @@
+"""
+Columnar store for this graph
+@author David Guan
+"""
+
+from geo import latitude_longitude, haversine_many
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ColumnarStore:
+    def __init__(self, graph):
+        """
+        Constructor for the ColumnarStore class
+        Copies the graph into integer vertex ids and parallel arrays so the network wide statistics
+        are single vectorized reductions instead of loops over every edge
+        The store is a snapshot, Graph.columnar builds a new one when the graph changes
+        Needs numpy, raises an ImportError if it isn't installed
+        :param graph: the graph to copy
+        :return: nothing
+        """
+        if np is None:
+            raise ImportError("numpy is needed for the columnar store")
+        self.version = graph.version
+        self.codes = list(graph.vertices.keys())
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        for code in graph.edges.keys():
+            if code not in self.index:
+                self.index[code] = len(self.codes)
+                self.codes.append(code)
+        starts = []
+        destinations = []
+        distances = []
+        for code, _list in graph.edges.items():
+            for edge in _list:
+                if edge.destination not in self.index:
+                    self.index[edge.destination] = len(self.codes)
+                    self.codes.append(edge.destination)
+                starts.append(self.index[code])
+                destinations.append(self.index[edge.destination])
+                distances.append(edge.distance)
+        self.start = np.array(starts, dtype=np.int32)
+        self.destination = np.array(destinations, dtype=np.int32)
+        self.distance = _numeric(distances)
+        self.code_array = np.array(self.codes, dtype=object)
+        cities = [graph.vertices.get(code) for code in self.codes]
+        self.has_city = np.array([city is not None for city in cities], dtype=bool)
+        self.population = _numeric([city.population if city is not None else 0 for city in cities])
+        self.timezone = _numeric([city.timezone if city is not None else 0 for city in cities])
+        self.region = _numeric([city.region if city is not None else 0 for city in cities])
+        points = [latitude_longitude(city.coordinates) if city is not None else None for city in cities]
+        # the extra last row is what the unknown vertex id -1 looks up
+        points.append(None)
+        self.coordinates = np.array([point if point is not None else (np.nan, np.nan) for point in points],
+                                    dtype=np.float64).reshape(-1, 2)
+        self._sorted_codes = np.array(sorted(self.codes), dtype=str)
+        self._sorted_ids = np.array([self.index[code] for code in self._sorted_codes], dtype=np.int32)
+
+    def longest_flight(self):
+        """
+        Longest flight in the flights
+        :return: start vertex, destination vertex, distance
+        """
+        i = int(np.argmax(self.distance))
+        return self.codes[self.start[i]], self.codes[self.destination[i]], self.distance[i].item()
+
+    def shortest_flight(self):
+        """
+        Shortest flight in the flights
+        :return: start vertex, destination vertex, distance
+        """
+        i = int(np.argmin(self.distance))
+        return self.codes[self.start[i]], self.codes[self.destination[i]], self.distance[i].item()
+
+    def average_distance(self):
+        """
+        Average distance of all the flights in the network
+        :return: the average of all the distances
+        """
+        return self.distance.sum().item() / len(self.distance)
+
+    def degrees(self):
+        """
+        Number of outgoing routes of every city, indexed by vertex id
+        :return: array of the outgoing routes
+        """
+        return np.bincount(self.start, minlength=len(self.codes))
+
+    def hubs(self, k=5):
+        """
+        The cities with the most outgoing routes, ties broken by code like Graph.hubs
+        Only the cities at or above the k-th largest degree are sorted
+        :param k: number of hubs to return
+        :return: a list of the cities with their number of connections
+        """
+        degree = self.degrees()
+        if k <= 0 or len(degree) == 0:
+            return []
+        if k < len(degree):
+            threshold = np.partition(degree, len(degree) - k)[len(degree) - k]
+            candidates = np.nonzero(degree >= max(threshold, 1))[0]
+        else:
+            candidates = np.nonzero(degree)[0]
+        largest = sorted((-int(degree[i]), self.codes[i]) for i in candidates)[:k]
+        return [(code, -value) for value, code in largest]
+
+    def ids(self, codes):
+        """
+        Vertex ids of many city codes with a binary search over the sorted codes, so there is no loop per code
+        :param codes: array or list of city codes
+        :return: array of the vertex ids, -1 for codes that aren't in the network
+        """
+        codes = np.asarray(codes, dtype=str)
+        if len(self._sorted_codes) == 0:
+            return np.full(codes.shape, -1, dtype=np.int32)
+        position = np.minimum(np.searchsorted(self._sorted_codes, codes), len(self._sorted_codes) - 1)
+        return np.where(self._sorted_codes[position] == codes, self._sorted_ids[position], -1)
+
+    def great_circle(self, start=None, destination=None):
+        """
+        Great circle distances from the city coordinates, computed for all the pairs in one go
+        :param start: array of start vertex ids, by default the start of every flight
+        :param destination: array of destination vertex ids, by default the destination of every flight
+        :return: array of the distances in km, nan where a city has no coordinates
+        """
+        if start is None:
+            start, destination = self.start, self.destination
+        return haversine_many(self.coordinates[start], self.coordinates[destination])
+
+    def inconsistent_flights(self, tolerance=0.1, slack=150):
+        """
+        Flights whose distance is too far from the great circle distance between their cities
+        The coordinates are only whole degrees, so a distance is allowed to be off by the slack
+        or by the tolerance times the great circle distance, whichever is bigger
+        Every route is reported once, from the city with the lower vertex id
+        :param tolerance: allowed relative difference
+        :param slack: allowed difference in km
+        :return: list of start, destination, distance and great circle distance
+        """
+        computed = self.great_circle()
+        distance = self.distance.astype(np.float64)
+        wrong = np.abs(distance - computed) > np.maximum(slack, tolerance * computed)
+        wrong &= (self.start < self.destination) | ~self._has_reverse()
+        return [(self.codes[self.start[i]], self.codes[self.destination[i]], self.distance[i].item(),
+                 int(round(computed[i]))) for i in np.nonzero(wrong)[0]]
+
+    def _has_reverse(self):
+        """
+        Whether every flight also has a flight in the other direction
+        :return: boolean array indexed like the flights
+        """
+        size = len(self.codes)
+        keys = self.start.astype(np.int64) * size + self.destination
+        reverse = self.destination.astype(np.int64) * size + self.start
+        return np.isin(reverse, keys)
+
+    def visualize_url(self):
+        """
+        Builds the gcmap link of the whole network
+        :return: the link with every flight in it
+        """
+        if len(self.start) == 0:
+            return "http://www.gcmap.com/mapui?P="
+        pairs = self.code_array[self.start] + "-" + self.code_array[self.destination]
+        return "http://www.gcmap.com/mapui?P={},".format(",".join(pairs))
+
+
+def _numeric(values):
+    """
+    Turns a list of values into a numeric array, converting strings typed into the console
+    :param values: list of numbers
+    :return: integer array if possible otherwise a float array
+    """
+    array = np.asarray(values)
+    if array.dtype.kind not in "iuf":
+        array = np.array([float(value) for value in values])
+        if len(array) and np.all(array == np.floor(array)):
+            array = array.astype(np.int64)
+    return array
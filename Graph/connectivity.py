@@ -0,0 +1,666 @@
+"""
+Connectivity of this graph
+@author David Guan
+"""
+
+import collections as col
+import threading
+
+from persistent import PersistentMap
+
+
+class UnionFind:
+    def __init__(self):
+        """
+        Constructor for the UnionFind class
+        Disjoint sets of city codes or routes with union by size and path halving, so joining and finding are nearly
+        O(1). Sets can only be joined, an element can only be taken out while it is alone in its set or when its
+        whole set is thrown away
+        The parents and sizes are plain dictionaries until the sets are first copied, and persistent maps shared
+        with the copies from then on, so building the sets doesn't pay for sharing them
+        :return: nothing
+        """
+        self.parent = {}
+        self.size = {}
+        self.count = 0
+
+    def copy(self):
+        """
+        Copy of the sets
+        :return: the new UnionFind
+        """
+        if not isinstance(self.parent, PersistentMap):
+            self.parent = PersistentMap(self.parent)
+            self.size = PersistentMap(self.size)
+        sets = UnionFind()
+        sets.parent = self.parent.copy()
+        sets.size = self.size.copy()
+        sets.count = self.count
+        return sets
+
+    def add(self, code):
+        """
+        Adds a city in a set of its own if it isn't in one yet
+        :param code: the city code
+        :return: nothing
+        """
+        if code not in self.parent:
+            self.parent[code] = code
+            self.size[code] = 1
+            self.count += 1
+
+    def remove(self, code):
+        """
+        Takes a city out if it is alone in its set
+        :param code: the city code
+        :return: true if it was taken out
+        """
+        if self.parent.get(code) != code or self.size[code] != 1:
+            return False
+        del self.parent[code]
+        del self.size[code]
+        self.count -= 1
+        return True
+
+    def add_set(self, codes):
+        """
+        Adds new elements that are all in one set, without joining them one at a time
+        :param codes: the elements, none of which may be in a set yet
+        :return: the element standing for the set
+        """
+        root = codes[0]
+        for code in codes:
+            self.parent[code] = root
+        self.size[root] = len(codes)
+        self.count += 1
+        return root
+
+    def discard(self, code):
+        """
+        Forgets an element whatever set it is in, for throwing away whole sets since the rest of its set may still
+        point at it
+        :param code: the element
+        :return: nothing
+        """
+        self.parent.pop(code, None)
+        if self.size.pop(code, None) is not None:
+            self.count -= 1
+
+    def find(self, code):
+        """
+        The city standing for the set of a city
+        :param code: the city code, which must be in a set
+        :return: the code of the root of its set
+        """
+        parent = self.parent
+        while parent[code] != code:
+            parent[code] = parent[parent[code]]
+            code = parent[code]
+        return code
+
+    def union(self, first, second):
+        """
+        Joins the sets of two cities, adding them first if needed
+        :param first: a city code
+        :param second: the other city code
+        :return: true if they were in different sets
+        """
+        self.add(first)
+        self.add(second)
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size.pop(second)
+        self.count -= 1
+        return True
+
+
+class Connectivity:
+    def __init__(self, graph):
+        """
+        Constructor for the Connectivity class
+        Knows which cities are connected and which cities and routes would split the network if removed
+        The routes are taken as undirected links, the graph always adds and removes both ways of a route together.
+        Every part of the network has a label and a spanning tree, and the routes of every tree are grouped into the
+        blocks of the part, the biggest sets of routes with no city whose removal splits them
+        A city is an articulation point if its tree routes are in more than one block and a route is a bridge if it
+        is alone in its block. The graph keeps it up to date through the same calls as the aggregates:
+        a route between two parts roots the smaller tree at its city, hangs it under the other one and relabels the
+        smaller part. A route within a part closes a cycle, so the blocks on the tree path between its cities are
+        joined into one, jumping a block at a time. Removing a bridge cuts its tree and relabels the smaller side,
+        found by searching both sides at once. Removing any other route marks only its part as stale. Questions about
+        a stale part are answered by searches that stop once the searches from every side meet, and its tree and
+        blocks are only worked out again when every articulation point or bridge is asked for
+        :param graph: the graph
+        :return: nothing
+        """
+        self.graph = graph
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets everything, for when the graph is emptied
+        :return: nothing
+        """
+        self._label = PersistentMap()
+        self._size = PersistentMap()
+        self._stale = PersistentMap()
+        self._parent = PersistentMap()
+        self._blocks = UnionFind()
+        self._top = PersistentMap()
+        self._count = PersistentMap()
+        self._labels = 0
+        self._built = True
+
+    def copy(self, graph):
+        """
+        Copy of the connectivity for a fork of the graph, sharing everything with this one
+        :param graph: the fork
+        :return: the new Connectivity
+        """
+        connectivity = Connectivity(graph)
+        for name in ("_label", "_size", "_stale", "_parent", "_blocks", "_top", "_count"):
+            setattr(connectivity, name, getattr(self, name).copy())
+        connectivity._labels = self._labels
+        connectivity._built = self._built
+        return connectivity
+
+    def rebuild(self, graph):
+        """
+        Forgets everything after a load that skipped the calls per city and route, it is all worked out again from
+        the graph when it is next asked for
+        :param graph: the graph
+        :return: nothing
+        """
+        self.clear()
+        self._built = False
+
+    def add_vertex(self, vertex):
+        """
+        Adds a city, which is a part of its own until a route reaches it
+        :param vertex: the city
+        :return: nothing
+        """
+        if self._built and vertex.code not in self._label:
+            self._add(vertex.code)
+
+    def remove_vertex(self, vertex):
+        """
+        Takes out a city with no routes, a city with routes stays until its last route is removed
+        :param vertex: the city, before any edit
+        :return: nothing
+        """
+        label = self._label.get(vertex.code) if self._built else None
+        if label is not None and self._size[label] == 1:
+            self._forget(vertex.code)
+
+    def add_edge(self, edge):
+        """
+        Links the cities of a route, unless they were already linked by the route the other way
+        :param edge: the route
+        :return: nothing
+        """
+        start, destination = edge.start, edge.destination
+        if not self._built or start == destination or self._has(destination, start):
+            return
+        for code in (start, destination):
+            if code not in self._label:
+                self._add(code)
+        first, second = self._label[start], self._label[destination]
+        if first == second:
+            if first not in self._stale:
+                self._close(start, destination)
+            return
+        if self._size[first] < self._size[second]:
+            start, destination, first, second = destination, start, second, first
+        if first not in self._stale and second not in self._stale:
+            self._graft(start, destination)
+        elif second in self._stale:
+            self._stale[first] = None
+        self._relabel(destination, second, first)
+
+    def remove_edge(self, edge):
+        """
+        Unlinks the cities of a route once neither way of it is left
+        :param edge: the route
+        :return: nothing
+        """
+        start, destination = edge.start, edge.destination
+        if not self._built or start == destination or self._has(start, destination) or self._has(destination, start):
+            return
+        label = self._label[start]
+        if label in self._stale:
+            part = self._split_off([start, destination])
+            if part is not None:
+                self._separate(part, label)
+        elif destination == self._parent.get(start) or start == self._parent.get(destination):
+            child, up = (start, destination) if destination == self._parent.get(start) else (destination, start)
+            key = _key(child, up)
+            if self._blocks.size.get(self._blocks.find(key)) == 1:
+                self._blocks.remove(key)
+                del self._top[key]
+                del self._parent[child]
+                self._uncount(child)
+                self._uncount(up)
+                self._separate(self._split_off([child, up]), label)
+            else:
+                self._stale[label] = None
+        else:
+            self._stale[label] = None
+        for code in (start, destination):
+            if code not in self.graph.vertices and self._size[self._label[code]] == 1:
+                self._forget(code)
+
+    def connected(self, start, destination):
+        """
+        Whether there is a way between two cities
+        :param start: a city code
+        :param destination: the other city code
+        :return: true if they are in the same part of the network
+        """
+        self._current()
+        label = self._label.get(start)
+        return label is not None and label == self._label.get(destination)
+
+    def count(self):
+        """
+        Number of separate parts of the network, a city with no routes being a part of its own
+        :return: the number
+        """
+        self._current()
+        return len(self._size)
+
+    def components(self):
+        """
+        The separate parts of the network
+        :return: list of the sets of city codes, biggest first
+        """
+        self._current()
+        parts = col.defaultdict(set)
+        for code, label in self._label.items():
+            parts[label].add(code)
+        return sorted(parts.values(), key=lambda part: (-len(part), min(part)))
+
+    def articulation_points(self):
+        """
+        Cities whose removal would split the part of the network they are in
+        :return: set of the city codes
+        """
+        self._refresh()
+        return {code for code, count in self._count.items() if count > 1}
+
+    def bridges(self):
+        """
+        Routes whose removal would split the part of the network they are in
+        :return: sorted list of the routes as pairs of city codes
+        """
+        self._refresh()
+        with self._lock:
+            keys = (_key(code, up) for code, up in self._parent.items())
+            return sorted(key for key in keys if self._blocks.size.get(self._blocks.find(key)) == 1)
+
+    def is_articulation_point(self, code):
+        """
+        Whether removing a city would split the network
+        :param code: the city code
+        :return: true if it would
+        """
+        self._current()
+        label = self._label.get(code)
+        if label is None:
+            return False
+        if label not in self._stale:
+            return self._count.get(code, 0) > 1
+        return self._split_off([city for city in self._neighbours(code) if city != code], city=code) is not None
+
+    def is_bridge(self, start, destination):
+        """
+        Whether removing a route would split the network
+        :param start: a city code
+        :param destination: the other city code
+        :return: true if it would
+        """
+        self._current()
+        if start == destination or not (self._has(start, destination) or self._has(destination, start)):
+            return False
+        if self._label[start] in self._stale:
+            return self._split_off([start, destination], route=(start, destination)) is not None
+        if destination == self._parent.get(start) or start == self._parent.get(destination):
+            with self._lock:
+                return self._blocks.size.get(self._blocks.find(_key(start, destination))) == 1
+        return False
+
+    def _current(self):
+        """
+        Works out the parts, trees and blocks of the whole network if a bulk load left them unknown
+        :return: nothing
+        """
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            codes = list(self.graph.vertices)
+            codes.extend(code for code, adjacency in self.graph.edges.items()
+                         if len(adjacency) and code not in self.graph.vertices)
+            label, parent, blocks, top, count = {}, {}, UnionFind(), {}, {}
+            sizes = {}
+            for part in self._explore(codes, parent, blocks, top, count):
+                for code in part:
+                    label[code] = self._labels
+                sizes[self._labels] = len(part)
+                self._labels += 1
+            self._label, self._size = PersistentMap(label), PersistentMap(sizes)
+            self._parent, self._top, self._count = PersistentMap(parent), PersistentMap(top), PersistentMap(count)
+            self._blocks = blocks
+            self._built = True
+
+    def _refresh(self):
+        """
+        Works out the trees and blocks of the stale parts again, each from the cities of that part only
+        :return: nothing
+        """
+        self._current()
+        if not self._stale:
+            return
+        with self._lock:
+            # the blocks of a stale part can still take in routes of a part that split off it, so all of the stale
+            # trees are forgotten before any is worked out again
+            codes = [code for code, label in self._label.items() if label in self._stale]
+            for code in codes:
+                self._drop_tree(code)
+            parent, top, count = {}, {}, {}
+            self._explore(codes, parent, self._blocks, top, count)
+            for mine, found in ((self._parent, parent), (self._top, top), (self._count, count)):
+                mine.update(found)
+            self._stale.clear()
+
+    def _explore(self, codes, parent, blocks, top, count):
+        """
+        Depth first search over the cities, finding the parts of the network with a spanning tree of each and its
+        blocks with Tarjan's algorithm, using a stack instead of recursion so long chains of cities don't reach the
+        recursion limit. Every city gets the time it was found and the earliest time reachable from below it in the
+        tree over a single route back. Once nothing below a child reaches above its parent, the child and the cities
+        found after it that aren't in a block yet form a block with the parent at the top
+        :param codes: city codes to start from, every city reached from them is searched
+        :param parent: dictionary filled with the parent of every city in the trees other than the roots
+        :param blocks: UnionFind the routes of every block are added to, as one set each
+        :param top: dictionary filled with the top city of every block, keyed by the route standing for the block
+        :param count: dictionary filled with the number of blocks the tree routes of every city are in
+        :return: list of the parts as lists of city codes
+        """
+        found = {}
+        low = {}
+        parts = []
+        clock = 0
+        for root in codes:
+            if root in found:
+                continue
+            found[root] = low[root] = clock
+            clock += 1
+            part = [root]
+            waiting = []
+            stack = [(root, iter(self._neighbours(root)))]
+            while stack:
+                code, neighbours = stack[-1]
+                for neighbour in neighbours:
+                    if neighbour == code:
+                        continue
+                    if neighbour not in found:
+                        found[neighbour] = low[neighbour] = clock
+                        clock += 1
+                        parent[neighbour] = code
+                        part.append(neighbour)
+                        waiting.append(neighbour)
+                        stack.append((neighbour, iter(self._neighbours(neighbour))))
+                        break
+                    if neighbour != parent.get(code) and found[neighbour] < low[code]:
+                        low[code] = found[neighbour]
+                else:
+                    stack.pop()
+                    if code == root:
+                        continue
+                    up = parent[code]
+                    if low[code] < low[up]:
+                        low[up] = low[code]
+                    if low[code] >= found[up]:
+                        members = []
+                        while not members or members[-1] != code:
+                            members.append(waiting.pop())
+                        top[blocks.add_set([_key(member, parent[member]) for member in members])] = up
+                        count[up] = count.get(up, 0) + 1
+                        for member in members:
+                            count[member] = count.get(member, 0) + 1
+            parts.append(part)
+        return parts
+
+    def _close(self, start, destination):
+        """
+        Joins the blocks on the tree path between two cities of a part that a new route links
+        Both ends walk up the tree a block at a time, from a city to the top of the block of its route to its parent,
+        until one reaches a city the other has been to. Every city the walks pass through between two blocks and the
+        city they meet at, if they reach it through different blocks, loses a block
+        :param start: a city code
+        :param destination: the other city code
+        :return: nothing
+        """
+        walks = ([], [])
+        seen = ({start: 0}, {destination: 0})
+        ends = [start, destination]
+        meet = None
+        while meet is None:
+            for side in (0, 1):
+                code = ends[side]
+                up = self._parent.get(code) if code is not None else None
+                if up is None:
+                    ends[side] = None
+                    continue
+                block = self._blocks.find(_key(code, up))
+                top = self._top[block]
+                walks[side].append(block)
+                seen[side][top] = len(walks[side])
+                ends[side] = top
+                if top in seen[1 - side]:
+                    meet = top
+                    break
+        walks = [walks[side][:seen[side][meet]] for side in (0, 1)]
+        for walk in walks:
+            for block in walk:
+                top = self._top[block]
+                if top != meet:
+                    self._uncount(top)
+        if walks[0] and walks[1] and walks[0][-1] != walks[1][-1]:
+            self._uncount(meet)
+        blocks = set(walks[0] + walks[1])
+        for block in blocks:
+            del self._top[block]
+        root = blocks.pop()
+        for block in blocks:
+            self._blocks.union(root, block)
+        self._top[self._blocks.find(root)] = meet
+
+    def _graft(self, start, destination):
+        """
+        Hangs the tree of a city under a city of another part, for a route between the two parts
+        The tree is first rooted at the city by turning around the routes on its way to the old root. Every block
+        on that way then has the city where the way enters it as its top
+        :param start: the city to hang the tree under
+        :param destination: the city whose tree is hung
+        :return: nothing
+        """
+        way = [destination]
+        while way[-1] in self._parent:
+            way.append(self._parent[way[-1]])
+        tops = {}
+        for code, up in zip(way, way[1:]):
+            tops.setdefault(self._blocks.find(_key(code, up)), code)
+        for code, up in zip(way, way[1:]):
+            self._parent[up] = code
+        self._parent.pop(destination, None)
+        self._top.update(tops)
+        self._parent[destination] = start
+        key = _key(start, destination)
+        self._blocks.add(key)
+        self._top[key] = start
+        for code in (start, destination):
+            self._count[code] = self._count.get(code, 0) + 1
+
+    def _split_off(self, starts, city=None, route=None):
+        """
+        Searches from several cities at once, a city from each search in turn, joining searches as they meet
+        Stops once they have all met or once one of them runs out of cities, which is then a part of the network
+        the others can't reach, so the cost is set by the smaller side rather than the whole part
+        :param starts: city codes to search from
+        :param city: a city code to leave out
+        :param route: a pair of city codes whose link is left out
+        :return: set of the cities of a part cut off from the others, or None if they are all connected
+        """
+        owner = {}
+        searches = UnionFind()
+        queues = {}
+        for start in starts:
+            if start != city and start not in owner:
+                owner[start] = start
+                searches.add(start)
+                queues[start] = (col.deque([start]), [start])
+        while searches.count > 1:
+            for search in list(queues):
+                if search not in queues:
+                    continue
+                pending, members = queues[search]
+                if not pending:
+                    return set(members)
+                code = pending.popleft()
+                for neighbour in self._neighbours(code):
+                    if neighbour == city or neighbour == code or (route is not None and (code, neighbour) in
+                                                                  (route, route[::-1])):
+                        continue
+                    other = owner.get(neighbour)
+                    if other is None:
+                        owner[neighbour] = search
+                        pending.append(neighbour)
+                        members.append(neighbour)
+                        continue
+                    other = searches.find(other)
+                    if other != search:
+                        searches.union(search, other)
+                        joined = searches.find(search)
+                        small, large = sorted((queues.pop(search), queues.pop(other)), key=lambda q: len(q[1]))
+                        large[0].extend(small[0])
+                        large[1].extend(small[1])
+                        queues[joined] = large
+                        search = joined
+                        pending, members = large
+        return None
+
+    def _add(self, code):
+        """
+        Adds a city as a part of its own
+        :param code: the city code
+        :return: nothing
+        """
+        self._label[code] = self._labels
+        self._size[self._labels] = 1
+        self._labels += 1
+
+    def _forget(self, code):
+        """
+        Takes out a city that is a part of its own
+        :param code: the city code
+        :return: nothing
+        """
+        label = self._label.pop(code)
+        del self._size[label]
+        self._stale.pop(label, None)
+        self._drop_tree(code)
+
+    def _relabel(self, code, old, new):
+        """
+        Moves every city of a part over to another label, for when a route joins it to that part
+        :param code: a city code of the part
+        :param old: label of the part
+        :param new: label it gets
+        :return: nothing
+        """
+        self._label[code] = new
+        stack = [code]
+        while stack:
+            for neighbour in self._neighbours(stack.pop()):
+                if self._label.get(neighbour) == old:
+                    self._label[neighbour] = new
+                    stack.append(neighbour)
+        self._size[new] += self._size.pop(old)
+        self._stale.pop(old, None)
+
+    def _separate(self, part, label):
+        """
+        Gives the cities split off from a part a label of their own, staying stale if the part was
+        :param part: set of the city codes split off
+        :param label: label of the part they were in
+        :return: nothing
+        """
+        for code in part:
+            self._label[code] = self._labels
+        self._size[self._labels] = len(part)
+        self._size[label] -= len(part)
+        if label in self._stale:
+            self._stale[self._labels] = None
+        self._labels += 1
+
+    def _drop_tree(self, code):
+        """
+        Forgets the route from a city to its parent and the blocks it was counted in, for working them out again
+        :param code: the city code
+        :return: nothing
+        """
+        up = self._parent.pop(code, None)
+        if up is not None:
+            key = _key(code, up)
+            self._blocks.discard(key)
+            self._top.pop(key, None)
+        self._count.pop(code, None)
+
+    def _uncount(self, code):
+        """
+        Takes one off the number of blocks the tree routes of a city are in
+        :param code: the city code
+        :return: nothing
+        """
+        count = self._count[code] - 1
+        if count:
+            self._count[code] = count
+        else:
+            del self._count[code]
+
+    def _neighbours(self, code):
+        """
+        Cities a city has a route to
+        :param code: the city code
+        :return: the destinations
+        """
+        adjacency = self.graph.edges.get(code)
+        return adjacency.destinations() if adjacency is not None else ()
+
+    def _has(self, start, destination):
+        """
+        Whether the graph has a route one way
+        :param start: starting city code
+        :param destination: destination city code
+        :return: true if it has
+        """
+        adjacency = self.graph.edges.get(start)
+        return adjacency is not None and adjacency.get(destination) is not None
+
+
+def _key(start, destination):
+    """
+    The same pair for a route whichever way around it is given
+    :param start: a city code
+    :param destination: the other city code
+    :return: the two codes in order
+    """
+    return (start, destination) if start <= destination else (destination, start)
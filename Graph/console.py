@@ -6,8 +6,52 @@ Console class for this graph
 from cmd import Cmd
 
 from graph import Graph
+from allpairs import AllPairs, RouteCache
+from parallel import BatchRouter
+import metrics
+from vertex import Vertex
+import os
 import webbrowser
 
+JSON_FILES = ['../Data/map_data.json', '../Data/cmi_hub.json']
+NAMED_FIELDS = ("code", "name", "country", "continent")
+NUMBER_FIELDS = ("timezone", "population", "region")
+SNAPSHOT = '../Data/network.snap'
+METRICS = '../Data/metrics.prom'
+
+
+def number(text):
+    """
+    Reads a number typed into the console
+    :param text: the text typed in
+    :return: an int or float, or None if it isn't a number
+    """
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+
+def load_network(graph):
+    """
+    Loads the network from the snapshot if it is newer than the json files
+    Otherwise parses the json files and writes a new snapshot so the next start is fast
+    :param graph: the empty graph to load into
+    :return: nothing
+    """
+    if os.path.exists(SNAPSHOT) and \
+            os.path.getmtime(SNAPSHOT) >= max(os.path.getmtime(location) for location in JSON_FILES):
+        graph.add_from_snapshot(SNAPSHOT)
+    else:
+        graph.add_from_json_files(JSON_FILES)
+        try:
+            graph.save_snapshot(SNAPSHOT)
+        except OSError:
+            pass
+
 
 class Console(Cmd):
     def __init__(self):
@@ -18,8 +62,8 @@ class Console(Cmd):
         self.prompt = "=>> "
         self.intro = "Welcome to CSAir!\nInput a command or type help for more"
         self.graph = Graph()
-        self.graph.add_from_json('../Data/map_data.json')
-        self.graph.add_from_json('../Data/cmi_hub.json')
+        load_network(self.graph)
+        self.routes = RouteCache(self.graph)
 
     def do_all_cities(self, args):
         """
@@ -41,7 +85,7 @@ class Console(Cmd):
             print("Enter a valid argument")
         else:
             if args in self.graph.vertices:
-                for key, val in vars(self.graph.vertices[args]).items():
+                for key, val in self.graph.vertices[args].to_dict().items():
                     print("{}: {}".format(key, val))
             else:
                 print("Enter a valid city")
@@ -59,6 +103,39 @@ class Console(Cmd):
         else:
             print("City does not exist!")
 
+    def do_reachable(self, args):
+        """
+        Lists the cities reachable from one or more cities within a number of legs and/or a distance
+        i.e. reachable CMI hops 2, reachable CHI NYC within 3000, reachable CMI hops 3 within 5000
+        :param args: city codes, then optionally hops and a number of legs and within and a distance in km
+        :return: the cities with their shortest distance and its number of legs
+        """
+        args = args.split()
+        sources = []
+        limits = {}
+        while args:
+            word = args.pop(0)
+            if word in ("hops", "within"):
+                value = number(args.pop(0)) if args else None
+                if value is None:
+                    print("Enter a number after {}".format(word))
+                    return
+                limits[word] = value
+            else:
+                sources.append(word)
+        if not sources:
+            print("Enter a city code")
+            return
+        try:
+            hops = int(limits["hops"]) if "hops" in limits else None
+            cities = self.graph.reachable(sources, hops, limits.get("within"))
+        except ValueError as error:
+            print(error)
+            return
+        for code, (distance, legs) in sorted(cities.items(), key=lambda item: (item[1][0], item[0])):
+            print("{} is {} km away in {} legs".format(code, distance, legs))
+        print("{} cities reached".format(len(cities)))
+
     def do_longest_flight(self, args):
         """
         Displays the longest flight in this network of flights
@@ -122,15 +199,82 @@ class Console(Cmd):
             print(continent, end=": ")
             print(", ".join(cities))
 
+    def do_cities_by(self, args):
+        """
+        Lists the cities matching every field and value given, the fields can be continent, country, region or timezone
+        i.e. cities_by continent Europe, cities_by country US region 1
+        :param args: pairs of a field and a value, values with spaces can use underscores, i.e. North_America
+        :return: the codes and names of the matching cities
+        """
+        args = args.split()
+        if len(args) < 2 or len(args) % 2 != 0:
+            print("Enter pairs of a field and a value")
+            return
+        filters = {}
+        for field, value in zip(args[::2], args[1::2]):
+            filters[field] = number(value) if field in NUMBER_FIELDS else value.replace("_", " ")
+        try:
+            codes = self.graph.cities_by(**filters)
+        except ValueError as error:
+            print(error)
+            return
+        for code in codes:
+            print("{} {}".format(code, self.graph.vertices[code].name))
+        print("{} cities found".format(len(codes)))
+
     def do_hubs(self, args):
         """
-        Displays the top 5 hubs based on the number of outgoing connections
-        :param args: nothing, type hubs
-        :return: the top 5 hubs by code
-        """
-        hubs = self.graph.hubs()
+        Displays the top hubs, by default the top 5 based on the number of outgoing connections
+        Can also rank by weighted (total distance), population (population of the cities flown to)
+        or betweenness, which samples up to 100 source cities on networks bigger than that and stops searching
+        from more of them after 5 seconds, so the estimate is rougher but still quick on big networks
+        i.e. hubs 10 betweenness
+        :param args: nothing, or the number of hubs and the ranking
+        :return: the top hubs by code
+        """
+        args = args.split()
+        k = 5
+        metric = "degree"
+        for arg in args:
+            if arg.isdigit():
+                k = int(arg)
+            else:
+                metric = arg
+        if metric not in ("degree", "weighted", "population", "betweenness"):
+            print("Rank by degree, weighted, population or betweenness")
+            return
+        samples = 100 if metric == "betweenness" and len(self.graph.vertices) > 100 else None
+        hubs = self.graph.hubs(k, metric, samples, seconds=5)
         for cities in hubs:
-            print("{} with {} outgoing routes".format(cities[0], cities[1]))
+            if metric == "degree":
+                print("{} with {} outgoing routes".format(cities[0], cities[1]))
+            else:
+                print("{} with {} {}".format(cities[0], round(cities[1], 2), metric))
+
+    def do_nearby(self, args):
+        """
+        Lists the cities closest to a city, or the ones within a distance of it
+        i.e. nearby CMI, nearby CMI 10, nearby CMI within 1000
+        :param args: a city code and optionally the number of cities or within and a distance in km
+        :return: the cities and how far away they are
+        """
+        args = args.split()
+        if len(args) == 0:
+            print("Enter a city code")
+            return
+        try:
+            if len(args) >= 3 and args[1] == "within" and number(args[2]) is not None:
+                cities = self.graph.cities_within(args[0], number(args[2]))
+            elif len(args) == 1 or number(args[1]) is not None:
+                cities = self.graph.nearest_cities(args[0], int(number(args[1])) if len(args) > 1 else 5)
+            else:
+                print("Enter a number of cities or within and a distance")
+                return
+        except ValueError as error:
+            print(error)
+            return
+        for code, distance in cities:
+            print("{} is {} km away".format(code, int(round(distance))))
 
     def do_visualize(self, args):
         """
@@ -139,10 +283,7 @@ class Console(Cmd):
         :param args: nothing, type visualize
         :return: a map of the entire network of flights
         """
-        url = "http://www.gcmap.com/mapui?P="
-        for code, _list in self.graph.edges.items():
-            for edge in _list:
-                url = "{}{}-{},".format(url, edge.start, edge.destination)
+        url = self.graph.visualize_url()
         print(url)
         webbrowser.open(url)
 
@@ -153,6 +294,8 @@ class Console(Cmd):
         :param args: city code to remove
         :return: city removed or not
         """
+        if args in self.graph.vertices and self.graph.would_split(args):
+            print("Warning: removing {} splits the network".format(args))
         if self.graph.remove_city(args):
             print("City removed")
         else:
@@ -170,11 +313,29 @@ class Console(Cmd):
         if len(route) <= 1:
             print("Enter a valid number of arguments")
         else:
+            if self.graph.route_would_split(route[0], route[1]):
+                print("Warning: removing {}-{} splits the network".format(route[0], route[1]))
             if self.graph.remove_route(route[0], route[1]):
                 print("Edge removed")
             else:
                 print("Edge couldn't be found")
 
+    def do_connectivity(self, args):
+        """
+        Shows whether every city can reach every other one, and the cities and routes whose removal would split
+        the network
+        :param args: nothing
+        :return: the parts of the network, articulation points and bridges
+        """
+        components = self.graph.components()
+        print("The network has {} separate part(s)".format(len(components)))
+        for part in components[1:]:
+            print("Cut off: {}".format(", ".join(sorted(part))))
+        points = sorted(self.graph.connectivity.articulation_points())
+        print("Cities whose removal splits the network: {}".format(", ".join(points) if points else "none"))
+        bridges = ["{}-{}".format(start, destination) for start, destination in self.graph.connectivity.bridges()]
+        print("Routes whose removal splits the network: {}".format(", ".join(bridges) if bridges else "none"))
+
     def do_add_city(self, args):
         """
         Adds a city to the network
@@ -183,19 +344,23 @@ class Console(Cmd):
         :return: city added or not
         """
         city = {"code": input("Enter city code"), "name": input("Enter city name"),
-                "country": input("Enter city country"), "continent": input("Enter city continent"),
-                "timezone": input("Enter city timezone")}
-        coordinates = input("Enter coordinates, i.e. N 5 W 74")
-        coordinates = coordinates.strip()
-        while len(coordinates) < 4:
-            coordinates = input("Please enter a valid coordinate parameter, i.e. N 5 W 74")
-            coordinates = coordinates.split()
-        city["coordinates"] = {coordinates[0]: coordinates[1], coordinates[2]: coordinates[3]}
-        population = input("Enter city population")
-        while int(population) < 0:
-            population = input("Please enter a valid population size")
+                "country": input("Enter city country"), "continent": input("Enter city continent")}
+        timezone = number(input("Enter city timezone"))
+        while timezone is None:
+            timezone = number(input("Please enter a valid timezone, i.e. -6"))
+        city["timezone"] = timezone
+        coordinates = input("Enter coordinates, i.e. N 5 W 74").split()
+        while len(coordinates) < 4 or number(coordinates[1]) is None or number(coordinates[3]) is None:
+            coordinates = input("Please enter a valid coordinate parameter, i.e. N 5 W 74").split()
+        city["coordinates"] = {coordinates[0]: number(coordinates[1]), coordinates[2]: number(coordinates[3])}
+        population = number(input("Enter city population"))
+        while population is None or population < 0:
+            population = number(input("Please enter a valid population size"))
         city["population"] = population
-        city["region"] = input("Enter city region")
+        region = number(input("Enter city region"))
+        while region is None:
+            region = number(input("Please enter a valid region, i.e. 1"))
+        city["region"] = region
         self.graph.add_city(city)
         print("City added!")
 
@@ -203,15 +368,42 @@ class Console(Cmd):
         """
         Takes in three parameters for args so that we can add them to the network
         Must add in the order of distance start destination
-        :param args: three different parameters, i.e. 5000 TYO LAX
+        Leave out the distance to use the great circle distance between the cities
+        :param args: three different parameters, i.e. 5000 TYO LAX, or two codes, i.e. TYO LAX
         :return: route added
         """
         route = args.split()
-        if len(route) < 3:
+        if len(route) == 2:
+            route.insert(0, None)
+        elif len(route) < 3 or number(route[0]) is None:
             print("Enter valid parameters")
+            return
         else:
+            route[0] = number(route[0])
+        try:
             self.graph.add_route(route[0], route[1], route[2])
             print("Route added!")
+        except ValueError as error:
+            print(error)
+
+    def do_check_distances(self, args):
+        """
+        Lists the routes whose distance doesn't match the coordinates of their cities
+        :param args: optionally the allowed difference as a fraction, i.e. 0.1
+        :return: the routes that are off with their great circle distance
+        """
+        tolerance = number(args.strip()) if args.strip() else 0.1
+        if tolerance is None:
+            print("Enter a valid tolerance")
+            return
+        try:
+            routes = self.graph.validate_distances(tolerance)
+        except ImportError as error:
+            print(error)
+            return
+        for start, destination, distance, computed in routes:
+            print("{}-{} is {} km but the cities are {} km apart".format(start, destination, distance, computed))
+        print("{} routes look wrong".format(len(routes)))
 
     def do_edit_city(self, args):
         """
@@ -224,8 +416,13 @@ class Console(Cmd):
         if len(city) < 3:
             print("Enter valid parameters")
         else:
-            if city[0] in self.graph.vertices:
-                self.graph.edit_city(city[0], city[1], city[2])
+            if city[1] not in Vertex.FIELDS or city[1] == "coordinates":
+                print("Enter a valid key, one of {}".format(", ".join(NAMED_FIELDS + NUMBER_FIELDS)))
+            elif city[1] in NUMBER_FIELDS and number(city[2]) is None:
+                print("Enter a number for the {}".format(city[1]))
+            elif city[0] in self.graph.vertices:
+                value = number(city[2]) if city[1] in NUMBER_FIELDS else city[2]
+                self.graph.edit_city(city[0], city[1], value)
                 print("City edited!")
             else:
                 print("City does not exist!")
@@ -233,21 +430,108 @@ class Console(Cmd):
     def do_save_json(self, args):
         """
         Saves the data to the json
-        Simply call by save_json
-        :param args: none
+        Simply call by save_json, or give a location and compact to leave out the indentation
+        i.e. save_json ../Data/save.json.gz compact
+        :param args: none, or the location of the file and optionally compact
         :return: JSON saved
         """
-        self.graph.save_to_json()
+        args = args.split()
+        compact = "compact" in args
+        locations = [arg for arg in args if arg != "compact"]
+        if len(locations) > 0:
+            self.graph.save_to_json(locations[0], compact)
+        else:
+            self.graph.save_to_json(compact=compact)
+        print("JSON saved!")
 
     def do_load_json(self, args):
         """
         Loads the data from the json
-        :param args: none, simply uses the same file
+        Several files can be given and are merged in order, i.e. load_json ../Data/map_data.json ../Data/cmi_hub.json
+        :param args: none to use the same file as save_json, or the locations of the files
         :return: JSON loaded
         """
-        self.graph.vertices.clear()
-        self.graph.edges.clear()
-        self.graph.add_from_json('../Data/save.json')
+        locations = args.split()
+        if len(locations) <= 0:
+            locations = ['../Data/save.json']
+        self.graph.clear()
+        self.graph.add_from_json_files(locations, self.print_progress)
+        print("\nJSON loaded!")
+
+    def do_batch(self, args):
+        """
+        Applies a file of changes together, one command per line, and applies none of them if any is wrong
+        The commands are add_route, del_route, del_city and edit_city with the same arguments as here
+        i.e. batch ../Data/schedule.txt
+        :param args: location of the file
+        :return: number of changes applied, or what was wrong
+        """
+        if len(args.split()) < 1:
+            print("Enter the location of the changes")
+            return
+        try:
+            with open(args.split()[0]) as file:
+                lines = [line.split() for line in file if line.strip()]
+        except OSError as error:
+            print("Changes couldn't be read: {}".format(error))
+            return
+        batch = self.graph.batch()
+        for line in lines:
+            if line[0] == "add_route" and len(line) == 3:
+                batch.add_route(None, line[1], line[2])
+            elif line[0] == "add_route" and len(line) == 4 and number(line[1]) is not None:
+                batch.add_route(number(line[1]), line[2], line[3])
+            elif line[0] == "del_route" and len(line) == 3:
+                batch.remove_route(line[1], line[2])
+            elif line[0] == "del_city" and len(line) == 2:
+                batch.remove_city(line[1])
+            elif line[0] == "edit_city" and len(line) >= 4 and (line[2] not in NUMBER_FIELDS or
+                                                                 number(" ".join(line[3:])) is not None):
+                value = " ".join(line[3:])
+                batch.edit_city(line[1], line[2], number(value) if line[2] in NUMBER_FIELDS else value)
+            else:
+                print("Unknown change or not a number: {}".format(" ".join(line)))
+                return
+        try:
+            print("{} changes applied!".format(batch.commit()))
+        except ValueError as error:
+            print(error)
+
+    @staticmethod
+    def print_progress(location, position, size):
+        """
+        Prints how much of a file has been loaded
+        :param location: location of the file
+        :param position: bytes read so far
+        :param size: total bytes of the file
+        :return: nothing
+        """
+        print("\rLoading {}: {}%".format(location, 100 * position // max(size, 1)), end="")
+
+    def do_save_snapshot(self, args):
+        """
+        Saves the network as a binary snapshot which loads much faster than the json
+        Saving to the default location means the console starts with this network next time
+        :param args: none to use the default location, or the location of the snapshot
+        :return: snapshot saved
+        """
+        location = args.strip() or SNAPSHOT
+        self.graph.save_snapshot(location)
+        print("Snapshot saved to {}".format(location))
+
+    def do_load_snapshot(self, args):
+        """
+        Replaces the network with the one in a binary snapshot
+        :param args: none to use the default location, or the location of the snapshot
+        :return: snapshot loaded
+        """
+        location = args.strip() or SNAPSHOT
+        if not os.path.exists(location):
+            print("Snapshot not found")
+        else:
+            self.graph.clear()
+            self.graph.add_from_snapshot(location)
+            print("Snapshot loaded!")
 
     def do_route_info(self, args):
         """
@@ -274,16 +558,171 @@ class Console(Cmd):
         if len(route) < 1:
             print("Enter two cities")
         else:
-            path = self.graph.djikstra(route[0], route[1])
-            print("Route is ", end="")
-            route = ""
-            for code in path:
-                if code is not path[-1]:
-                    print(code, end="->")
-                else:
-                    print(code)
-                route = route + " " + code
-            self.do_route_info(route)
+            path = self.routes.shortest_route(route[0], route[1])
+            print("Route is {}".format("->".join(path)))
+            self.do_route_info(" ".join(path))
+
+    def do_cheapest_route(self, args):
+        """
+        Gets the route with the lowest cost from two cities, priced the same way as route_info
+        :param args: two city codes, i.e. CMI NYC
+        :return: cheapest route between the two
+        """
+        route = args.split()
+        if len(route) < 2:
+            print("Enter two cities")
+        else:
+            path = self.graph.cheapest_route(route[0], route[1])
+            print("Route is {}".format("->".join(path)))
+            self.do_route_info(" ".join(path))
+
+    def do_fastest_route(self, args):
+        """
+        Gets the route with the lowest total time from two cities, layovers included like route_info
+        :param args: two city codes, i.e. CMI NYC
+        :return: fastest route between the two
+        """
+        route = args.split()
+        if len(route) < 2:
+            print("Enter two cities")
+        else:
+            path = self.graph.fastest_route(route[0], route[1])
+            print("Route is {}".format("->".join(path)))
+            self.do_route_info(" ".join(path))
+
+    def do_astar_route(self, args):
+        """
+        Gets the shortest route from two cities with A*, which uses the city coordinates to search less
+        :param args: two city codes, i.e. CMI NYC
+        :return: shortest route between the two and the number of cities expanded
+        """
+        route = args.split()
+        if len(route) < 2:
+            print("Enter two cities")
+        else:
+            path = self.graph.astar(route[0], route[1])
+            print("Route is {} ({} cities expanded)".format("->".join(path), self.graph.expanded))
+            self.do_route_info(" ".join(path))
+
+    def do_alternatives(self, args):
+        """
+        Gets the k shortest routes from two cities that don't visit a city twice, 3 by default
+        :param args: two city codes and optionally k, i.e. CMI NYC 5
+        :return: the routes with their distance, cost and time
+        """
+        route = args.split()
+        if len(route) < 2:
+            print("Enter two cities")
+            return
+        try:
+            k = int(route[2]) if len(route) > 2 else 3
+        except ValueError:
+            print("Enter a number of routes")
+            return
+        found = self.graph.alternatives(route[0], route[1], k)
+        if not found:
+            print("No route from {} to {}".format(route[0], route[1]))
+        for i, (path, distance, cost, time) in enumerate(found):
+            print("{}. {}: {} km, {} dollars, {} hours".format(i + 1, "->".join(path), distance, cost, time))
+
+    def do_batch_routes(self, args):
+        """
+        Finds the shortest routes for a file of city pairs on several processes and writes them to another file
+        Every line of the input is two city codes, every line of the output is the route and its route_info
+        i.e. batch_routes ../Data/pairs.txt ../Data/routes.txt
+        :param args: location of the pairs, location of the output and optionally the number of processes
+        :return: number of routes written
+        """
+        args = args.split()
+        if len(args) < 2:
+            print("Enter the location of the pairs and of the output")
+            return
+        processes = number(args[2]) if len(args) > 2 else None
+        if len(args) > 2 and (not isinstance(processes, int) or processes < 1):
+            print("The number of processes must be a whole number above zero")
+            return
+        try:
+            with open(args[0]) as pairs, open(args[1], 'w') as output, \
+                    BatchRouter(self.graph, processes) as router:
+                count = 0
+                lines = (line.split() for line in pairs)
+                for source, target, path, info in router.routes(line[:2] for line in lines if len(line) >= 2):
+                    output.write("{} {} {} {} {} {}\n".format(source, target, "->".join(path), *info))
+                    count += 1
+            print("{} routes written!".format(count))
+        except OSError as error:
+            print("Routes couldn't be written: {}".format(error))
+
+    def do_precompute_routes(self, args):
+        """
+        Precomputes the shortest routes between every pair of cities so shortest_route doesn't search
+        The tables can be saved and loaded again as long as the cities and routes didn't change
+        i.e. precompute_routes, precompute_routes save ../Data/routes.bin, precompute_routes load ../Data/routes.bin
+        :param args: nothing to compute, or save/load and a location
+        :return: routes precomputed, saved or loaded
+        """
+        args = args.split()
+        if len(args) == 0:
+            self.routes.table = AllPairs(self.graph)
+            self.routes.clear()
+            print("Routes precomputed for {} cities".format(len(self.routes.table.codes)))
+        elif len(args) < 2 or args[0] not in ("save", "load"):
+            print("Enter save or load and a location")
+        elif args[0] == "save":
+            if self.routes.table is None or not self.routes.table.is_current(self.graph):
+                self.routes.table = AllPairs(self.graph)
+            self.routes.table.save(args[1])
+            print("Routes saved!")
+        else:
+            try:
+                self.routes.table = AllPairs.load(args[1], self.graph)
+                self.routes.clear()
+                print("Routes loaded!")
+            except (OSError, ValueError) as error:
+                print("Routes couldn't be loaded: {}".format(error))
+
+    def onecmd(self, line):
+        """
+        Runs a command, timing it when metrics are on
+        :param line: the command typed in
+        :return: whether to stop
+        """
+        if not metrics.enabled():
+            return Cmd.onecmd(self, line)
+        command = self.parseline(line)[0] or "empty"
+        with metrics.timer("command_seconds", command if hasattr(self, "do_" + command) else "unknown"):
+            return Cmd.onecmd(self, line)
+
+    def do_stats(self, args):
+        """
+        Metrics of how long the graph operations and commands take and how much of the network searches touch
+        i.e. stats on, stats, stats save ../Data/metrics.prom, stats reset, stats off
+        :param args: nothing to show the metrics, or on, off, reset or save and optionally a location
+        :return: the metrics in the Prometheus text format, or whether they were turned on, off, reset or saved
+        """
+        args = args.split()
+        if len(args) == 0:
+            if not metrics.enabled():
+                print("Metrics are off, type stats on to start")
+            print(metrics.registry.export(), end="")
+        elif args[0] == "on":
+            metrics.enable()
+            print("Metrics on!")
+        elif args[0] == "off":
+            metrics.disable()
+            print("Metrics off!")
+        elif args[0] == "reset":
+            metrics.registry.reset()
+            print("Metrics reset!")
+        elif args[0] == "save":
+            location = args[1] if len(args) > 1 else METRICS
+            try:
+                metrics.registry.write(location)
+                print("Metrics saved to {}".format(location))
+            except OSError as error:
+                print("Metrics couldn't be saved: {}".format(error))
+        else:
+            print("Enter on, off, reset or save")
 
     def do_help(self, args):
         """
@@ -317,5 +756,6 @@ class Console(Cmd):
         print("Command not recognized. Type help for available commands")
 
 
-console = Console()
-console.cmdloop()
+if __name__ == '__main__':
+    console = Console()
+    console.cmdloop()
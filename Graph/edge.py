@@ -3,8 +3,12 @@ Edge class for this graph
 @author David Guan
 """
 
+from vertex import intern
+
 
 class Edge:
+    __slots__ = ("distance", "start", "destination")
+
     def __init__(self, distance, start, destination):
         """
         Constructor for the Edge class
@@ -14,7 +18,7 @@ class Edge:
         :return: nothing
         """
         self.distance = distance
-        self.start = start
-        self.destination = destination
+        self.start = intern(start)
+        self.destination = intern(destination)
 
 
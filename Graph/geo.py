@@ -0,0 +1,65 @@
+"""
+Great circle helpers for this graph
+@author David Guan
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS = 6371.0
+
+
+def latitude_longitude(coordinates):
+    """
+    Turns the coordinates of a city into signed degrees, i.e. {"N": 40, "W": 88} is (40, -88)
+    :param coordinates: dictionary of hemisphere to degrees like in the json
+    :return: latitude and longitude, or None if the coordinates aren't complete
+    """
+    latitude = longitude = None
+    for hemisphere, degrees in coordinates.items():
+        if hemisphere == "N":
+            latitude = float(degrees)
+        elif hemisphere == "S":
+            latitude = -float(degrees)
+        elif hemisphere == "E":
+            longitude = float(degrees)
+        elif hemisphere == "W":
+            longitude = -float(degrees)
+    if latitude is None or longitude is None:
+        return None
+    return latitude, longitude
+
+
+def haversine(start, destination):
+    """
+    Great circle distance between two points with the haversine formula
+    :param start: latitude and longitude in degrees
+    :param destination: latitude and longitude in degrees
+    :return: distance in km
+    """
+    lat1, lon1 = math.radians(start[0]), math.radians(start[1])
+    lat2, lon2 = math.radians(destination[0]), math.radians(destination[1])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_many(start, destination):
+    """
+    Great circle distances between many pairs of points at once, the same formula as haversine on whole arrays
+    Needs numpy, raises an ImportError if it isn't installed
+    :param start: array of shape (n, 2) with the latitudes and longitudes in degrees
+    :param destination: array of shape (n, 2) with the latitudes and longitudes in degrees
+    :return: array of the n distances in km, nan where a point is nan
+    """
+    if np is None:
+        raise ImportError("numpy is needed for haversine_many")
+    start = np.radians(np.asarray(start, dtype=np.float64))
+    destination = np.radians(np.asarray(destination, dtype=np.float64))
+    lat1, lon1 = start[..., 0], start[..., 1]
+    lat2, lon2 = destination[..., 0], destination[..., 1]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.minimum(1.0, np.sqrt(a)))
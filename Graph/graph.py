@@ -4,14 +4,88 @@ Graph class for this graph
 """
 
 import collections as col
-import json
-from vertex import Vertex
+from vertex import Vertex, LazyVertex, intern
 from edge import Edge
-import sys
+from adjacency import Adjacency
+from columnar import ColumnarStore
+from loader import JsonStream, Record
+from snapshot import Snapshot
+from writer import JsonWriter
+from geo import latitude_longitude, haversine, haversine_many
+from aggregates import Aggregates
+from spatial import SpatialIndex
+from indexes import AttributeIndex
+from transaction import Batch, value_problem
+from centrality import betweenness
+from alternatives import k_shortest_paths
+from reachability import ReachIndex
+from connectivity import Connectivity
 import heapq
+import itertools
 import math
 import queue as q
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _cost_multipliers():
+    """
+    The cost per km of each leg of a route, which goes down by 0.05 every leg and stops at zero
+    :return: list of the multipliers, the last one is used for every leg after it
+    """
+    multipliers = [0.35]
+    while multipliers[-1] > 0:
+        multipliers.append(max(0, round(multipliers[-1] - 0.05, 2)))
+    return multipliers
+
+
+COST_MULTIPLIERS = _cost_multipliers()
+
+
+def _check_value(key, val):
+    """
+    Checks a value for a field of a city before anything is changed, so a wrong type can't fail in the indexes
+    after the city or its routes were already stored
+    :param key: the field
+    :param val: the value
+    :return: nothing
+    """
+    problem = value_problem(key, val)
+    if problem is not None:
+        raise ValueError(problem)
+
+
+def trip_info(legs):
+    """
+    Distance, cost and time of a route from its legs, see Graph.route_info
+    :param legs: list of the distance of every leg and the number of routes out of the city it lands in
+    :return: the distance, cost, and time
+    """
+    total_distance = 0
+    cost = 0
+    time = 0
+    for i, (distance, routes) in enumerate(legs):
+        total_distance += distance
+        cost += COST_MULTIPLIERS[min(i, len(COST_MULTIPLIERS) - 1)] * distance
+        time += Graph.calc_time(distance)
+        # if this airport is not the last one since we don't need to calculate layover for last
+        if i != len(legs) - 1:
+            time += layover_time(routes)
+    return total_distance, round(cost, 2), round(time, 2)
+
+
+def layover_time(routes):
+    """
+    Layover time at a city, which is 2 hours minus 10 minutes for every outgoing route after the first
+    It doesn't go below zero for cities with lots of routes
+    :param routes: number of outgoing routes of the city
+    :return: layover time in hours
+    """
+    return max(0, 2 - ((1 / 6) * (routes - 1)))
+
 
 class Graph:
     def __init__(self):
@@ -20,145 +94,418 @@ class Graph:
         :return:
         """
         self.vertices = col.defaultdict()
-        self.edges = col.defaultdict(list)
+        self.edges = col.defaultdict(Adjacency)
+        self.version = 0
+        self.topology_version = 0
+        self.aggregates = Aggregates(self)
+        self.spatial = SpatialIndex()
+        self.attributes = AttributeIndex()
+        self.connectivity = Connectivity(self)
+        self._indexes = [self.aggregates, self.spatial, self.attributes, self.connectivity]
+        self._trees = {}
+        self._columnar = None
+        self._heuristic = None
+        self._moved = 0
+        self._reach = None
+        self._mine_vertices = None
+        self._mine_edges = None
+        self._deferred = None
+        self._bulk = False
+        self.expanded = 0
+        self.relaxed = 0
 
-    def add_from_json(self, location):
+    def add_from_json(self, location, progress=None, lazy=False):
         """
         Adds nodes and edges from the json
         Loads up the map_data from the Data folder and adds all the data into the graph
+        The file is streamed one record at a time so it never has to be parsed in one piece
         :param location of the file
+        :param progress: function called with the location, bytes read and total bytes while loading
+        :param lazy: keep only the code and where each city is in the file, the rest is read again when needed
+        :return:
+        """
+        missing = []
+        stream = JsonStream(location, progress)
+        records = stream.with_offsets() if lazy else ((key, record, None, None) for key, record in stream)
+        bulk = self._start_load()
+        try:
+            for key, record, start, end in records:
+                if key == "metros":
+                    if lazy:
+                        self._put_vertex(LazyVertex(record["code"], Record(location, start, end)))
+                    else:
+                        self._put_vertex(Vertex(record))
+                elif key == "routes":
+                    start = record["ports"][0]
+                    destination = record["ports"][1]
+                    distance = record.get("distance")
+                    if distance is None:
+                        missing.append((start, destination))
+                        continue
+                    self._put_edge(Edge(distance, start, destination))
+                    self._put_edge(Edge(distance, destination, start))
+            unknown = self._fill_distances(missing)
+        finally:
+            self._end_load(bulk)
+        self._changed()
+        if unknown:
+            raise ValueError("No distance or coordinates for the routes {}".format(
+                ", ".join("{}-{}".format(start, destination) for start, destination in unknown)))
+
+    def add_from_json_files(self, locations, progress=None, lazy=False):
+        """
+        Merges several json files into the network, i.e. map_data.json and then cmi_hub.json
+        :param locations: list of the file locations, loaded in order
+        :param progress: function called with the location, bytes read and total bytes while loading
+        :param lazy: load the cities lazily, see add_from_json
+        :return:
+        """
+        for location in locations:
+            self.add_from_json(location, progress, lazy)
+
+    def add_from_snapshot(self, location, lazy=False):
+        """
+        Adds nodes and edges from a binary snapshot written by save_snapshot
+        This is much faster than parsing the json since the file is memory mapped and already laid out in columns
+        Loading lazily only reads the codes and the routes. The snapshot then stays mapped and the rest of a city
+        is read from its row the first time it is needed, so routing never reads the city metadata at all
+        :param location: location of the snapshot
+        :param lazy: read the cities other than their codes only when needed
         :return:
         """
-        with open(location) as file:
-            data = json.load(file)
-            for metros in data["metros"]:
-                self.vertices[metros["code"]] = Vertex(metros)
-            for routes in data["routes"]:
-                start = routes["ports"][0]
-                destination = routes["ports"][1]
-                distance = routes["distance"]
-                self.edges[start].append(Edge(distance, start, destination))
-                self.edges[destination].append(Edge(distance, destination, start))
+        snapshot = Snapshot(location)
+        bulk = self._start_load()
+        try:
+            for vertex in snapshot.lazy_cities() if lazy else snapshot.cities():
+                self._put_vertex(vertex)
+            for code, adjacency in snapshot.adjacencies():
+                if bulk:
+                    self.edges[code] = adjacency
+                    continue
+                for edge in adjacency:
+                    self._put_edge(edge)
+        finally:
+            # the lazy cities read from the snapshot later, it is closed once the last of them is gone
+            if not lazy:
+                snapshot.close()
+            self._end_load(bulk)
+        self._changed()
+
+    def save_snapshot(self, location):
+        """
+        Saves the network as a binary snapshot, use add_from_snapshot to load it back
+        :param location: location of the snapshot
+        :return: nothing
+        """
+        Snapshot.write(self, location)
 
     def longest_flight(self):
         """
         Longest flight function to find the longest flight in the flights
+        Kept up to date as routes change so this doesn't look at every edge
         :return: start vertex, destination vertex, distance
         """
-        distance = 0
-        for code, _list in self.edges.items():
-            for edge in _list:
-                if edge.distance > distance:
-                    distance = edge.distance
-                    start = edge.start
-                    destination = edge.destination
-        return start, destination, distance
+        return self.aggregates.longest_flight()
 
     def shortest_flight(self):
         """
         Shortest flight function to find the shortest flight in the flights
+        Kept up to date as routes change so this doesn't look at every edge
         :return: start vertex, destination vertex, distance
         """
-        distance = sys.maxsize
-        for code, _list in self.edges.items():
-            for edge in _list:
-                if edge.distance < distance:
-                    distance = edge.distance
-                    start = edge.start
-                    destination = edge.destination
-        return start, destination, distance
+        return self.aggregates.shortest_flight()
 
     def average_distance(self):
         """
         Average distance of all the flights in the network
+        Uses the running total and count of the flights
         :return: the average of all the distances
         """
-        total = 0
-        edges = 0
-        for code, _list in self.edges.items():
-            for edge in _list:
-                total += edge.distance
-                edges += 1
-        return total / edges
+        return self.aggregates.average_distance()
+
+    def columnar(self):
+        """
+        Columnar copy of the network for vectorized statistics, rebuilt only after the network changes
+        i.e. graph.columnar().longest_flight() gives the same answer as graph.longest_flight()
+        Needs numpy
+        :return: the ColumnarStore of the current network
+        """
+        if self._columnar is None or self._columnar.version != self.version:
+            self._columnar = ColumnarStore(self)
+        return self._columnar
+
+    def reach_index(self):
+        """
+        Numbered copy of the routes for the reachability searches, rebuilt only after cities or routes change
+        :return: the ReachIndex of the current network
+        """
+        if self._reach is None or self._reach.topology_version != self.topology_version:
+            self._reach = ReachIndex(self)
+        return self._reach
+
+    def reachable(self, sources, hops=None, distance=None):
+        """
+        Cities reachable from one or more cities within a number of legs and a distance
+        i.e. graph.reachable("CMI", hops=2) or graph.reachable(["CHI", "NYC"], distance=3000)
+        :param sources: a city code or a list of them, every one of them starts at no distance
+        :param hops: most legs, None for no limit
+        :param distance: furthest distance in km, None for no limit
+        :return: dictionary of every city reached to its shortest distance and the legs of that route
+        """
+        if isinstance(sources, str):
+            sources = [sources]
+        return self.reach_index().within(sources, hops, distance)
+
+    def reach_sets(self, sources, hops=None):
+        """
+        Cities reachable from each of several cities within a number of legs, i.e. for all the hubs in one pass
+        :param sources: list of city codes
+        :param hops: most legs, None for no limit
+        :return: dictionary of every source to the set of cities it reaches, itself included
+        """
+        return self.reach_index().reach_sets(sources, hops)
+
+    def connected(self, start, destination):
+        """
+        Whether there is any way to fly between two cities
+        :param start: a city code
+        :param destination: the other city code
+        :return: true if there is
+        """
+        return self.connectivity.connected(start, destination)
+
+    def components(self):
+        """
+        The separate parts of the network, i.e. to check that every city can be flown to from every other one
+        :return: list of the sets of city codes, biggest first
+        """
+        return self.connectivity.components()
+
+    def would_split(self, code):
+        """
+        Whether removing a city would split the network, i.e. to check before remove_city
+        :param code: the city code
+        :return: true if some cities could no longer reach each other
+        """
+        return self.connectivity.is_articulation_point(code)
+
+    def route_would_split(self, start, destination):
+        """
+        Whether removing a route would split the network, i.e. to check before remove_route
+        :param start: a city code
+        :param destination: the other city code
+        :return: true if some cities could no longer reach each other
+        """
+        return self.connectivity.is_bridge(start, destination)
+
+    def great_circle_distance(self, start, destination):
+        """
+        Great circle distance between two cities from their coordinates, rounded to whole km like the json
+        :param start: starting city code
+        :param destination: destination city code
+        :return: the distance, or None if a city or its coordinates are missing
+        """
+        points = [self._point(start), self._point(destination)]
+        if None in points:
+            return None
+        return int(round(haversine(points[0], points[1])))
+
+    def great_circle_distances(self, starts, destinations):
+        """
+        Great circle distances between many pairs of cities at once, i.e. every candidate route of a schedule
+        The codes are looked up and the distances computed on whole arrays with no loop per pair
+        Needs numpy
+        :param starts: array or list of starting city codes
+        :param destinations: array or list of destination city codes, the same length
+        :return: array of the distances in km, nan where a city or its coordinates are missing
+        """
+        store = self.columnar()
+        return store.great_circle(store.ids(starts), store.ids(destinations))
+
+    def validate_distances(self, tolerance=0.1, slack=150):
+        """
+        Finds the routes whose distance doesn't match the coordinates of their cities
+        Needs numpy
+        :param tolerance: allowed difference as a fraction of the great circle distance
+        :param slack: allowed difference in km, since the coordinates are only whole degrees
+        :return: list of start, destination, distance and great circle distance of the routes that are off
+        """
+        return self.columnar().inconsistent_flights(tolerance, slack)
+
+    def cities_within(self, place, radius):
+        """
+        Cities within a distance of a city or a point, i.e. to propose routes for a new city
+        :param place: a city code or a latitude and longitude in degrees
+        :param radius: distance in km
+        :return: list of the city codes and their distances, closest first, without the city itself
+        """
+        point = self._place(place)
+        return [entry for entry in self.spatial.within(point, radius) if entry[0] != place]
+
+    def nearest_cities(self, place, k=5):
+        """
+        The cities closest to a city or a point
+        :param place: a city code or a latitude and longitude in degrees
+        :param k: number of cities
+        :return: list of the city codes and their distances, closest first, without the city itself
+        """
+        point = self._place(place)
+        return self.spatial.nearest(point, k, place if isinstance(place, str) else None)
+
+    def _place(self, place):
+        """
+        Latitude and longitude of a city code, or the point itself
+        :param place: a city code or a latitude and longitude in degrees
+        :return: latitude and longitude in degrees
+        """
+        if not isinstance(place, str):
+            return place
+        point = self._point(place)
+        if point is None:
+            raise ValueError("No coordinates for {}".format(place))
+        return point
+
+    def _fill_distances(self, routes):
+        """
+        Adds routes that came without a distance using the great circle distance between their cities
+        Only the cities of these routes are looked up, so lazily loaded cities elsewhere stay unloaded
+        :param routes: list of start and destination codes
+        :return: list of the routes that couldn't be added because a city or its coordinates are missing
+        """
+        if not routes:
+            return []
+        points = {}
+        for route in routes:
+            for code in route:
+                if code not in points:
+                    points[code] = self._point(code)
+        known = [route for route in routes if points[route[0]] is not None and points[route[1]] is not None]
+        if np is not None and known:
+            computed = haversine_many([points[start] for start, destination in known],
+                                      [points[destination] for start, destination in known]).tolist()
+        else:
+            computed = [haversine(points[start], points[destination]) for start, destination in known]
+        distances = dict(zip(known, (int(round(distance)) for distance in computed)))
+        unknown = []
+        for start, destination in routes:
+            distance = distances.get((start, destination))
+            if distance is None:
+                unknown.append((start, destination))
+                continue
+            self._put_edge(Edge(distance, start, destination))
+            self._put_edge(Edge(distance, destination, start))
+        return unknown
+
+    def _point(self, code):
+        """
+        Latitude and longitude of a city
+        :param code: the city code
+        :return: latitude and longitude in degrees, or None if the city or its coordinates are missing
+        """
+        city = self.vertices.get(code)
+        if city is None or not isinstance(city.coordinates, dict):
+            return None
+        return latitude_longitude(city.coordinates)
+
+    def visualize_url(self):
+        """
+        Builds the gcmap link of the entire network of flights
+        :return: the link with every flight in it
+        """
+        flights = ["{}-{},".format(edge.start, edge.destination) for _list in self.edges.values() for edge in _list]
+        return "http://www.gcmap.com/mapui?P=" + "".join(flights)
 
     def biggest_city(self):
         """
         Biggest city in the network by population size
+        Kept up to date as cities change so this doesn't look at every city
         :return: the biggest city by code, name, and size
         """
-        biggest = 0
-        for code, node in self.vertices.items():
-            if node.population > biggest:
-                biggest = node.population
-                city_code = node.code
-                name = node.name
-        return city_code, name, biggest
+        return self.aggregates.biggest_city()
 
     def smallest_city(self):
         """
         Smallest city in the network by population size
+        Kept up to date as cities change so this doesn't look at every city
         :return: the smallest city by code, name, and size
         """
-        smallest = sys.maxsize
-        for code, node in self.vertices.items():
-            if node.population < smallest:
-                smallest = node.population
-                city_code = node.code
-                name = node.name
-        return city_code, name, smallest
+        return self.aggregates.smallest_city()
 
     def average_city_size(self):
         """
         Average population size of all the cities in the network
+        Uses the running total and count of the cities
         :return: average population size, rounded down
         """
-        average = 0
-        total = 0
-        for code, node in self.vertices.items():
-            average += node.population
-            total += 1
-        return average // total
+        return self.aggregates.average_city_size()
 
     def continents_and_cities(self):
         """
-        List of the continents and the cities in them
+        List of the continents and the cities in them, read off the continent index
         :return: a list of the continents and cities in each continent
         """
         list_all = col.defaultdict(list)
-        for code, node in self.vertices.items():
-            list_all[node.continent].append(node.name)
+        for continent, codes in self.attributes.groups("continent").items():
+            list_all[continent] = [self.vertices[code].name for code in codes]
         return list_all
 
-    def hubs(self):
+    def cities_by(self, **filters):
+        """
+        Cities matching every filter on the indexed fields continent, country, region and timezone
+        i.e. graph.cities_by(continent="Europe", region=1)
+        :param filters: the fields and the values they must have
+        :return: list of the city codes
+        """
+        return self.attributes.find(**filters)
+
+    def hubs(self, k=5, metric="degree", samples=None, seed=None, seconds=None):
         """
         List the hubs of the network
-        http://stackoverflow.com/questions/14795333/how-to-maintain-dictionary-in-a-heap-in-python
-        The first last few lines were used from this stackoverflow post. Not sure how it exactly works but it works
-        :return: a list that has the all the cities with the number of connections
+        The number of outgoing routes of every city is kept up to date in order, so only the top k are looked at
+        Other rankings are:
+        weighted, the total distance of the outgoing routes, also kept up to date
+        population, the total population of the cities the outgoing routes go to
+        betweenness, how many shortest routes between other cities go through the city, which can be
+        estimated from a sample of source cities on big networks
+        Ties are broken by code
+        :param k: number of hubs
+        :param metric: degree, weighted, population or betweenness
+        :param samples: number of source cities to sample for betweenness, None to use all of them
+        :param seed: seed for the betweenness sample
+        :param seconds: time after which betweenness stops searching from more sources, None for no limit
+        :return: a list that has the all the cities with the number of connections or their score
         """
-        cities = col.defaultdict(int)
-        for code, _list in self.edges.items():
-            for edge in _list:
-                cities[code] += 1
-        heap = [(-value, key) for key, value in cities.items()]
-        largest = heapq.nsmallest(5, heap)
-        largest = [(key, -value) for value, key in largest]
-        return largest
+        if metric == "degree":
+            return self.aggregates.hubs(k)
+        if metric == "weighted":
+            scores = self.aggregates.weighted
+        elif metric == "population":
+            scores = {}
+            for code, _list in self.edges.items():
+                if len(_list) > 0:
+                    scores[code] = sum(self.vertices[edge.destination].population for edge in _list
+                                       if edge.destination in self.vertices)
+        elif metric == "betweenness":
+            scores = betweenness(self, samples, seed, seconds)
+        else:
+            raise ValueError("Unknown metric {}".format(metric))
+        largest = heapq.nsmallest(k, [(-value, key) for key, value in scores.items()])
+        return [(key, -value) for value, key in largest]
 
     def remove_city(self, code):
         """
         Removes the city from both the vertices and edges.
-        Since we do two way routes, we have to loop through the edges to see if it contains the edges
+        Since we do two way routes, only the cities this one flies to can have a route back to it
         :param code: city to remove
         :return: true or false based on whether city is removed
         """
         if code in self.vertices:
-            self.vertices.pop(code)
-            self.edges.pop(code)
-            for _code, _list in self.edges.items():
-                for edge in _list:
-                    if edge.start == code or edge.destination == code:
-                        _list.remove(edge)
+            self._drop_vertex(code)
+            for destination in list(self.edges[code].destinations()) if code in self.edges else []:
+                self._drop_edge(code, destination)
+                self._drop_edge(destination, code)
+            self.edges.pop(code, None)
+            self._changed()
             return True
         return False
 
@@ -170,12 +517,9 @@ class Graph:
         :return: true or false based on whether another route is removed
         """
         if start in self.edges and destination in self.edges:
-            for edge in self.edges[start]:
-                if edge.destination == destination:
-                    self.edges[start].remove(edge)
-            for edge in self.edges[destination]:
-                if edge.destination == start:
-                    self.edges[destination].remove(edge)
+            self._drop_edge(start, destination)
+            self._drop_edge(destination, start)
+            self._changed()
             return True
         return False
 
@@ -187,7 +531,11 @@ class Graph:
         :param city: dictionary set up with codes, names, population, etc
         :return: none
         """
-        self.vertices[city["code"]] = Vertex(city)
+        vertex = Vertex(city)
+        for key in Vertex.FIELDS:
+            _check_value(key, city[key])
+        self._put_vertex(vertex)
+        self._changed()
 
     def add_route(self, distance, start, destination):
         """
@@ -195,54 +543,80 @@ class Graph:
         This takes in three parameters which are simply codes and distances, since nothing else
         Is really needed
         Note that this doesn't really do much checking and adds the route in both directions
-        :param distance: distance of the route
+        :param distance: distance of the route, None to use the great circle distance between the cities
         :param start: starting city code
         :param destination: destination city code
         :return: none
         """
-        self.edges[start].append(Edge(distance, start, destination))
-        self.edges[destination].append(Edge(distance, destination, start))
+        if distance is None:
+            distance = self.great_circle_distance(start, destination)
+            if distance is None:
+                raise ValueError("No coordinates to get the distance from {} to {}".format(start, destination))
+        elif not isinstance(distance, (int, float)) or isinstance(distance, bool) or distance < 0:
+            raise ValueError("Bad distance {} from {} to {}".format(distance, start, destination))
+        self._put_edge(Edge(distance, start, destination))
+        self._put_edge(Edge(distance, destination, start))
+        self._changed()
 
     def edit_city(self, code, key, val):
         """
         Edits the city information. Note that this doesn't check for anything like whether it exists or not
+        Changing the code moves the routes of the city over to the new code as well
         :param code: code of the city
         :param key: the key to change in the city, i.e. code, name, country, etc
         :param val: the value of the key to change
         :return: none
         """
+        if key not in Vertex.FIELDS:
+            raise KeyError("No field {}".format(key))
+        _check_value(key, val)
         if key == "code":
-            self.vertices[val] = self.vertices.pop(code)
-            setattr(self.vertices[val], key, val)
+            val = intern(val)
+            self._own_vertex(code)
+            vertex = self._drop_vertex(code)
+            routes = []
+            for destination in list(self.edges[code].destinations()):
+                routes.append(self._drop_edge(code, destination))
+                self._drop_edge(destination, code)
+            self.edges.pop(code, None)
+            setattr(vertex, key, val)
+            self._put_vertex(vertex)
+            for edge in routes:
+                destination = val if edge.destination == code else edge.destination
+                self._put_edge(Edge(edge.distance, val, destination))
+                self._put_edge(Edge(edge.distance, destination, val))
+            self._changed()
         else:
-            setattr(self.vertices[code], key, val)
+            self._edit_field(code, key, val)
+            self._changed(topology=False)
 
-    def save_to_json(self):
+    def _edit_field(self, code, key, val):
+        """
+        Changes a field other than the code of a city and tells the indexes about it, without checking the value
+        :param code: code of the city
+        :param key: the field
+        :param val: the new value
+        :return: nothing
+        """
+        vertex = self._own_vertex(code)
+        for index in self._indexes:
+            index.remove_vertex(vertex)
+        setattr(vertex, key, val)
+        for index in self._indexes:
+            index.add_vertex(vertex)
+        if key == "coordinates":
+            self._moved += 1
+
+    def save_to_json(self, location='../Data/save.json', compact=False, compress=None):
         """
         Saves the json to disk. Sets up the files and makes sure that extra routes aren't duplicated
+        Records are streamed to the file and routes are deduplicated in linear time
+        :param location: path of the file or a file object to write to. Paths ending in .gz are gzipped
+        :param compact: leave out the indentation to make the file smaller
+        :param compress: gzip the output, by default only paths ending in .gz are
         :return: nothing
         """
-        file = col.defaultdict(list)
-        data_sources = ["http://www.gcmap.com/",
-                        "http://www.theodora.com/country_digraphs.html",
-                        "http://www.citypopulation.de/world/Agglomerations.html",
-                        "http://www.mongabay.com/cities_urban_01.htm",
-                        "http://en.wikipedia.org/wiki/Urban_agglomeration",
-                        "http://www.worldtimezone.com/standard.html"]
-        file["data_sources"] = data_sources
-        for code, city in self.vertices.items():
-            metros = {}
-            for key, val in vars(city).items():
-                metros[key] = val
-            file["metros"].append(metros)
-        for code, _list in self.edges.items():
-            for edge in _list:
-                routes = {"ports": [edge.start, edge.destination], "distance": edge.distance}
-                second_route = {"ports": [edge.destination, edge.start], "distance": edge.distance}
-                if second_route not in file["routes"]:
-                    file["routes"].append(routes)
-        with open('../Data/save.json', 'w') as outfile:
-            json.dump(file, outfile, indent=4)
+        JsonWriter(compact).write(self, location, compress)
 
     def route_info(self, route):
         """
@@ -252,30 +626,29 @@ class Graph:
         :param route an array or list of routes. Start from the first index to the last
         :return: the distance, cost, and time
         """
-        total_distance = 0
-        cost_mult = 0.35
-        cost = 0
-        time = 0
-        if route[0] in self.edges:
-            for i in range(len(route) - 1):
-                for edge in self.edges[route[i]]:
-                    if edge.destination == route[i + 1]:
-                        total_distance += edge.distance
-                        cost += cost_mult * edge.distance
-                        time += self.calc_time(edge.distance)
-                        outgoing = len(self.edges[edge.destination])
-                        # if this airport is not the last one since we don't need to calculate layover for last
-                        if i is not len(route) - 2:
-                            time += 2 - ((1 / 6) * (outgoing - 1))
-                        if cost_mult > 0:
-                            cost_mult -= 0.05
-                        break;
-                    else:
-                        if edge == self.edges[route[i]][-1]:
-                            return
-        return total_distance, round(cost, 2), round(time, 2)
+        if route[0] not in self.edges:
+            return 0, 0, 0
+        legs = []
+        for i in range(len(route) - 1):
+            if route[i] not in self.edges:
+                return
+            edge = self.edges[route[i]].get(route[i + 1])
+            if edge is None:
+                return
+            legs.append((edge.distance, len(self.edges.get(edge.destination, ()))))
+        return trip_info(legs)
+
+    def layover(self, code):
+        """
+        Calculates the layover time at a city, which is 2 hours minus 10 minutes for every outgoing route after the first
+        It doesn't go below zero for cities with lots of routes
+        :param code: code of the city
+        :return: layover time in hours
+        """
+        return layover_time(len(self.edges.get(code, ())))
 
-    def calc_time(self, distance):
+    @staticmethod
+    def calc_time(distance):
         """
         Calculates the time needed for the distance
         This is all in hours
@@ -294,38 +667,445 @@ class Graph:
     def djikstra(self, source, target):
         """
         Calculates the shortest route between two cities using Djikstra
-        Taken from the pseudocode from Wikipedia
+        Uses a binary heap with lazy deletion and stops as soon as the target is settled
+        If a full shortest path tree from the source is cached it is reused instead of searching again
+
+        :param source: the source city of the algorithm
+        :param target: the target city of the algorithm
+        :return: the shortest path
+        """
+        if source in self._trees:
+            prev = self._trees[source][1]
+        else:
+            prev = self._search(source, target)[1]
+        return self._build_path(prev, target)
+
+    def shortest_path_tree(self, source):
+        """
+        Calculates the whole shortest path tree from the source city
+        The tree is cached so later queries from the same origin don't search again
+        The cache is thrown away whenever the network changes
+        :param source: the source city of the tree
+        :return: dictionary of distances and dictionary of previous cities on the shortest path
+        """
+        if source not in self._trees:
+            self._trees[source] = self._search(source)
+        return self._trees[source]
 
-        TODO: Perhaps try to use priority queue or heapq instead?
+    def _search(self, source, target=None):
+        """
+        Heap based Djikstra from the source
+        Vertices are pushed again when their distance improves and stale entries are skipped when popped
+        :param source: the source city of the search
+        :param target: city to stop at once it is settled, or None to settle every reachable city
+        :return: dictionary of distances and dictionary of previous cities
+        """
+        dist = {source: 0}
+        prev = {source: None}
+        settled = set()
+        heap = [(0, source)]
+        relaxed = 0
+        while heap:
+            distance, vertex_u = heapq.heappop(heap)
+            if vertex_u in settled:
+                continue
+            settled.add(vertex_u)
+            if vertex_u == target:
+                break
+            adjacency = self.edges.get(vertex_u, ())
+            relaxed += len(adjacency)
+            for edge in adjacency:
+                alt = distance + edge.distance
+                if alt < dist.get(edge.destination, math.inf):
+                    dist[edge.destination] = alt
+                    prev[edge.destination] = vertex_u
+                    heapq.heappush(heap, (alt, edge.destination))
+        self.expanded = len(settled)
+        self.relaxed = relaxed
+        return dist, prev
 
+    def astar(self, source, target):
+        """
+        Calculates the shortest route between two cities using A*
+        The great circle distance to the target from the city coordinates is used as the estimate of the
+        distance left, so cities away from the target are expanded later than with djikstra
+        self.expanded has the number of cities expanded and self.relaxed the number of routes looked at afterwards
         :param source: the source city of the algorithm
         :param target: the target city of the algorithm
         :return: the shortest path
         """
-        dist = {}
-        prev = {}
-        set_q = {}
-        for vertex in self.vertices.keys():
-            dist[vertex] = sys.maxsize
-            prev[vertex] = None
-            set_q[vertex] = dist[vertex]
-        dist[source] = 0
-        set_q[source] = 0
-        while set_q:
-            vertex_u = min(set_q, key=set_q.get)
+        scale, positions = self._heuristic_data()
+        goal = positions.get(target)
+
+        def estimate(code):
+            position = positions.get(code)
+            if goal is None or position is None:
+                return 0
+            return scale * haversine(position, goal)
+
+        dist = {source: 0}
+        prev = {source: None}
+        heap = [(estimate(source), 0, source)]
+        expanded = 0
+        relaxed = 0
+        while heap:
+            guess, distance, vertex_u = heapq.heappop(heap)
+            if distance > dist[vertex_u]:
+                continue
+            expanded += 1
             if vertex_u == target:
                 break
-            set_q.pop(vertex_u)
-            for edge in self.edges[vertex_u]:
-                alt = dist[vertex_u] + edge.distance
-                if alt < dist[edge.destination]:
+            adjacency = self.edges.get(vertex_u, ())
+            relaxed += len(adjacency)
+            for edge in adjacency:
+                alt = distance + edge.distance
+                if alt < dist.get(edge.destination, math.inf):
                     dist[edge.destination] = alt
-                    set_q[edge.destination] = dist[edge.destination]
                     prev[edge.destination] = vertex_u
-        path = []
-        vertex_u = target
-        while prev[vertex_u]:
-            path.insert(0, vertex_u)
-            vertex_u = prev[vertex_u]
-        path.insert(0, vertex_u)
+                    heapq.heappush(heap, (alt + estimate(edge.destination), alt, edge.destination))
+        self.expanded = expanded
+        self.relaxed = relaxed
+        return self._build_path(prev, target)
+
+    def cheapest_route(self, source, target):
+        """
+        Calculates the route with the lowest cost as priced by route_info, never visiting a city twice
+        Since the cost per km goes down every leg, the cost from a city depends on how many legs were already
+        flown, so this is a label setting search where a label is a loopless route from the source, taken off the
+        heap cheapest first. A label is dropped when its city already has a settled label with at least as many
+        legs that went through no city this one didn't, since that one can fly everything this one could next for
+        the same or less. Checking the cities as well as the legs is what keeps the search exact, a cheaper label
+        that went through more cities may not be able to fly the rest of the best route
+        Once a label has flown every priced leg the rest is free, so the first such label the target can be
+        reached from without going back through its cities gives the cheapest route, found with a breadth first
+        search. Labels never have more than that many legs, and none is made for a city with no way on
+        self.expanded has the number of labels settled afterwards
+        :param source: the source city
+        :param target: the target city
+        :return: the cheapest path
+        """
+        last = len(COST_MULTIPLIERS) - 1
+        settled = col.defaultdict(list)
+        order = itertools.count()
+        heap = [(0, next(order), 0, (source,), frozenset((source,)))]
+        expanded = 0
+        while heap:
+            cost, _, legs, path, visited = heapq.heappop(heap)
+            vertex_u = path[-1]
+            labels = settled[vertex_u]
+            if any(most >= legs and cities <= visited for most, cities in labels):
+                continue
+            labels.append((legs, visited))
+            expanded += 1
+            if vertex_u == target:
+                self.expanded = expanded
+                return list(path)
+            if legs == last:
+                rest = self._free_way(vertex_u, target, visited)
+                if rest is not None:
+                    self.expanded = expanded
+                    return list(path) + rest
+                continue
+            multiplier = COST_MULTIPLIERS[legs]
+            for edge in self.edges.get(vertex_u, ()):
+                destination = edge.destination
+                if destination in visited:
+                    continue
+                # a city whose routes all lead back to cities already flown through is a dead end
+                onward = self.edges.get(destination)
+                if destination != target and (onward is None or all(city in visited for city in onward.destinations())):
+                    continue
+                heapq.heappush(heap, (cost + multiplier * edge.distance, next(order), legs + 1,
+                                      path + (destination,), visited | {destination}))
+        self.expanded = expanded
+        return [target]
+
+    def _free_way(self, source, target, avoid):
+        """
+        Breadth first search for a way between two cities that doesn't go through some others
+        :param source: the source city
+        :param target: the target city
+        :param avoid: set of the city codes not to go through, the source may be in it
+        :return: list of the cities after the source up to the target, or None if there is no way
+        """
+        prev = {source: None}
+        queue = col.deque([source])
+        while queue:
+            vertex_u = queue.popleft()
+            for destination in self.edges[vertex_u].destinations() if vertex_u in self.edges else ():
+                if destination in prev or destination in avoid:
+                    continue
+                prev[destination] = vertex_u
+                if destination == target:
+                    way = []
+                    while destination != source:
+                        way.append(destination)
+                        destination = prev[destination]
+                    way.reverse()
+                    return way
+                queue.append(destination)
+        return None
+
+    def fastest_route(self, source, target):
+        """
+        Calculates the route with the lowest total time as timed by route_info
+        Every leg takes calc_time of its distance plus the layover at the city it lands in,
+        except the last leg which has no layover
+        :param source: the source city
+        :param target: the target city
+        :return: the fastest path
+        """
+        time = {source: 0}
+        prev = {source: None}
+        settled = set()
+        heap = [(0, source)]
+        relaxed = 0
+        while heap:
+            total, vertex_u = heapq.heappop(heap)
+            if vertex_u in settled:
+                continue
+            settled.add(vertex_u)
+            if vertex_u == target:
+                break
+            adjacency = self.edges.get(vertex_u, ())
+            relaxed += len(adjacency)
+            for edge in adjacency:
+                alt = total + self.calc_time(edge.distance)
+                if edge.destination != target:
+                    alt += self.layover(edge.destination)
+                if alt < time.get(edge.destination, math.inf):
+                    time[edge.destination] = alt
+                    prev[edge.destination] = vertex_u
+                    heapq.heappush(heap, (alt, edge.destination))
+        self.expanded = len(settled)
+        self.relaxed = relaxed
+        return self._build_path(prev, target)
+
+    def alternatives(self, source, target, k=3):
+        """
+        The k shortest routes between two cities that don't visit a city twice, i.e. to offer other itineraries
+        The graph isn't changed while searching, see alternatives.k_shortest_paths
+        :param source: the source city
+        :param target: the target city
+        :param k: number of routes
+        :return: list of the paths with their distance, cost and time like route_info, shortest first
+        """
+        return [(path,) + self.route_info(path) for path, distance in k_shortest_paths(self, source, target, k)]
+
+    def _heuristic_data(self):
+        """
+        Positions of the cities and the scale for the A* estimate, rebuilt only after cities, routes or
+        coordinates change so editing names or populations doesn't throw it away
+        The scale is the smallest ratio of route distance to great circle distance over all routes,
+        which keeps the estimate from ever being longer than the real distance left even if the
+        distances or coordinates in the data are rough
+        :return: the scale and a dictionary of city code to latitude and longitude
+        """
+        key = (self.topology_version, self._moved)
+        if self._heuristic is not None and self._heuristic[0] == key:
+            return self._heuristic[1], self._heuristic[2]
+        positions = {}
+        for code, city in self.vertices.items():
+            position = latitude_longitude(city.coordinates)
+            if position is not None:
+                positions[code] = position
+        scale = math.inf
+        for code, _list in self.edges.items():
+            for edge in _list:
+                if code in positions and edge.destination in positions:
+                    great_circle = haversine(positions[code], positions[edge.destination])
+                    if great_circle > 0:
+                        scale = min(scale, edge.distance / great_circle)
+        # a tiny margin for rounding so the estimate stays below the real distance
+        scale = 0 if scale == math.inf else max(0.0, scale * (1 - 1e-9))
+        self._heuristic = (key, scale, positions)
+        return scale, positions
+
+    @staticmethod
+    def _build_path(prev, target):
+        """
+        Walks the previous cities back from the target to build the path
+        :param prev: dictionary of previous cities from a search
+        :param target: the last city of the path
+        :return: the path from the source to the target
+        """
+        path = [target]
+        vertex_u = prev.get(target)
+        while vertex_u is not None:
+            path.append(vertex_u)
+            vertex_u = prev.get(vertex_u)
+        path.reverse()
         return path
+
+    def _changed(self, topology=True):
+        """
+        Called after every change to the network so that cached searches are thrown away
+        version counts every change while topology_version only counts changes to the cities and routes
+        that searches depend on, so caches of routes can check it to know when they are stale
+        :param topology: whether cities or routes changed rather than just city information
+        :return: nothing
+        """
+        if self._deferred is not None:
+            self._deferred.append(topology)
+            return
+        self.version += 1
+        if topology:
+            self.topology_version += 1
+            self._trees = {}
+
+    def batch(self):
+        """
+        Collects changes and applies them together at the end of a with block, see Batch
+        i.e. with graph.batch() as batch: batch.add_route(2800, "CMI", "SFO")
+        :return: the Batch
+        """
+        return Batch(self)
+
+    def fork(self):
+        """
+        Copy of the network that can be changed without changing this one, i.e. for VersionedGraph
+        The cities, the routes and the lists of routes of every city are shared rather than copied, only the
+        dictionaries holding them are, which searches read in their inner loops so they stay plain dictionaries.
+        The indexes keep everything in persistent collections, so their copies share it all with this graph's.
+        Both graphs copy a city, a list of routes or a piece of an index the first time they change it, so neither
+        ever changes something the other one still uses and an edit after a fork only copies what it touches
+        :return: the new Graph
+        """
+        graph = Graph.__new__(Graph)
+        graph.vertices = self.vertices.copy()
+        graph.edges = self.edges.copy()
+        graph.version = self.version
+        graph.topology_version = self.topology_version
+        graph.aggregates = self.aggregates.copy(graph)
+        graph.spatial = self.spatial.copy(graph)
+        graph.attributes = self.attributes.copy(graph)
+        graph.connectivity = self.connectivity.copy(graph)
+        graph._indexes = [graph.aggregates, graph.spatial, graph.attributes, graph.connectivity]
+        graph._trees = self._trees
+        graph._columnar = self._columnar
+        graph._heuristic = self._heuristic
+        graph._moved = self._moved
+        graph._reach = self._reach
+        graph.expanded = 0
+        graph.relaxed = 0
+        graph._deferred = None
+        graph._bulk = False
+        self._mine_vertices = set()
+        self._mine_edges = set()
+        graph._mine_vertices = set()
+        graph._mine_edges = set()
+        return graph
+
+    def _start_load(self):
+        """
+        Starts a load, which skips telling the indexes about every city and route when the graph is empty so
+        they can be built in one go at the end. Loading into a graph that has cities keeps the calls, since a
+        small file merged into a big network shouldn't rebuild the indexes of the whole network
+        :return: whether the indexes are built at the end
+        """
+        self._bulk = not self.vertices and not self.edges
+        return self._bulk
+
+    def _end_load(self, bulk):
+        """
+        Ends a load, building the indexes from the graph if the load skipped them
+        This runs even when the load fails partway so the indexes always match what was loaded
+        :param bulk: what _start_load returned
+        :return: nothing
+        """
+        self._bulk = False
+        if bulk:
+            for index in self._indexes:
+                index.rebuild(self)
+
+    def _put_vertex(self, vertex):
+        """
+        Stores the city, replacing any city with the same code, and tells the indexes about it
+        :param vertex: the city
+        :return: nothing
+        """
+        if self._bulk:
+            self.vertices[vertex.code] = vertex
+            return
+        if self._mine_vertices is not None:
+            self._mine_vertices.add(vertex.code)
+        old = self.vertices.get(vertex.code)
+        if old is not None:
+            for index in self._indexes:
+                index.remove_vertex(old)
+        self.vertices[vertex.code] = vertex
+        for index in self._indexes:
+            index.add_vertex(vertex)
+
+    def _drop_vertex(self, code):
+        """
+        Removes the city, but not its routes, and tells the indexes about it
+        :param code: code of the city
+        :return: the removed city
+        """
+        vertex = self.vertices.pop(code)
+        for index in self._indexes:
+            index.remove_vertex(vertex)
+        return vertex
+
+    def _own_vertex(self, code):
+        """
+        The city for changing in place, copied first unless this graph made it since it was last forked
+        :param code: code of the city
+        :return: the city
+        """
+        if self._mine_vertices is not None and code not in self._mine_vertices:
+            self._mine_vertices.add(code)
+            if code in self.vertices:
+                self.vertices[code] = self.vertices[code].copy()
+        return self.vertices[code]
+
+    def _own_edges(self, code):
+        """
+        The routes of a city for changing in place, copied first unless this graph made them since it was last forked
+        :param code: code of the city
+        :return: the Adjacency of the city
+        """
+        if self._mine_edges is not None and code not in self._mine_edges:
+            self._mine_edges.add(code)
+            if code in self.edges:
+                self.edges[code] = self.edges[code].copy()
+        return self.edges[code]
+
+    def _put_edge(self, edge):
+        """
+        Stores one direction of a route, replacing any route between the same cities, and tells the indexes about it
+        :param edge: the route
+        :return: nothing
+        """
+        old = self._own_edges(edge.start).add(edge)
+        if self._bulk:
+            return
+        for index in self._indexes:
+            if old is not None:
+                index.remove_edge(old)
+            index.add_edge(edge)
+
+    def _drop_edge(self, start, destination):
+        """
+        Removes one direction of a route and tells the indexes about it
+        :param start: starting city code
+        :param destination: destination city code
+        :return: the removed route or None if there wasn't one
+        """
+        edge = self._own_edges(start).remove(destination) if start in self.edges else None
+        if edge is not None:
+            for index in self._indexes:
+                index.remove_edge(edge)
+        return edge
+
+    def clear(self):
+        """
+        Removes every city and route from the network
+        :return: nothing
+        """
+        self.vertices.clear()
+        self.edges.clear()
+        for index in self._indexes:
+            index.clear()
+        self._changed()
@@ -0,0 +1,158 @@
+"""
+Secondary indexes on the cities of this graph
+@author David Guan
+"""
+
+import collections as col
+import threading
+
+from persistent import PersistentMap, own_map
+from vertex import is_loaded, load_all
+
+INDEXED_FIELDS = ("continent", "country", "region", "timezone")
+
+
+class AttributeIndex:
+    def __init__(self, fields=INDEXED_FIELDS):
+        """
+        Constructor for the AttributeIndex class
+        Keeps the codes of the cities for every value of each field, i.e. every continent, so grouping and
+        filtering the cities only touches the cities in the answer. The codes of a value are kept in a persistent
+        map used as an ordered set, so they come back in the order they were added and forks share them
+        The graph keeps it up to date through the same calls as the aggregates. Cities that haven't been loaded
+        yet wait aside until the first query
+        :param fields: names of the city fields to index
+        :return: nothing
+        """
+        self.fields = fields
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets every city
+        :return: nothing
+        """
+        self.values = {field: PersistentMap() for field in self.fields}
+        self._pending = PersistentMap()
+        # ids of the sets of codes made since the index was last shared with a fork
+        self._mine = set()
+
+    def copy(self, graph):
+        """
+        Copy of the index for a fork of the graph, sharing the values with this one
+        :param graph: the fork
+        :return: the new AttributeIndex
+        """
+        index = AttributeIndex(self.fields)
+        index.values = {field: values.copy() for field, values in self.values.items()}
+        index._pending = self._pending.copy()
+        self._mine = set()
+        return index
+
+    def rebuild(self, graph):
+        """
+        Adds every city of the graph again, for after a load that skipped the calls per city
+        The values are filled as dictionaries and made persistent at the end
+        :param graph: the graph
+        :return: nothing
+        """
+        self.clear()
+        values = {field: col.defaultdict(dict) for field in self.fields}
+        pending = {}
+        for vertex in graph.vertices.values():
+            if not is_loaded(vertex):
+                pending[vertex.code] = vertex
+                continue
+            for field, codes in values.items():
+                codes[getattr(vertex, field)][vertex.code] = None
+        self._pending = PersistentMap(pending)
+        for field, groups in values.items():
+            self.values[field] = PersistentMap({value: PersistentMap(codes) for value, codes in groups.items()})
+            self._mine.update(id(codes) for codes in self.values[field].values())
+
+    def add_vertex(self, vertex):
+        """
+        Adds a city under its value of every field
+        :param vertex: the city
+        :return: nothing
+        """
+        if not is_loaded(vertex):
+            self._pending[vertex.code] = vertex
+            return
+        for field, values in self.values.items():
+            own_map(values, getattr(vertex, field), self._mine)[vertex.code] = None
+
+    def remove_vertex(self, vertex):
+        """
+        Takes a city out from under its values, dropping values no city has anymore
+        :param vertex: the city, before any edit
+        :return: nothing
+        """
+        if self._pending.pop(vertex.code, None) is not None:
+            return
+        for field, values in self.values.items():
+            value = getattr(vertex, field)
+            if value in values:
+                codes = own_map(values, value, self._mine)
+                codes.pop(vertex.code, None)
+                if not codes:
+                    del values[value]
+
+    def add_edge(self, edge):
+        pass
+
+    def remove_edge(self, edge):
+        pass
+
+    def groups(self, field):
+        """
+        The cities grouped by their value of a field
+        :param field: an indexed field
+        :return: dictionary of every value to the list of codes with it
+        """
+        return {value: list(codes) for value, codes in self._field(field).items()}
+
+    def lookup(self, field, value):
+        """
+        Codes of the cities with a value
+        :param field: an indexed field
+        :param value: the value, i.e. Europe for the continent
+        :return: list of the codes
+        """
+        return list(self._field(field).get(value, ()))
+
+    def find(self, **filters):
+        """
+        Codes of the cities matching every filter, starting from the value with the fewest cities
+        :param filters: indexed fields and the values they must have, i.e. continent="Europe", region=1
+        :return: list of the codes
+        """
+        if not filters:
+            raise ValueError("Give at least one field to filter on")
+        matches = sorted((self._field(field).get(value, {}) for field, value in filters.items()), key=len)
+        return [code for code in matches[0] if all(code in codes for codes in matches[1:])]
+
+    def _field(self, field):
+        """
+        Values of an indexed field
+        :param field: the field
+        :return: dictionary of every value to its codes
+        """
+        if field not in self.values:
+            raise ValueError("{} is not indexed".format(field))
+        self._flush()
+        return self.values[field]
+
+    def _flush(self):
+        """
+        Adds the cities that were waiting to be loaded
+        :return: nothing
+        """
+        if not self._pending:
+            return
+        with self._lock:
+            load_all(self._pending.values())
+            for vertex in self._pending.values():
+                self.add_vertex(vertex)
+            self._pending = PersistentMap()
@@ -0,0 +1,244 @@
+"""
+Streaming JSON loader for this graph
+@author David Guan
+"""
+
+import codecs
+import gzip
+import json
+import os
+
+
+class JsonStream:
+    def __init__(self, location, progress=None, chunk_size=1 << 16):
+        """
+        Constructor for the JsonStream class
+        Reads a network file like map_data.json a chunk at a time instead of calling json.load on all of it
+        Iterating over it gives (key, record) for every element of the top level arrays, i.e. ("metros", {...})
+        so only one record has to be in memory at a time. Files ending in .gz are decompressed on the fly
+        :param location: location of the file
+        :param progress: function called with the location, bytes read and total bytes after every chunk
+        :param chunk_size: number of bytes read at a time
+        :return: nothing
+        """
+        self.location = location
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.size = os.path.getsize(location)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._base = 0
+        self._ascii = True
+
+    def __iter__(self):
+        return self._records(False)
+
+    def with_offsets(self):
+        """
+        Same as iterating, but also gives where every record is in the file so it can be read again on its own
+        Only works for files that aren't compressed
+        :return: generator of (key, record, first byte, byte after the last)
+        """
+        if self.location.endswith(".gz"):
+            raise ValueError("Offsets can't be used with compressed files")
+        return self._records(True)
+
+    def _records(self, offsets):
+        """
+        Opens the file and streams its records
+        :param offsets: whether to give the byte offsets of the records as well
+        :return: generator of (key, record) or (key, record, first byte, byte after the last)
+        """
+        with open(self.location, 'rb') as raw:
+            self._raw = raw
+            if self.location.endswith(".gz"):
+                self._file = gzip.GzipFile(fileobj=raw)
+            else:
+                self._file = raw
+            self._text = codecs.getincrementaldecoder("utf-8")()
+            self._buffer = ""
+            self._pos = 0
+            self._eof = False
+            self._base = 0
+            self._ascii = True
+            yield from self._object(offsets)
+
+    def _read(self):
+        """
+        Reads the next chunk into the buffer, dropping the part that was already parsed
+        :return: false once the end of the file is reached
+        """
+        if self._eof:
+            return False
+        data = self._file.read(self.chunk_size)
+        self._base = self._byte(self._pos)
+        self._buffer = self._buffer[self._pos:] + self._text.decode(data, final=not data)
+        self._ascii = self._buffer.isascii()
+        self._pos = 0
+        if not data:
+            self._eof = True
+        if self.progress is not None:
+            self.progress(self.location, self._raw.tell(), self.size)
+        return True
+
+    def _byte(self, pos):
+        """
+        Byte offset in the file of a position in the buffer
+        :param pos: the position
+        :return: the byte offset
+        """
+        if self._ascii:
+            return self._base + pos
+        return self._base + len(self._buffer[:pos].encode("utf-8"))
+
+    def _peek(self):
+        """
+        Skips whitespace and gets the next character, reading more of the file if needed
+        :return: the next character or an empty string at the end of the file
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return ""
+
+    def _expect(self, char):
+        """
+        Skips over the next character and raises an exception if it isn't the expected one
+        :param char: the expected character
+        :return: nothing
+        """
+        if self._peek() != char:
+            raise ValueError("Expected {} at character {} of {}".format(char, self._pos, self.location))
+        self._pos += 1
+
+    def _value(self):
+        """
+        Decodes the next JSON value, reading more of the file until the whole value is in the buffer
+        :return: the decoded value
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # a number right at the end of the buffer might carry on in the next chunk
+            if end == len(self._buffer) and self._read():
+                continue
+            self._pos = end
+            return value
+
+    def _object(self, offsets=False):
+        """
+        Walks the keys of the top level object and streams the elements of its arrays
+        :param offsets: whether to give the byte offsets of the records as well
+        :return: generator of (key, record) or (key, record, first byte, byte after the last)
+        """
+        self._expect("{")
+        while True:
+            char = self._peek()
+            if char == "}":
+                return
+            if char == ",":
+                self._pos += 1
+                continue
+            key = self._value()
+            self._expect(":")
+            if self._peek() == "[":
+                self._pos += 1
+                while True:
+                    char = self._peek()
+                    if char == "]":
+                        self._pos += 1
+                        break
+                    if char == ",":
+                        self._pos += 1
+                        continue
+                    if char == "":
+                        raise ValueError("Unexpected end of {}".format(self.location))
+                    if offsets:
+                        start = self._byte(self._pos)
+                        value = self._value()
+                        yield key, value, start, self._byte(self._pos)
+                    else:
+                        yield key, self._value()
+            else:
+                self._value()
+
+
+class Record:
+    __slots__ = ("location", "start", "end")
+
+    def __init__(self, location, start, end):
+        """
+        Constructor for the Record class
+        Where a record is in a json file, called to read it again on its own like read_record
+        The records of many lazy cities are read together with many, which opens every file once
+        :param location: location of the file
+        :param start: first byte of the record
+        :param end: byte after the last one of the record
+        :return: nothing
+        """
+        self.location = location
+        self.start = start
+        self.end = end
+
+    def __call__(self):
+        """
+        Reads the record again
+        :return: the decoded record
+        """
+        return read_record(self.location, self.start, self.end)
+
+    @staticmethod
+    def many(records):
+        """
+        Reads several records again, see read_records
+        :param records: list of the Records
+        :return: list of the decoded records in the same order
+        """
+        return read_records(records)
+
+
+def read_record(location, start, end):
+    """
+    Reads one record again from where JsonStream.with_offsets found it
+    :param location: location of the file
+    :param start: first byte of the record
+    :param end: byte after the last one of the record
+    :return: the decoded record
+    """
+    with open(location, 'rb') as file:
+        file.seek(start)
+        return json.loads(file.read(end - start).decode("utf-8"))
+
+
+def read_records(records):
+    """
+    Reads many records again in one pass over each file, opening it once and going through the records in the
+    order they are in the file instead of opening it for every record. The records of a file are decoded
+    together as one json array, which saves calling the decoder for every record
+    :param records: list of the Records
+    :return: list of the decoded records in the same order
+    """
+    found = [None] * len(records)
+    files = {}
+    for i, record in enumerate(records):
+        files.setdefault(record.location, []).append(i)
+    for location, positions in files.items():
+        positions.sort(key=lambda i: records[i].start)
+        with open(location, 'rb') as file:
+            pieces = []
+            for i in positions:
+                file.seek(records[i].start)
+                pieces.append(file.read(records[i].end - records[i].start))
+        for i, record in zip(positions, json.loads(b"[" + b",".join(pieces) + b"]")):
+            found[i] = record
+    return found
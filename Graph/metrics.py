@@ -0,0 +1,220 @@
+"""
+Metrics for this graph
+@author David Guan
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+
+from graph import Graph
+
+PREFIX = "csair"
+BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+TIMED = ("add_from_json", "add_from_snapshot", "save_to_json", "save_snapshot", "djikstra", "shortest_path_tree",
+         "astar", "cheapest_route", "fastest_route", "route_info", "hubs", "add_city", "remove_city", "add_route",
+         "remove_route", "edit_city", "cities_within", "nearest_cities", "cities_by", "validate_distances",
+         "alternatives", "reachable", "reach_sets", "components", "would_split", "route_would_split")
+SEARCHES = ("_search", "astar", "cheapest_route", "fastest_route", "alternatives")
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        """
+        Constructor for the Histogram class
+        Counts the observations that fall at or under every bucket bound, like a Prometheus histogram
+        :param buckets: the upper bounds of the buckets in increasing order
+        :return: nothing
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Adds an observation
+        :param value: the value, i.e. seconds taken
+        :return: nothing
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        """
+        Constructor for the Registry class
+        Holds counters and histograms keyed by name and a label, i.e. ("nodes_settled", "djikstra")
+        :return: nothing
+        """
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets everything recorded
+        :return: nothing
+        """
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def count(self, name, label, amount=1):
+        """
+        Adds to a counter
+        :param name: name of the counter
+        :param label: the operation it is for
+        :param amount: how much to add
+        :return: nothing
+        """
+        with self._lock:
+            self.counters[(name, label)] = self.counters.get((name, label), 0) + amount
+
+    def observe(self, name, label, value):
+        """
+        Adds an observation to a histogram
+        :param name: name of the histogram
+        :param label: the operation it is for
+        :param value: the value
+        :return: nothing
+        """
+        with self._lock:
+            if (name, label) not in self.histograms:
+                self.histograms[(name, label)] = Histogram()
+            self.histograms[(name, label)].observe(value)
+
+    def export(self):
+        """
+        Everything recorded in the Prometheus text format
+        :return: the text
+        """
+        lines = []
+        with self._lock:
+            for name in sorted({key[0] for key in self.histograms}):
+                lines.append("# TYPE {}_{} histogram".format(PREFIX, name))
+                for (other, label), histogram in sorted(self.histograms.items()):
+                    if other != name:
+                        continue
+                    total = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        total += count
+                        lines.append('{}_{}_bucket{{operation="{}",le="{}"}} {}'.format(PREFIX, name, label, bound,
+                                                                                      total))
+                    lines.append('{}_{}_sum{{operation="{}"}} {}'.format(PREFIX, name, label, histogram.sum))
+                    lines.append('{}_{}_count{{operation="{}"}} {}'.format(PREFIX, name, label, histogram.count))
+            for name in sorted({key[0] for key in self.counters}):
+                lines.append("# TYPE {}_{}_total counter".format(PREFIX, name))
+                for (other, label), value in sorted(self.counters.items()):
+                    if other == name:
+                        lines.append('{}_{}_total{{operation="{}"}} {}'.format(PREFIX, name, label, value))
+        return "\n".join(lines) + "\n"
+
+    def write(self, location):
+        """
+        Writes the export to a file, replacing it in one step so a scraper never reads half a file
+        :param location: location of the file
+        :return: nothing
+        """
+        temporary = location + ".tmp"
+        with open(temporary, 'w') as file:
+            file.write(self.export())
+        os.replace(temporary, location)
+
+
+registry = Registry()
+_originals = {}
+
+
+def enabled():
+    """
+    Whether the Graph methods are being measured
+    :return: true if they are
+    """
+    return bool(_originals)
+
+
+def enable():
+    """
+    Starts measuring the Graph methods by wrapping them on the class
+    Nothing is wrapped while metrics are off, so they cost nothing then
+    :return: nothing
+    """
+    if _originals:
+        return
+    for name in set(TIMED) | set(SEARCHES):
+        _originals[name] = Graph.__dict__[name]
+        setattr(Graph, name, _measured(name, _originals[name]))
+
+
+def disable():
+    """
+    Stops measuring and puts the original Graph methods back
+    :return: nothing
+    """
+    for name, method in _originals.items():
+        setattr(Graph, name, method)
+    _originals.clear()
+
+
+def timer(name, label):
+    """
+    Context manager timing a block into a histogram, for code outside Graph like the console commands
+    i.e. with metrics.timer("command_seconds", "shortest_route"): ...
+    :param name: name of the histogram
+    :param label: the operation it is for
+    :return: the context manager
+    """
+    return _Timer(name, label)
+
+
+class _Timer:
+    def __init__(self, name, label):
+        """
+        Constructor for the _Timer class, see timer
+        :param name: name of the histogram
+        :param label: the operation it is for
+        :return: nothing
+        """
+        self.name = name
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        registry.observe(self.name, self.label, time.perf_counter() - self.start)
+
+
+def _measured(name, method):
+    """
+    Wraps a Graph method so every call records its time, and for searches the cities settled and routes relaxed
+    :param name: name of the method
+    :param method: the method
+    :return: the wrapped method
+    """
+    timed = name in TIMED
+    search = name in SEARCHES
+    label = name.strip("_")
+
+    @functools.wraps(method)
+    def wrapper(graph, *args, **kwargs):
+        if search:
+            graph.expanded = graph.relaxed = 0
+        start = time.perf_counter()
+        try:
+            return method(graph, *args, **kwargs)
+        finally:
+            if timed:
+                registry.observe("graph_seconds", label, time.perf_counter() - start)
+            if search:
+                registry.count("nodes_settled", label, graph.expanded)
+                registry.count("edges_relaxed", label, graph.relaxed)
+            if name == "add_from_json" and args and isinstance(args[0], str) and os.path.exists(args[0]):
+                registry.count("bytes_parsed", label, os.path.getsize(args[0]))
+
+    return wrapper
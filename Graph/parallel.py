@@ -0,0 +1,186 @@
+"""
+Parallel batch routing for this graph
+@author David Guan
+"""
+
+import collections as col
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import tempfile
+import weakref
+
+from graph import trip_info
+from snapshot import Snapshot, _number
+
+_network = None
+_snapshots = {}
+
+
+class BatchRouter:
+    def __init__(self, network, processes=None, chunk_size=10000):
+        """
+        Constructor for the BatchRouter class
+        Answers a stream of (source, target) pairs on a pool of worker processes. The workers read the routes
+        of the same snapshot so the graph is never pickled, and pairs are grouped by source so each worker runs
+        one search per source city instead of one per pair
+        :param network: location of a snapshot, or a graph which is written to a temporary snapshot, see snapshot_of
+        :param processes: number of worker processes, by default one per core
+        :param chunk_size: number of pairs read from the stream and routed at a time
+        :return: nothing
+        """
+        location = network if isinstance(network, str) else snapshot_of(network)
+        self.chunk_size = chunk_size
+        self._pool = multiprocessing.Pool(processes, _load, (location,))
+
+    def routes(self, pairs):
+        """
+        Routes every pair, giving the results back in the same order as the pairs
+        :param pairs: iterable of (source, target) city codes, read a chunk at a time
+        :return: generator of (source, target, path, route_info of the path)
+        """
+        pairs = iter(pairs)
+        while True:
+            chunk = list(itertools.islice(pairs, self.chunk_size))
+            if not chunk:
+                return
+            groups = col.defaultdict(list)
+            for position, (source, target) in enumerate(chunk):
+                groups[source].append((position, target))
+            results = [None] * len(chunk)
+            for answers in self._pool.imap_unordered(_route, groups.items()):
+                for position, path, info in answers:
+                    results[position] = (chunk[position][0], chunk[position][1], path, info)
+            yield from results
+
+    def close(self):
+        """
+        Stops the workers
+        :return: nothing
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def snapshot_of(graph):
+    """
+    Temporary snapshot of a graph for the workers, written again only once its cities or routes have changed
+    The file is removed when the graph is garbage collected or the program exits
+    :param graph: the graph
+    :return: location of the snapshot
+    """
+    entry = _snapshots.get(id(graph))
+    if entry is None or entry[0]() is not graph:
+        handle, location = tempfile.mkstemp(suffix=".snap")
+        os.close(handle)
+        entry = [weakref.ref(graph), None, location]
+        _snapshots[id(graph)] = entry
+        weakref.finalize(graph, _forget, id(graph), location)
+    if entry[1] != graph.topology_version:
+        graph.save_snapshot(entry[2])
+        entry[1] = graph.topology_version
+    return entry[2]
+
+
+def _forget(key, location):
+    """
+    Removes the temporary snapshot of a graph that is gone
+    :param key: id the graph had
+    :param location: location of the snapshot
+    :return: nothing
+    """
+    _snapshots.pop(key, None)
+    if os.path.exists(location):
+        os.remove(location)
+
+
+def _load(location):
+    """
+    Reads the routes of the snapshot once in every worker process, none of the cities are built
+    The cities are numbered in the order of their codes, so ties between routes of the same distance are broken
+    the same way as in Graph.djikstra, which orders its heap by distance and then code
+    :param location: location of the snapshot
+    :return: nothing
+    """
+    global _network
+    with Snapshot(location) as snapshot:
+        codes = list(snapshot.codes)
+        offsets = snapshot.offsets.tolist()
+        targets = snapshot.targets.tolist()
+        distances = snapshot.distances.tolist()
+    order = sorted(range(len(codes)), key=codes.__getitem__)
+    rank = [0] * len(codes)
+    for i, old in enumerate(order):
+        rank[old] = i
+    routes = []
+    for old in order:
+        start, end = offsets[old], offsets[old + 1]
+        routes.append([(rank[target], _number(distance))
+                       for target, distance in zip(targets[start:end], distances[start:end])])
+    codes = [codes[old] for old in order]
+    _network = (codes, {code: i for i, code in enumerate(codes)}, routes)
+
+
+def _route(group):
+    """
+    Routes all the pairs of one source city with a single search, which stops once every target is settled
+    :param group: the source city and a list of (position, target)
+    :return: list of (position, path, route_info of the path)
+    """
+    source, targets = group
+    codes, index, routes = _network
+    wanted = {index[target] for position, target in targets if target in index}
+    prev = {}
+    if source in index:
+        start = index[source]
+        dist = {start: 0}
+        prev[start] = None
+        settled = set()
+        heap = [(0, start)]
+        while heap and wanted:
+            distance, i = heapq.heappop(heap)
+            if i in settled:
+                continue
+            settled.add(i)
+            wanted.discard(i)
+            for j, length in routes[i]:
+                alt = distance + length
+                if alt < dist.get(j, math.inf):
+                    dist[j] = alt
+                    prev[j] = i
+                    heapq.heappush(heap, (alt, j))
+    answers = []
+    for position, target in targets:
+        path = [target]
+        i = prev.get(index.get(target))
+        while i is not None:
+            path.append(codes[i])
+            i = prev[i]
+        path.reverse()
+        answers.append((position, path, _info(path)))
+    return answers
+
+
+def _info(path):
+    """
+    route_info of a path, read off the routes of the snapshot
+    :param path: list of city codes
+    :return: the distance, cost and time, or None if a leg isn't a route
+    """
+    codes, index, routes = _network
+    legs = []
+    for start, destination in zip(path, path[1:]):
+        i, j = index.get(start), index.get(destination)
+        length = None if i is None else next((length for k, length in routes[i] if k == j), None)
+        if length is None:
+            return None
+        legs.append((length, len(routes[j])))
+    return trip_info(legs)
@@ -0,0 +1,311 @@
+"""
+Persistent collections for this graph
+@author David Guan
+"""
+
+import bisect
+import itertools
+from collections.abc import MutableMapping
+
+CHUNK = 256
+
+
+class PersistentMap(MutableMapping):
+    def __init__(self, items=()):
+        """
+        Constructor for the PersistentMap class
+        A dictionary whose copies share everything with it, so forking the graph doesn't copy its indexes
+        The entries are kept in chunks of up to CHUNK in the order they were added, and the chunk of every key is
+        found through buckets by hash. A copy only copies the lists of chunks and buckets, and both maps copy a
+        chunk or a bucket the first time they change it afterwards, the same as the routes of a city in a fork,
+        so a change costs O(CHUNK) however big the map is. Iterating gives the keys in the order they were added
+        :param items: a dictionary or pairs of key and value to start with
+        :return: nothing
+        """
+        self.clear()
+        if isinstance(items, dict):
+            self._fill(items)
+        else:
+            for key, value in items:
+                self[key] = value
+
+    def clear(self):
+        """
+        Forgets every entry
+        :return: nothing
+        """
+        self._chunks = []
+        self._buckets = [{}]
+        self._length = 0
+        # ids of the chunks and buckets this map made itself and can change in place, None while nothing is shared
+        self._mine = None
+
+    def copy(self):
+        """
+        Copy of the map that shares its chunks and buckets, this is O(n / CHUNK)
+        :return: the new PersistentMap
+        """
+        other = PersistentMap.__new__(PersistentMap)
+        other._chunks = list(self._chunks)
+        other._buckets = list(self._buckets)
+        other._length = self._length
+        other._mine = set()
+        self._mine = set()
+        return other
+
+    def _fill(self, items):
+        """
+        Fills an empty map from a dictionary in one go
+        :param items: the dictionary
+        :return: nothing
+        """
+        entries = iter(items.items())
+        self._chunks = [chunk for chunk in iter(lambda: dict(itertools.islice(entries, CHUNK)), {})]
+        self._length = len(items)
+        self._rehash()
+
+    def _rehash(self):
+        """
+        Puts every key in new buckets, as many as it takes for a bucket to hold about CHUNK keys
+        :return: nothing
+        """
+        count = 1
+        while count * CHUNK < self._length:
+            count *= 2
+        buckets = [{} for i in range(count)]
+        mask = count - 1
+        for i, chunk in enumerate(self._chunks):
+            for key in chunk:
+                buckets[hash(key) & mask][key] = i
+        if self._mine is not None:
+            self._mine.update(id(bucket) for bucket in buckets)
+        self._buckets = buckets
+
+    def _compact(self):
+        """
+        Packs the entries into as few chunks as they need once removals have left too many chunks part empty
+        :return: nothing
+        """
+        packed = PersistentMap(dict(self.items()))
+        self._chunks, self._buckets, self._mine = packed._chunks, packed._buckets, None
+
+    def _own(self, pieces, i):
+        """
+        A chunk or bucket for changing in place, copied first if a copy of the map may still share it
+        :param pieces: the chunks or the buckets
+        :param i: number of the chunk or bucket
+        :return: the dictionary
+        """
+        piece = pieces[i]
+        if self._mine is not None and id(piece) not in self._mine:
+            piece = pieces[i] = piece.copy()
+            self._mine.add(id(piece))
+        return piece
+
+    def _bucket(self, key):
+        """
+        Number of the bucket of a key
+        :param key: the key
+        :return: the number
+        """
+        return hash(key) & (len(self._buckets) - 1)
+
+    def __getitem__(self, key):
+        i = self._buckets[hash(key) & (len(self._buckets) - 1)].get(key)
+        if i is None:
+            raise KeyError(key)
+        return self._chunks[i][key]
+
+    def get(self, key, default=None):
+        i = self._buckets[hash(key) & (len(self._buckets) - 1)].get(key)
+        return default if i is None else self._chunks[i][key]
+
+    def __contains__(self, key):
+        return key in self._buckets[hash(key) & (len(self._buckets) - 1)]
+
+    def __setitem__(self, key, value):
+        bucket = self._bucket(key)
+        i = self._buckets[bucket].get(key)
+        if i is None:
+            i = len(self._chunks) - 1
+            if i < 0 or len(self._chunks[i]) >= CHUNK:
+                chunk = {}
+                self._chunks.append(chunk)
+                if self._mine is not None:
+                    self._mine.add(id(chunk))
+                i += 1
+            self._own(self._buckets, bucket)[key] = i
+            self._length += 1
+        self._own(self._chunks, i)[key] = value
+        if self._length > 2 * CHUNK * len(self._buckets):
+            self._rehash()
+
+    def __delitem__(self, key):
+        bucket = self._bucket(key)
+        i = self._buckets[bucket].get(key)
+        if i is None:
+            raise KeyError(key)
+        del self._own(self._buckets, bucket)[key]
+        del self._own(self._chunks, i)[key]
+        self._length -= 1
+        if len(self._chunks) > 2 * (self._length // CHUNK) + 2:
+            self._compact()
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return "PersistentMap({})".format(dict(self.items()))
+
+    def values(self):
+        for chunk in self._chunks:
+            yield from chunk.values()
+
+    def items(self):
+        for chunk in self._chunks:
+            yield from chunk.items()
+
+
+def own_map(maps, key, mine):
+    """
+    The map stored under a key of another map for changing in place, i.e. the cities of one grid cell
+    It is made if there is none and copied first unless it was made since the last copy of the outer map, which
+    the index tracks with the ids of the maps it made
+    :param maps: the outer PersistentMap
+    :param key: the key
+    :param mine: set of the ids of the maps made since the outer map was last copied
+    :return: the inner PersistentMap
+    """
+    inner = maps.get(key)
+    if inner is None or id(inner) not in mine:
+        inner = maps[key] = PersistentMap() if inner is None else inner.copy()
+        mine.add(id(inner))
+    return inner
+
+
+class PersistentSortedList:
+    def __init__(self, values=()):
+        """
+        Constructor for the PersistentSortedList class
+        A sorted list kept in pieces of about CHUNK values with the last value of every piece alongside, so a
+        value is found with two binary searches and adding or removing one only moves the values of its piece
+        Copies share the pieces the same way as PersistentMap
+        :param values: values to start with, in any order
+        :return: nothing
+        """
+        ordered = sorted(values)
+        self._pieces = [ordered[i:i + CHUNK] for i in range(0, len(ordered), CHUNK)]
+        self._lasts = [piece[-1] for piece in self._pieces]
+        self._length = len(ordered)
+        self._mine = None
+
+    def copy(self):
+        """
+        Copy of the list that shares its pieces, this is O(n / CHUNK)
+        :return: the new PersistentSortedList
+        """
+        other = PersistentSortedList()
+        other._pieces = list(self._pieces)
+        other._lasts = list(self._lasts)
+        other._length = self._length
+        other._mine = set()
+        self._mine = set()
+        return other
+
+    def _own(self, i):
+        """
+        A piece for changing in place, copied first if a copy of the list may still share it
+        :param i: number of the piece
+        :return: the piece
+        """
+        piece = self._pieces[i]
+        if self._mine is not None and id(piece) not in self._mine:
+            piece = self._pieces[i] = list(piece)
+            self._mine.add(id(piece))
+        return piece
+
+    def add(self, value):
+        """
+        Adds a value where it belongs
+        :param value: the value
+        :return: nothing
+        """
+        self._length += 1
+        if not self._pieces:
+            self._pieces.append([value])
+            self._lasts.append(value)
+            if self._mine is not None:
+                self._mine.add(id(self._pieces[0]))
+            return
+        i = min(bisect.bisect_left(self._lasts, value), len(self._lasts) - 1)
+        piece = self._own(i)
+        bisect.insort(piece, value)
+        self._lasts[i] = piece[-1]
+        if len(piece) > 2 * CHUNK:
+            halves = [piece[:CHUNK], piece[CHUNK:]]
+            self._pieces[i:i + 1] = halves
+            self._lasts[i:i + 1] = [half[-1] for half in halves]
+            if self._mine is not None:
+                self._mine.update(id(half) for half in halves)
+
+    def remove(self, value):
+        """
+        Removes a value
+        :param value: the value, which must be in the list
+        :return: nothing
+        """
+        i = bisect.bisect_left(self._lasts, value)
+        j = bisect.bisect_left(self._pieces[i], value) if i < len(self._pieces) else 0
+        if i == len(self._pieces) or self._pieces[i][j] != value:
+            raise ValueError("{} is not in the list".format(value))
+        piece = self._own(i)
+        del piece[j]
+        self._length -= 1
+        if piece:
+            self._lasts[i] = piece[-1]
+        else:
+            del self._pieces[i]
+            del self._lasts[i]
+
+    def first(self):
+        """
+        The smallest value
+        :return: the value, or None if the list is empty
+        """
+        return self._pieces[0][0] if self._pieces else None
+
+    def last(self):
+        """
+        The biggest value
+        :return: the value, or None if the list is empty
+        """
+        return self._pieces[-1][-1] if self._pieces else None
+
+    def ceiling(self, value):
+        """
+        The smallest value that isn't smaller than the one given, i.e. the first of the values tied at the top
+        :param value: the value to look from
+        :return: the value found, or None if there is none
+        """
+        i = bisect.bisect_left(self._lasts, value)
+        if i == len(self._pieces):
+            return None
+        piece = self._pieces[i]
+        return piece[bisect.bisect_left(piece, value)]
+
+    def __contains__(self, value):
+        i = bisect.bisect_left(self._lasts, value)
+        if i == len(self._pieces):
+            return False
+        piece = self._pieces[i]
+        return piece[bisect.bisect_left(piece, value)] == value
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._pieces)
+
+    def __len__(self):
+        return self._length
@@ -0,0 +1,131 @@
+"""
+Reachability searches for this graph
+@author David Guan
+"""
+
+import heapq
+import math
+
+
+class ReachIndex:
+    def __init__(self, graph):
+        """
+        Constructor for the ReachIndex class
+        Numbers the cities and lays the routes out in CSR form, the routes of city i being
+        targets[offsets[i]:offsets[i + 1]] with their distances at the same positions, so the searches walk plain
+        lists of integers instead of the dictionaries of the graph
+        The graph keeps one for as long as its cities and routes don't change, see Graph.reach_index
+        :param graph: the graph
+        :return: nothing
+        """
+        self.codes = list(graph.vertices.keys())
+        for code in graph.edges.keys():
+            if code not in graph.vertices:
+                self.codes.append(code)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.topology_version = graph.topology_version
+        self.offsets = [0]
+        self.targets = []
+        self.distances = []
+        for code in self.codes:
+            for edge in graph.edges.get(code, ()):
+                self.targets.append(self.index[edge.destination])
+                self.distances.append(edge.distance)
+            self.offsets.append(len(self.targets))
+
+    def within(self, sources, hops=None, distance=None):
+        """
+        Cities reachable from any of the sources in at most a number of legs and a distance
+        Without a hop limit this is Djikstra seeded with every source and stopped at the distance. With one it
+        relaxes a frontier a level at a time, the frontier being the cities whose distance got shorter on the last
+        level, which gives the shortest distance over routes of at most that many legs
+        :param sources: list of city codes
+        :param hops: most legs, None for no limit
+        :param distance: furthest distance in km, None for no limit
+        :return: dictionary of every city reached to its shortest distance and the legs of that route
+        """
+        limit = math.inf if distance is None else distance
+        best = {}
+        legs = {}
+        for i in self._ids(sources):
+            best[i] = 0
+            legs[i] = 0
+        if hops is None:
+            heap = [(0, 0, i) for i in best]
+            settled = set()
+            while heap:
+                total, count, i = heapq.heappop(heap)
+                if i in settled:
+                    continue
+                settled.add(i)
+                for position in range(self.offsets[i], self.offsets[i + 1]):
+                    j = self.targets[position]
+                    alt = total + self.distances[position]
+                    if alt <= limit and alt < best.get(j, math.inf):
+                        best[j] = alt
+                        legs[j] = count + 1
+                        heapq.heappush(heap, (alt, count + 1, j))
+        else:
+            frontier = dict(best)
+            for level in range(1, hops + 1):
+                if not frontier:
+                    break
+                following = {}
+                for i, total in frontier.items():
+                    for position in range(self.offsets[i], self.offsets[i + 1]):
+                        j = self.targets[position]
+                        alt = total + self.distances[position]
+                        if alt <= limit and alt < best.get(j, math.inf):
+                            best[j] = alt
+                            legs[j] = level
+                            following[j] = alt
+                frontier = following
+        return {self.codes[i]: (total, legs[i]) for i, total in best.items()}
+
+    def reach_sets(self, sources, hops=None):
+        """
+        Cities reachable from each source in at most a number of legs, for all the sources in one pass
+        Every source gets a bit and every city a mask of the sources that reached it. A level moves only the bits
+        that arrived on the last level over the routes, so every city and route is handled once per level for all
+        the sources together instead of once per source
+        :param sources: list of city codes
+        :param hops: most legs, None for no limit
+        :return: dictionary of every source to the set of cities it reaches, itself included
+        """
+        ids = self._ids(sources)
+        masks = {}
+        for bit, i in enumerate(ids):
+            masks[i] = masks.get(i, 0) | (1 << bit)
+        frontier = dict(masks)
+        level = 0
+        while frontier and (hops is None or level < hops):
+            level += 1
+            following = {}
+            for i, bits in frontier.items():
+                for j in self.targets[self.offsets[i]:self.offsets[i + 1]]:
+                    new = bits & ~masks.get(j, 0)
+                    if new:
+                        masks[j] = masks.get(j, 0) | new
+                        following[j] = following.get(j, 0) | new
+            frontier = following
+        reached = [set() for i in ids]
+        for i, bits in masks.items():
+            code = self.codes[i]
+            while bits:
+                low = bits & -bits
+                reached[low.bit_length() - 1].add(code)
+                bits ^= low
+        return {self.codes[i]: cities for i, cities in zip(ids, reached)}
+
+    def _ids(self, sources):
+        """
+        Numbers of the source cities
+        :param sources: list of city codes
+        :return: list of the numbers
+        """
+        ids = []
+        for code in sources:
+            if code not in self.index:
+                raise ValueError("No city {}".format(code))
+            ids.append(self.index[code])
+        return ids
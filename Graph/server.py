@@ -0,0 +1,418 @@
+"""
+Network server for this graph
+@author David Guan
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+
+from graph import Graph
+from vertex import Vertex
+
+READ = "read"
+WRITE = "write"
+SAVE = '../Data/save.json'
+SNAPSHOT = '../Data/network.snap'
+
+
+class ReadWriteLock:
+    def __init__(self):
+        """
+        Constructor for the ReadWriteLock class
+        Any number of readers can hold the lock together, a writer holds it alone
+        Waiting writers go first so a steady stream of reads can't hold off a mutation forever
+        :return: nothing
+        """
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting = 0
+
+    @contextlib.asynccontextmanager
+    async def reading(self):
+        """
+        Holds the lock shared for the body of the with block
+        :return: nothing
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def writing(self):
+        """
+        Holds the lock alone for the body of the with block
+        :return: nothing
+        """
+        async with self._condition:
+            self._waiting += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class GraphServer:
+    def __init__(self, graph, save_location=SAVE, snapshot_location=SNAPSHOT):
+        """
+        Constructor for the GraphServer class
+        Serves the console commands over TCP as one json object per line, i.e.
+        {"id": 1, "op": "shortest_route", "args": {"source": "CMI", "target": "SYD"}}
+        is answered with {"id": 1, "result": {...}} or {"id": 1, "error": "..."}
+        Reads run together on worker threads, mutations run one at a time with no read in between
+        Requests on one connection are answered as they finish, so answers can come back out of order
+        Clients can't name files, saving and loading only ever use the two locations given here
+        :param graph: the loaded graph to serve
+        :param save_location: the json file save_json writes and load_json reads
+        :param snapshot_location: the snapshot save_snapshot writes and load_snapshot reads
+        :return: nothing
+        """
+        self.graph = graph
+        self.save_location = save_location
+        self.snapshot_location = snapshot_location
+        self.lock = None
+        self.operations = {
+            "all_cities": (READ, self.all_cities),
+            "city": (READ, self.city),
+            "all_single_flights": (READ, self.all_single_flights),
+            "longest_flight": (READ, lambda: list(self.graph.longest_flight())),
+            "shortest_flight": (READ, lambda: list(self.graph.shortest_flight())),
+            "average_flight": (READ, self.graph.average_distance),
+            "biggest_city": (READ, lambda: list(self.graph.biggest_city())),
+            "smallest_city": (READ, lambda: list(self.graph.smallest_city())),
+            "average_city_size": (READ, self.graph.average_city_size),
+            "continents_and_cities": (READ, lambda: dict(self.graph.continents_and_cities())),
+            "cities_by": (READ, self.cities_by),
+            "hubs": (READ, self.hubs),
+            "nearby": (READ, self.nearby),
+            "reachable": (READ, self.reachable),
+            "connectivity": (READ, self.connectivity),
+            "would_split": (READ, self.graph.would_split),
+            "route_would_split": (READ, self.graph.route_would_split),
+            "check_distances": (READ, self.check_distances),
+            "visualize": (READ, self.graph.visualize_url),
+            "route_info": (READ, self.route_info),
+            "shortest_route": (READ, self.route(self.graph.djikstra)),
+            "astar_route": (READ, self.route(self.graph.astar)),
+            "cheapest_route": (READ, self.route(self.graph.cheapest_route)),
+            "fastest_route": (READ, self.route(self.graph.fastest_route)),
+            "alternatives": (READ, self.alternatives),
+            "save_json": (READ, self.save_json),
+            "save_snapshot": (READ, self.save_snapshot),
+            "add_city": (WRITE, self.add_city),
+            "del_city": (WRITE, self.graph.remove_city),
+            "edit_city": (WRITE, self.edit_city),
+            "add_route": (WRITE, self.add_route),
+            "del_route": (WRITE, self.graph.remove_route),
+            "load_json": (WRITE, self.load_json),
+            "load_snapshot": (WRITE, self.load_snapshot),
+        }
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """
+        Starts listening, the lock is made here so it belongs to the running event loop
+        :param host: address to listen on
+        :param port: port to listen on, 0 picks a free one
+        :return: the asyncio server
+        """
+        self.lock = ReadWriteLock()
+        return await asyncio.start_server(self._connection, host, port)
+
+    async def handle(self, request):
+        """
+        Runs one request under the lock on a worker thread
+        :param request: dictionary with the op, its args and optionally an id
+        :return: dictionary with the id and the result or the error
+        """
+        if self.lock is None:
+            self.lock = ReadWriteLock()
+        response = {"id": request.get("id")}
+        if request.get("op") not in self.operations:
+            response["error"] = "Unknown op {}".format(request.get("op"))
+            return response
+        mode, function = self.operations[request["op"]]
+        args = request.get("args") or {}
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.lock.reading() if mode == READ else self.lock.writing():
+                response["result"] = await loop.run_in_executor(None, lambda: function(**args))
+        except Exception as error:
+            response["error"] = "{}: {}".format(type(error).__name__, error)
+        return response
+
+    async def _connection(self, reader, writer):
+        """
+        Answers the requests of one client until it disconnects
+        :param reader: stream of the requests
+        :param writer: stream of the answers
+        :return: nothing
+        """
+        pending = set()
+
+        async def answer(line):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Requests must be json objects")
+            except ValueError as error:
+                response = {"id": None, "error": "Bad request: {}".format(error)}
+            else:
+                response = await self.handle(request)
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(answer(line))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+    def all_cities(self):
+        """
+        Codes and names of every city
+        :return: list of the codes and names
+        """
+        return [[code, city.name] for code, city in self.graph.vertices.items()]
+
+    def city(self, code):
+        """
+        Everything about a city
+        :param code: the city code
+        :return: dictionary of the city fields
+        """
+        if code not in self.graph.vertices:
+            raise KeyError(code)
+        return self.graph.vertices[code].to_dict()
+
+    def all_single_flights(self, code):
+        """
+        Nonstop flights out of a city
+        :param code: the city code
+        :return: list of the destinations and distances
+        """
+        if code not in self.graph.edges:
+            raise KeyError(code)
+        return [[edge.destination, edge.distance] for edge in self.graph.edges[code]]
+
+    def cities_by(self, **filters):
+        """
+        Cities matching the filters, see Graph.cities_by
+        :param filters: the indexed fields and their values
+        :return: list of the city codes
+        """
+        return self.graph.cities_by(**filters)
+
+    def hubs(self, k=5, metric="degree", samples=None, seed=None, seconds=None):
+        """
+        The top hubs, see Graph.hubs
+        :param k: number of hubs
+        :param metric: degree, weighted, population or betweenness
+        :param samples: number of source cities to sample for betweenness
+        :param seed: seed for the betweenness sample
+        :param seconds: time after which betweenness stops searching from more sources
+        :return: list of the codes and their scores
+        """
+        return [list(hub) for hub in self.graph.hubs(k, metric, samples, seed, seconds)]
+
+    def nearby(self, code, k=5, radius=None):
+        """
+        The closest cities, or the ones within a radius when one is given
+        :param code: the city code
+        :param k: number of cities
+        :param radius: distance in km
+        :return: list of the codes and distances
+        """
+        if radius is not None:
+            return [list(entry) for entry in self.graph.cities_within(code, radius)]
+        return [list(entry) for entry in self.graph.nearest_cities(code, k)]
+
+    def reachable(self, sources, hops=None, distance=None):
+        """
+        Cities reachable from one or more cities within a number of legs and a distance
+        :param sources: a city code or a list of them
+        :param hops: most legs, None for no limit
+        :param distance: furthest distance in km, None for no limit
+        :return: dictionary of every city reached to its shortest distance and number of legs
+        """
+        return {code: list(entry) for code, entry in self.graph.reachable(sources, hops, distance).items()}
+
+    def connectivity(self):
+        """
+        The separate parts of the network and the cities and routes whose removal would split it
+        :return: dictionary of the components, articulation points and bridges
+        """
+        return {"components": [sorted(part) for part in self.graph.components()],
+                "articulation_points": sorted(self.graph.connectivity.articulation_points()),
+                "bridges": [list(bridge) for bridge in self.graph.connectivity.bridges()]}
+
+    def check_distances(self, tolerance=0.1, slack=150):
+        """
+        Routes whose distance doesn't match the coordinates, see Graph.validate_distances
+        :param tolerance: allowed relative difference
+        :param slack: allowed difference in km
+        :return: list of the routes with their distance and great circle distance
+        """
+        return [list(route) for route in self.graph.validate_distances(tolerance, slack)]
+
+    def route_info(self, route):
+        """
+        Distance, cost and time of a route
+        :param route: list of city codes
+        :return: the distance, cost and time
+        """
+        info = self.graph.route_info(route)
+        if info is None:
+            raise ValueError("Invalid route")
+        return list(info)
+
+    def route(self, search):
+        """
+        Wraps a route search so it answers with the path and its route_info
+        :param search: graph method taking the source and target
+        :return: function of the source and target
+        """
+        def find(source, target):
+            path = search(source, target)
+            return {"path": path, "info": list(self.graph.route_info(path))}
+        return find
+
+    def alternatives(self, source, target, k=3):
+        """
+        The k shortest routes that don't visit a city twice, each with its route_info like the route searches
+        :param source: the source city
+        :param target: the target city
+        :param k: number of routes
+        :return: list of the paths and their info, shortest first
+        """
+        return [{"path": path, "info": [distance, cost, time]}
+                for path, distance, cost, time in self.graph.alternatives(source, target, k)]
+
+    def save_json(self, compact=False):
+        """
+        Saves the network as json to the server's save location
+        :param compact: leave out the indentation
+        :return: nothing
+        """
+        self.graph.save_to_json(self.save_location, compact)
+
+    def save_snapshot(self):
+        """
+        Saves the network as a snapshot to the server's snapshot location
+        :return: nothing
+        """
+        self.graph.save_snapshot(self.snapshot_location)
+
+    def add_city(self, **city):
+        """
+        Adds a city, checking the fields first so a bad city doesn't reach the graph
+        :param city: the city fields like in the json
+        :return: nothing
+        """
+        self._change("add_city", city)
+
+    def edit_city(self, code, key, value):
+        """
+        Edits a field of a city that exists
+        :param code: the city code
+        :param key: the field
+        :param value: the new value
+        :return: nothing
+        """
+        if code not in self.graph.vertices or key not in Vertex.FIELDS:
+            raise KeyError("{} {}".format(code, key))
+        self._change("edit_city", code, key, value)
+
+    def add_route(self, start, destination, distance=None):
+        """
+        Adds a route both ways
+        :param start: starting city code
+        :param destination: destination city code
+        :param distance: distance of the route, None for the great circle distance
+        :return: nothing
+        """
+        self._change("add_route", distance, start, destination)
+
+    def _change(self, name, *args):
+        """
+        Makes a change as a batch of one, so the values sent are checked against the network before any of them
+        reaches the graph and a wrong type is answered with an error instead of breaking the searches of everyone
+        :param name: name of the Batch method
+        :param args: its arguments
+        :return: nothing
+        """
+        batch = self.graph.batch()
+        getattr(batch, name)(*args)
+        batch.commit()
+
+    def load_json(self):
+        """
+        Replaces the network with the json at the server's save location, like the console
+        :return: nothing
+        """
+        if not os.path.exists(self.save_location):
+            raise FileNotFoundError("Save not found")
+        self.graph.clear()
+        self.graph.add_from_json(self.save_location)
+
+    def load_snapshot(self):
+        """
+        Replaces the network with the snapshot at the server's snapshot location, like the console
+        :return: nothing
+        """
+        if not os.path.exists(self.snapshot_location):
+            raise FileNotFoundError("Snapshot not found")
+        self.graph.clear()
+        self.graph.add_from_snapshot(self.snapshot_location)
+
+
+def main():
+    """
+    Loads the network the same way as the console and serves it until interrupted
+    :return: nothing
+    """
+    from console import load_network
+    parser = argparse.ArgumentParser(description="Serves the airline network over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    options = parser.parse_args()
+    graph = Graph()
+    load_network(graph)
+
+    async def serve():
+        server = await GraphServer(graph).start(options.host, options.port)
+        print("Serving on {}:{}".format(options.host, options.port))
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Binary snapshot of this graph
+@author David Guan
+"""
+
+from array import array
+from vertex import Vertex, LazyVertex
+from edge import Edge
+from adjacency import Adjacency
+import functools
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"CSAIRSN1"
+HEADER = struct.Struct("<8sI")
+ENTRY = struct.Struct("<32sQQ")
+STRING_COLUMNS = ("name", "country", "continent")
+
+
+class Snapshot:
+    def __init__(self, location):
+        """
+        Constructor for the Snapshot class
+        Memory maps a snapshot written by Snapshot.write. The file is a directory of sections:
+        the interned code table, one column per city attribute and the routes in CSR form
+        (offsets into the targets and distances of every city)
+        :param location: location of the snapshot
+        :return: nothing
+        """
+        self.location = location
+        with open(location, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("{} is not a graph snapshot".format(location))
+        self.sections = {}
+        for i in range(count):
+            name, offset, length = ENTRY.unpack_from(self._map, HEADER.size + i * ENTRY.size)
+            self.sections[name.rstrip(b"\0").decode()] = self._view[offset:offset + length]
+        self.codes = self.strings("code")
+        self.offsets = self.sections["offsets"].cast("q")
+        self.targets = self.sections["targets"].cast("i")
+        self.distances = self.sections["distances"].cast("d")
+        self.has_city = self.sections["city"]
+
+    def close(self):
+        """
+        Releases the memory map, nothing read from the snapshot can be used afterwards
+        :return: nothing
+        """
+        self.codes = None
+        self.offsets = self.targets = self.distances = self.has_city = None
+        self.sections = {}
+        if hasattr(self, "_view"):
+            self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def strings(self, column):
+        """
+        Decodes a whole string column at once
+        :param column: name of the column, i.e. code or name
+        :return: list of the strings, one per city
+        """
+        data = bytes(self.sections[column + ".data"])
+        if not data:
+            return []
+        return data[:-1].decode("utf-8").split("\0")
+
+    def string(self, column, row):
+        """
+        Decodes a single string of a column without touching the rest of it
+        :param column: name of the column, i.e. name
+        :param row: index of the city
+        :return: the string
+        """
+        starts = self.sections[column + ".offsets"].cast("q")
+        return bytes(self.sections[column + ".data"][starts[row]:starts[row + 1] - 1]).decode("utf-8")
+
+    def city(self, row):
+        """
+        Reads all the information of one city
+        :param row: index of the city in the code table
+        :return: dictionary set up like the metros in the json
+        """
+        hemispheres = self.sections["hemispheres"]
+        coordinates = self.sections["coordinates"].cast("d")
+        return {"code": self.codes[row],
+                "name": self.string("name", row),
+                "country": self.string("country", row),
+                "continent": self.string("continent", row),
+                "timezone": _number(self.sections["timezone"].cast("d")[row]),
+                "coordinates": _coordinates(hemispheres, coordinates, row),
+                "population": _number(self.sections["population"].cast("d")[row]),
+                "region": _number(self.sections["region"].cast("d")[row])}
+
+    def cities(self):
+        """
+        Reads every city of the snapshot, decoding each string column all at once
+        :return: generator of the cities
+        """
+        codes = [sys.intern(code) for code in self.codes]
+        columns = {column: self.strings(column) for column in STRING_COLUMNS}
+        timezone = self.sections["timezone"].cast("d")
+        population = self.sections["population"].cast("d")
+        region = self.sections["region"].cast("d")
+        hemispheres = self.sections["hemispheres"]
+        coordinates = self.sections["coordinates"].cast("d")
+        for row, code in enumerate(codes):
+            if self.has_city[row]:
+                yield Vertex({
+                    "code": code,
+                    "name": columns["name"][row],
+                    "country": columns["country"][row],
+                    "continent": columns["continent"][row],
+                    "timezone": _number(timezone[row]),
+                    "coordinates": _coordinates(hemispheres, coordinates, row),
+                    "population": _number(population[row]),
+                    "region": _number(region[row])})
+
+    def lazy_cities(self):
+        """
+        Every city of the snapshot with only its code, the rest is read from its row when first asked for
+        The snapshot has to stay open for as long as the cities are used
+        :return: generator of the cities
+        """
+        for row, code in enumerate(self.codes):
+            if self.has_city[row]:
+                yield LazyVertex(code, functools.partial(self.city, row))
+
+    def adjacencies(self):
+        """
+        Reads the routes of the snapshot a city at a time, straight from its slice of the CSR arrays
+        :return: generator of the codes with routes and their Adjacency
+        """
+        codes = [sys.intern(code) for code in self.codes]
+        offsets = self.offsets.tolist()
+        targets = [codes[target] for target in self.targets.tolist()]
+        distances = [int(distance) if distance.is_integer() else distance for distance in self.distances.tolist()]
+        for row, code in enumerate(codes):
+            start, end = offsets[row], offsets[row + 1]
+            if start < end:
+                yield code, Adjacency(Edge(distances[i], code, targets[i]) for i in range(start, end))
+
+    @staticmethod
+    def write(graph, location):
+        """
+        Writes the graph as a snapshot in a single linear pass over the cities and routes
+        :param graph: the graph to write
+        :param location: location of the snapshot
+        :return: nothing
+        """
+        codes = list(graph.vertices.keys())
+        index = {code: i for i, code in enumerate(codes)}
+        for code, _list in graph.edges.items():
+            for name in [code] + [edge.destination for edge in _list]:
+                if name not in index:
+                    index[name] = len(codes)
+                    codes.append(name)
+        offsets = array("q", [0])
+        targets = array("i")
+        distances = array("d")
+        for code in codes:
+            for edge in graph.edges.get(code, ()):
+                targets.append(index[edge.destination])
+                distances.append(float(edge.distance))
+            offsets.append(len(targets))
+        cities = [graph.vertices.get(code) for code in codes]
+        has_city = bytes(city is not None for city in cities)
+        timezone = array("d")
+        population = array("d")
+        region = array("d")
+        hemispheres = bytearray()
+        coordinates = array("d")
+        for city in cities:
+            if city is None:
+                timezone.append(0)
+                population.append(0)
+                region.append(0)
+                hemispheres += b"NE"
+                coordinates.extend((0, 0))
+                continue
+            timezone.append(float(city.timezone))
+            population.append(float(city.population))
+            region.append(float(city.region))
+            pairs = list(city.coordinates.items()) if isinstance(city.coordinates, dict) else []
+            if len(pairs) > 2:
+                raise ValueError("{} has more than two coordinates".format(city.code))
+            # a missing coordinate is kept as a null hemisphere so the columns of every city stay aligned
+            pairs += [("\0", 0)] * (2 - len(pairs))
+            for hemisphere, degrees in pairs:
+                hemispheres += hemisphere.encode("ascii")
+                coordinates.append(float(degrees))
+        sections = [("city", has_city)]
+        sections += _string_column("code", codes)
+        for column in STRING_COLUMNS:
+            sections += _string_column(column, [getattr(city, column) if city is not None else ""
+                                                for city in cities])
+        sections += [("timezone", timezone.tobytes()),
+                     ("population", population.tobytes()),
+                     ("region", region.tobytes()),
+                     ("hemispheres", bytes(hemispheres)),
+                     ("coordinates", coordinates.tobytes()),
+                     ("offsets", offsets.tobytes()),
+                     ("targets", targets.tobytes()),
+                     ("distances", distances.tobytes())]
+        # written next to the snapshot and moved over it, so a snapshot still memory mapped is never truncated
+        temporary = location + ".tmp"
+        with open(temporary, 'wb') as file:
+            position = _align(HEADER.size + ENTRY.size * len(sections))
+            directory = [HEADER.pack(MAGIC, len(sections))]
+            for name, data in sections:
+                directory.append(ENTRY.pack(name.encode(), position, len(data)))
+                position = _align(position + len(data))
+            file.write(b"".join(directory))
+            for name, data in sections:
+                file.write(b"\0" * (_align(file.tell()) - file.tell()))
+                file.write(data)
+        os.replace(temporary, location)
+
+
+def _string_column(name, strings):
+    """
+    Encodes a column of strings as byte offsets and the strings joined by null characters
+    so they can be decoded all at once or one at a time
+    :param name: name of the column
+    :param strings: the strings to encode
+    :return: the offsets section and the data section
+    """
+    offsets = array("q", [0])
+    data = bytearray()
+    for string in strings:
+        data += str(string).encode("utf-8") + b"\0"
+        offsets.append(len(data))
+    return [(name + ".offsets", offsets.tobytes()), (name + ".data", bytes(data))]
+
+
+def _coordinates(hemispheres, coordinates, row):
+    """
+    Reads the coordinates of a city, leaving out the ones it didn't have
+    :param hemispheres: the hemispheres column, two per city
+    :param coordinates: the coordinates column, two per city
+    :param row: index of the city
+    :return: dictionary of hemisphere to degrees like in the json
+    """
+    return {chr(hemispheres[i]): _number(coordinates[i]) for i in (2 * row, 2 * row + 1) if hemispheres[i]}
+
+
+def _align(position):
+    """
+    Rounds the position up to a multiple of 8 so every column can be cast in place
+    :param position: position in the file
+    :return: the aligned position
+    """
+    return (position + 7) & ~7
+
+
+def _number(value):
+    """
+    Gives back whole numbers as integers since everything numeric is stored as a double
+    :param value: the stored double
+    :return: an int if the value is whole, otherwise the float
+    """
+    if value.is_integer():
+        return int(value)
+    return value
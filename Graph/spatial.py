@@ -0,0 +1,213 @@
+"""
+Spatial index of the cities of this graph
+@author David Guan
+"""
+
+import collections as col
+import math
+import threading
+from geo import EARTH_RADIUS, latitude_longitude, haversine
+from persistent import PersistentMap, own_map
+from vertex import is_loaded, load_all
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+HALF_CIRCUMFERENCE = math.pi * EARTH_RADIUS
+
+
+class SpatialIndex:
+    def __init__(self, cell=5.0):
+        """
+        Constructor for the SpatialIndex class
+        Buckets the cities into a grid of latitude and longitude cells so radius and nearest city queries only
+        look at the cells that can hold an answer instead of every city. The cells a radius touches are worked
+        out on the sphere, so queries near the poles and across the date line are still exact
+        The graph keeps it up to date through the same calls as the aggregates. Cities that haven't been loaded
+        yet wait aside until the first query. The grid is kept in persistent maps so forks share it
+        :param cell: size of a grid cell in degrees
+        :return: nothing
+        """
+        self.cell = cell
+        self.columns = int(math.ceil(360 / cell))
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets every city
+        :return: nothing
+        """
+        self.cells = PersistentMap()
+        self.points = PersistentMap()
+        self._pending = PersistentMap()
+        # ids of the cells made since the grid was last shared with a fork
+        self._mine = set()
+
+    def copy(self, graph):
+        """
+        Copy of the index for a fork of the graph, sharing the grid with this one
+        :param graph: the fork
+        :return: the new SpatialIndex
+        """
+        index = SpatialIndex(self.cell)
+        index.points = self.points.copy()
+        index._pending = self._pending.copy()
+        index.cells = self.cells.copy()
+        self._mine = set()
+        return index
+
+    def rebuild(self, graph):
+        """
+        Puts every city of the graph in the grid again, for after a load that skipped the calls per city
+        The grid is filled as dictionaries and made persistent at the end
+        :param graph: the graph
+        :return: nothing
+        """
+        self.clear()
+        cells = col.defaultdict(dict)
+        points = {}
+        pending = {}
+        for vertex in graph.vertices.values():
+            if not is_loaded(vertex):
+                pending[vertex.code] = vertex
+                continue
+            point = self._point(vertex)
+            if point is not None:
+                points[vertex.code] = point
+                cells[self._cell(point)][vertex.code] = None
+        self.points = PersistentMap(points)
+        self._pending = PersistentMap(pending)
+        self.cells = PersistentMap({key: PersistentMap(codes) for key, codes in cells.items()})
+        self._mine = {id(codes) for codes in self.cells.values()}
+
+    def add_vertex(self, vertex):
+        """
+        Puts a city in the grid, cities without valid coordinates are left out
+        :param vertex: the city
+        :return: nothing
+        """
+        if not is_loaded(vertex):
+            self._pending[vertex.code] = vertex
+            return
+        point = self._point(vertex)
+        if point is None:
+            return
+        self.points[vertex.code] = point
+        own_map(self.cells, self._cell(point), self._mine)[vertex.code] = None
+
+    def remove_vertex(self, vertex):
+        """
+        Takes a city out of the grid
+        :param vertex: the city, before any edit
+        :return: nothing
+        """
+        if self._pending.pop(vertex.code, None) is not None:
+            return
+        point = self.points.pop(vertex.code, None)
+        if point is None:
+            return
+        key = self._cell(point)
+        codes = own_map(self.cells, key, self._mine)
+        codes.pop(vertex.code, None)
+        if not codes:
+            del self.cells[key]
+
+    def add_edge(self, edge):
+        pass
+
+    def remove_edge(self, edge):
+        pass
+
+    def within(self, point, radius):
+        """
+        Cities within a distance of a point
+        :param point: latitude and longitude in degrees
+        :param radius: distance in km
+        :return: list of the city codes and their distances, closest first
+        """
+        self._flush()
+        found = []
+        for key in self._cells_within(point, radius):
+            for code in self.cells.get(key, ()):
+                distance = haversine(point, self.points[code])
+                if distance <= radius:
+                    found.append((distance, code))
+        found.sort()
+        return [(code, distance) for distance, code in found]
+
+    def nearest(self, point, k=1, exclude=None):
+        """
+        The k cities closest to a point
+        Searches a radius that doubles until it holds k cities, everything closer than the radius has been seen
+        by then so the answer is exact
+        :param point: latitude and longitude in degrees
+        :param k: number of cities
+        :param exclude: a city code to leave out, i.e. the city the point belongs to
+        :return: list of the city codes and their distances, closest first
+        """
+        self._flush()
+        wanted = min(k, len(self.points) - (exclude in self.points))
+        if wanted <= 0:
+            return []
+        radius = self.cell * KM_PER_DEGREE
+        while True:
+            found = [entry for entry in self.within(point, radius) if entry[0] != exclude]
+            if len(found) >= wanted or radius >= HALF_CIRCUMFERENCE:
+                return found[:wanted]
+            radius *= 2
+
+    def _flush(self):
+        """
+        Puts the cities that were waiting to be loaded in the grid
+        :return: nothing
+        """
+        if not self._pending:
+            return
+        with self._lock:
+            load_all(self._pending.values())
+            for vertex in self._pending.values():
+                self.add_vertex(vertex)
+            self._pending = PersistentMap()
+
+    @staticmethod
+    def _point(vertex):
+        """
+        Latitude and longitude of a city
+        :param vertex: the city
+        :return: the point, or None if the city has no valid coordinates
+        """
+        return latitude_longitude(vertex.coordinates) if isinstance(vertex.coordinates, dict) else None
+
+    def _cell(self, point):
+        """
+        Grid cell of a point
+        :param point: latitude and longitude in degrees
+        :return: row and column of the cell
+        """
+        row = int(math.floor((point[0] + 90) / self.cell))
+        column = int(math.floor((point[1] + 180) / self.cell)) % self.columns
+        return row, column
+
+    def _cells_within(self, point, radius):
+        """
+        Grid cells that can hold a point within the radius
+        The latitude band is the radius in degrees. The longitude span is the widest a circle of that radius
+        gets, which is all the way around once the circle reaches a pole
+        :param point: latitude and longitude in degrees
+        :param radius: distance in km
+        :return: generator of the cells
+        """
+        angle = radius / EARTH_RADIUS
+        low = max(-90.0, point[0] - math.degrees(angle))
+        high = min(90.0, point[0] + math.degrees(angle))
+        rows = range(self._cell((low, 0))[0], self._cell((high, 0))[0] + 1)
+        cosine = math.cos(math.radians(point[0]))
+        if angle >= math.pi / 2 or low <= -90 or high >= 90 or math.sin(angle) >= cosine:
+            columns = range(self.columns)
+        else:
+            span = math.degrees(math.asin(math.sin(angle) / cosine))
+            first = int(math.floor((point[1] - span + 180) / self.cell))
+            last = int(math.floor((point[1] + span + 180) / self.cell))
+            columns = range(first, min(last, first + self.columns - 1) + 1)
+        for row in rows:
+            for column in columns:
+                yield row, column % self.columns
@@ -0,0 +1,149 @@
+"""
+Synthetic networks for this graph
+@author David Guan
+"""
+
+import json
+import math
+import random
+from geo import EARTH_RADIUS, haversine
+from spatial import SpatialIndex
+from vertex import Vertex
+
+CONTINENTS = ("North America", "South America", "Europe", "Africa", "Asia", "Australia")
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def synthetic_network(cities, hubs=None, seed=0, hub_routes=4, long_hauls=2, regional=600):
+    """
+    Makes up a hub and spoke network in the same layout as map_data.json, for benchmarks and tests
+    Hubs are spread evenly over the globe and each flies to its closest hubs plus a few long hauls to random
+    hubs. Every other city is a regional airport placed near a hub, flying to it and sometimes to a second hub
+    close by. Populations follow a power law with the hubs the biggest, and distances are the great circle
+    distances between the cities
+    :param cities: number of cities
+    :param hubs: number of hubs, by default about one in fifty cities
+    :param seed: seed so the same network can be made again
+    :param hub_routes: number of closest hubs every hub flies to
+    :param long_hauls: number of random hubs every hub flies to
+    :param regional: furthest a regional airport is from its hub in km
+    :return: dictionary with metros and routes like the json
+    """
+    generator = random.Random(seed)
+    if hubs is None:
+        hubs = cities // 50 + 1
+    hubs = max(0, min(hubs, cities))
+    metros = []
+    points = []
+    for i in range(hubs):
+        latitude = math.degrees(math.asin(generator.uniform(-1, 1)))
+        longitude = generator.uniform(-180, 180)
+        points.append((latitude, longitude))
+        metros.append(_metro(i, latitude, longitude, CONTINENTS[i % len(CONTINENTS)],
+                             int(1000000 * generator.paretovariate(1.2))))
+    index = SpatialIndex()
+    for metro in metros:
+        index.add_vertex(Vertex(metro))
+    routes = {}
+    closest = []
+    for i in range(hubs):
+        nearby = [code for code, distance in index.nearest(points[i], hub_routes + 1, metros[i]["code"])]
+        closest.append(nearby)
+        for code in nearby[:hub_routes]:
+            _connect(routes, metros[i]["code"], code)
+        for j in range(long_hauls if hubs > 1 else 0):
+            other = generator.randrange(hubs)
+            if other != i:
+                _connect(routes, metros[i]["code"], metros[other]["code"])
+    for i in range(hubs, cities):
+        hub = generator.randrange(hubs)
+        latitude, longitude = _near(points[hub], generator.uniform(20, regional), generator)
+        points.append((latitude, longitude))
+        metros.append(_metro(i, latitude, longitude, metros[hub]["continent"],
+                             int(20000 * generator.paretovariate(1.5))))
+        _connect(routes, metros[i]["code"], metros[hub]["code"])
+        if closest[hub] and generator.random() < 0.3:
+            _connect(routes, metros[i]["code"], closest[hub][0])
+    position = {metro["code"]: i for i, metro in enumerate(metros)}
+    return {"metros": metros,
+            "routes": [{"ports": [start, destination],
+                        "distance": int(round(haversine(points[position[start]], points[position[destination]])))}
+                       for start, destination in routes]}
+
+
+def write_network(location, cities, **options):
+    """
+    Writes a synthetic network to a json file that Graph.add_from_json can load
+    :param location: location of the file
+    :param cities: number of cities
+    :param options: the other options of synthetic_network
+    :return: the network that was written
+    """
+    network = synthetic_network(cities, **options)
+    with open(location, 'w') as file:
+        json.dump(network, file)
+    return network
+
+
+def city_code(i):
+    """
+    Code of the i-th synthetic city, three letters for the first 17576 and more after that
+    :param i: number of the city
+    :return: the code, i.e. AAA, AAB, ...
+    """
+    letters = []
+    length = 3
+    while i >= len(LETTERS) ** length:
+        i -= len(LETTERS) ** length
+        length += 1
+    for j in range(length):
+        i, letter = divmod(i, len(LETTERS))
+        letters.append(LETTERS[letter])
+    return "".join(reversed(letters))
+
+
+def _metro(i, latitude, longitude, continent, population):
+    """
+    A city in the json layout
+    :param i: number of the city
+    :param latitude: latitude in degrees
+    :param longitude: longitude in degrees
+    :param continent: the continent
+    :param population: the population
+    :return: dictionary of the city
+    """
+    coordinates = {"N" if latitude >= 0 else "S": round(abs(latitude), 4),
+                   "E" if longitude >= 0 else "W": round(abs(longitude), 4)}
+    return {"code": city_code(i), "name": "City {}".format(i), "country": "C{}".format(i % 200),
+            "continent": continent, "timezone": int(round(longitude / 15)), "coordinates": coordinates,
+            "population": population, "region": i % 4 + 1}
+
+
+def _near(point, distance, generator):
+    """
+    A point at a distance from another one in a random direction
+    :param point: latitude and longitude in degrees
+    :param distance: distance in km
+    :param generator: random number generator
+    :return: latitude and longitude in degrees
+    """
+    latitude, longitude = math.radians(point[0]), math.radians(point[1])
+    bearing = generator.uniform(0, 2 * math.pi)
+    angle = distance / EARTH_RADIUS
+    new_latitude = math.asin(math.sin(latitude) * math.cos(angle) +
+                             math.cos(latitude) * math.sin(angle) * math.cos(bearing))
+    new_longitude = longitude + math.atan2(math.sin(bearing) * math.sin(angle) * math.cos(latitude),
+                                           math.cos(angle) - math.sin(latitude) * math.sin(new_latitude))
+    return math.degrees(new_latitude), (math.degrees(new_longitude) + 540) % 360 - 180
+
+
+def _connect(routes, start, destination):
+    """
+    Adds a route once no matter which way around it is given
+    :param routes: dictionary used as an ordered set of the routes
+    :param start: a city code
+    :param destination: the other city code
+    :return: nothing
+    """
+    if start != destination and (destination, start) not in routes:
+        routes[(start, destination)] = None
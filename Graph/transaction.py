@@ -0,0 +1,374 @@
+"""
+Batched changes for this graph
+@author David Guan
+"""
+
+from geo import latitude_longitude
+from vertex import Vertex
+
+NUMBER_FIELDS = ("timezone", "population", "region")
+TEXT_FIELDS = ("code", "name", "country", "continent")
+
+
+class Batch:
+    def __init__(self, graph):
+        """
+        Constructor for the Batch class
+        Collects changes to the graph and applies them all at once when the with block ends, i.e.
+        with graph.batch() as batch:
+            batch.remove_route("CMI", "LAX")
+            batch.add_route(2800, "CMI", "SFO")
+        The changes are checked together against the network first and nothing is applied if any of them is
+        wrong. They are then applied to the graph itself, each after noting how to put back what it touches, so
+        a change failing halfway is undone along with the ones before it and the batch costs only as much as its
+        changes. The version is bumped and the cached searches are thrown away only once for the whole batch
+        :param graph: the graph to change
+        :return: nothing
+        """
+        self.graph = graph
+        self.operations = []
+
+    def add_city(self, city):
+        """
+        Adds a city, see Graph.add_city
+        :param city: dictionary set up with codes, names, population, etc
+        :return: nothing
+        """
+        self.operations.append(("add_city", (city,)))
+
+    def remove_city(self, code):
+        """
+        Removes a city and its routes, see Graph.remove_city
+        :param code: city to remove
+        :return: nothing
+        """
+        self.operations.append(("remove_city", (code,)))
+
+    def add_route(self, distance, start, destination):
+        """
+        Adds a route both ways, see Graph.add_route
+        :param distance: distance of the route, None to use the great circle distance between the cities
+        :param start: starting city code
+        :param destination: destination city code
+        :return: nothing
+        """
+        self.operations.append(("add_route", (distance, start, destination)))
+
+    def remove_route(self, start, destination):
+        """
+        Removes a route both ways, see Graph.remove_route
+        :param start: starting city code
+        :param destination: destination city code
+        :return: nothing
+        """
+        self.operations.append(("remove_route", (start, destination)))
+
+    def edit_city(self, code, key, val):
+        """
+        Edits a field of a city, see Graph.edit_city
+        :param code: code of the city
+        :param key: the key to change in the city, i.e. code, name, country, etc
+        :param val: the value of the key to change
+        :return: nothing
+        """
+        self.operations.append(("edit_city", (code, key, val)))
+
+    def commit(self):
+        """
+        Checks every change and applies them, the with block calls this when it ends without an error
+        :return: number of changes applied
+        """
+        problems = self.validate()
+        if problems:
+            raise ValueError("The batch was not applied: {}".format("; ".join(problems)))
+        graph = self.graph
+        graph._deferred = []
+        undo = []
+        try:
+            for name, args in self.operations:
+                undo.append(getattr(self, "_undo_" + name)(*args))
+                getattr(graph, name)(*args)
+        except Exception:
+            for step in reversed(undo):
+                step()
+            raise
+        finally:
+            changes = graph._deferred
+            graph._deferred = None
+        if changes:
+            graph._changed(any(changes))
+        count = len(self.operations)
+        self.operations = []
+        return count
+
+    def validate(self):
+        """
+        Plays the changes over a light copy of the cities and the routes they touch, without changing the graph
+        :return: list of the problems found, empty if the batch can be applied
+        """
+        check = _Check(self.graph)
+        problems = []
+        for position, (name, args) in enumerate(self.operations):
+            problem = getattr(check, name)(*args)
+            if problem is not None:
+                problems.append("#{} {}: {}".format(position + 1, name, problem))
+        return problems
+
+    def _undo_add_city(self, city):
+        """
+        How to undo adding a city, which may replace one with the same code
+        :param city: the city dictionary
+        :return: function putting the graph back
+        """
+        graph = self.graph
+        code = city["code"]
+        old = graph.vertices.get(code)
+
+        def undo():
+            if old is not None:
+                graph._put_vertex(old)
+            elif code in graph.vertices:
+                graph._drop_vertex(code)
+        return undo
+
+    def _undo_remove_city(self, code):
+        """
+        How to undo removing a city, which puts it back with its routes both ways
+        :param code: the city code
+        :return: function putting the graph back
+        """
+        graph = self.graph
+        vertex = graph.vertices.get(code)
+        routes = []
+        for edge in graph.edges.get(code, ()):
+            routes.append(edge)
+            back = graph.edges.get(edge.destination)
+            if back is not None and back.get(code) is not None:
+                routes.append(back.get(code))
+
+        def undo():
+            if vertex is not None and code not in graph.vertices:
+                graph._put_vertex(vertex)
+            for edge in routes:
+                graph._put_edge(edge)
+        return undo
+
+    def _undo_add_route(self, distance, start, destination):
+        """
+        How to undo adding a route, which may replace one between the same cities
+        :param distance: distance of the route or None
+        :param start: starting city code
+        :param destination: destination city code
+        :return: function putting the graph back
+        """
+        return self._undo_remove_route(start, destination)
+
+    def _undo_remove_route(self, start, destination):
+        """
+        How to undo removing a route, which puts back both ways of it as they were
+        :param start: starting city code
+        :param destination: destination city code
+        :return: function putting the graph back
+        """
+        graph = self.graph
+        routes = []
+        for first, second in ((start, destination), (destination, start)):
+            adjacency = graph.edges.get(first)
+            routes.append((first, second, adjacency.get(second) if adjacency is not None else None))
+
+        def undo():
+            for first, second, edge in routes:
+                if edge is not None:
+                    graph._put_edge(edge)
+                else:
+                    graph._drop_edge(first, second)
+        return undo
+
+    def _undo_edit_city(self, code, key, val):
+        """
+        How to undo editing a city, changing the code back or setting the old value again
+        :param code: the city code
+        :param key: the field
+        :param val: the new value
+        :return: function putting the graph back
+        """
+        graph = self.graph
+        if key == "code":
+            return lambda: graph.edit_city(val, "code", code) if val in graph.vertices else None
+        old = getattr(graph.vertices[code], key)
+        return lambda: graph._edit_field(code, key, old)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        if kind is None:
+            self.commit()
+
+
+class _Check:
+    def __init__(self, graph):
+        """
+        Constructor for the _Check class
+        Overlays the cities that exist and the routes of the cities the batch touches on top of the graph
+        so checking costs as much as the batch and not as much as the network
+        :param graph: the graph the batch is for
+        :return: nothing
+        """
+        self.graph = graph
+        self.cities = {}
+        self.coordinates = {}
+        self.routes = {}
+
+    def exists(self, code):
+        """
+        Whether a city exists at this point of the batch
+        :param code: the city code
+        :return: true if it does
+        """
+        return self.cities.get(code, code in self.graph.vertices)
+
+    def routes_of(self, code):
+        """
+        Destinations of a city at this point of the batch
+        :param code: the city code
+        :return: the set of destinations, which can be changed
+        """
+        if code not in self.routes:
+            adjacency = self.graph.edges.get(code)
+            self.routes[code] = set(adjacency.destinations()) if adjacency is not None else set()
+        return self.routes[code]
+
+    def has_coordinates(self, code):
+        """
+        Whether a city has coordinates at this point of the batch
+        :param code: the city code
+        :return: true if it does
+        """
+        if code in self.coordinates:
+            coordinates = self.coordinates[code]
+        else:
+            coordinates = self.graph.vertices[code].coordinates
+        try:
+            return isinstance(coordinates, dict) and latitude_longitude(coordinates) is not None
+        except (TypeError, ValueError):
+            return False
+
+    def add_city(self, city):
+        """
+        Checks that the city has every field and that every field has a value the graph can store
+        :param city: the city dictionary
+        :return: the problem, or None if there is none
+        """
+        try:
+            Vertex(city)
+        except Exception:
+            return "not a complete city"
+        for key in Vertex.FIELDS:
+            problem = value_problem(key, city[key])
+            if problem is not None:
+                return problem
+        self.cities[city["code"]] = True
+        self.coordinates[city["code"]] = city["coordinates"]
+
+    def remove_city(self, code):
+        """
+        Checks that the city exists and drops its routes
+        :param code: the city code
+        :return: the problem, or None if there is none
+        """
+        if not self.exists(code):
+            return "no city {}".format(code)
+        for destination in list(self.routes_of(code)):
+            self.routes_of(destination).discard(code)
+        self.routes[code] = set()
+        self.cities[code] = False
+
+    def add_route(self, distance, start, destination):
+        """
+        Checks that both cities exist and the distance is a number or can be worked out
+        :param distance: distance of the route or None
+        :param start: starting city code
+        :param destination: destination city code
+        :return: the problem, or None if there is none
+        """
+        for code in (start, destination):
+            if not self.exists(code):
+                return "no city {}".format(code)
+        if distance is None:
+            if not (self.has_coordinates(start) and self.has_coordinates(destination)):
+                return "no distance or coordinates for {}-{}".format(start, destination)
+        elif not isinstance(distance, (int, float)) or isinstance(distance, bool) or distance < 0:
+            return "bad distance {}".format(distance)
+        self.routes_of(start).add(destination)
+        self.routes_of(destination).add(start)
+
+    def remove_route(self, start, destination):
+        """
+        Checks that the route exists
+        :param start: starting city code
+        :param destination: destination city code
+        :return: the problem, or None if there is none
+        """
+        if not self.exists(start) or destination not in self.routes_of(start):
+            return "no route {}-{}".format(start, destination)
+        self.routes_of(start).discard(destination)
+        self.routes_of(destination).discard(start)
+
+    def edit_city(self, code, key, val):
+        """
+        Checks that the city and field exist and that a new code is free, moving the routes for a new code
+        :param code: the city code
+        :param key: the field
+        :param val: the new value
+        :return: the problem, or None if there is none
+        """
+        if not self.exists(code):
+            return "no city {}".format(code)
+        if key not in Vertex.FIELDS:
+            return "no field {}".format(key)
+        problem = value_problem(key, val)
+        if problem is not None:
+            return problem
+        if key == "coordinates":
+            self.coordinates[code] = val
+        elif key == "code" and val != code:
+            if self.exists(val):
+                return "city {} already exists".format(val)
+            if code not in self.coordinates:
+                self.coordinates[code] = self.graph.vertices[code].coordinates
+            self.coordinates[val] = self.coordinates[code]
+            routes = self.routes_of(code)
+            for destination in routes:
+                if destination != code:
+                    self.routes_of(destination).discard(code)
+                    self.routes_of(destination).add(val)
+            self.routes[val] = {val if destination == code else destination for destination in routes}
+            self.routes[code] = set()
+            self.cities[code] = False
+            self.cities[val] = True
+
+
+def value_problem(key, val):
+    """
+    Checks that a value can be stored in a field of a city, so the indexes can't fail on it halfway through a batch
+    Numbers have to be numbers, text has to be text and coordinates have to be a dictionary of degrees, although
+    the coordinates can leave out the latitude or longitude
+    :param key: the field
+    :param val: the value
+    :return: the problem, or None if there is none
+    """
+    if key in NUMBER_FIELDS:
+        if not isinstance(val, (int, float)) or isinstance(val, bool):
+            return "{} must be a number, not {}".format(key, val)
+    elif key in TEXT_FIELDS:
+        if not isinstance(val, str) or not val:
+            return "{} must be text, not {}".format(key, val)
+    elif key == "coordinates":
+        try:
+            if isinstance(val, dict):
+                latitude_longitude(val)
+                return None
+        except (TypeError, ValueError):
+            pass
+        return "bad coordinates {}".format(val)
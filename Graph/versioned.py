@@ -0,0 +1,52 @@
+"""
+Versioned graph for concurrent readers and writers
+@author David Guan
+"""
+
+import contextlib
+import threading
+
+from graph import Graph
+
+
+class VersionedGraph:
+    def __init__(self, graph=None):
+        """
+        Constructor for the VersionedGraph class
+        Holds the published version of the network. Readers pin the current version and query it for as long as
+        they like without any locks, since a published version is never changed again. Writers edit a fork of the
+        current version and publish it in one assignment once they are done, so readers see either all of an
+        edit or none of it. Writers take turns so no edit is lost
+        :param graph: the network to start from, an empty one by default
+        :return: nothing
+        """
+        self._current = graph if graph is not None else Graph()
+        self._writer = threading.Lock()
+
+    def pin(self):
+        """
+        The current version of the network for reading, it must not be changed
+        :return: the Graph
+        """
+        return self._current
+
+    @property
+    def version(self):
+        """
+        Version number of the current network
+        :return: the version
+        """
+        return self._current.version
+
+    @contextlib.contextmanager
+    def edit(self):
+        """
+        Gives a fork of the current version to change in the with block and publishes it at the end
+        Nothing is published if the block raises
+        i.e. with versioned.edit() as graph: graph.remove_city("CMI")
+        :return: the fork to change
+        """
+        with self._writer:
+            draft = self._current.fork()
+            yield draft
+            self._current = draft
@@ -3,19 +3,24 @@ Vertex class for this graph
 @author David Guan
 """
 
+import sys
+
 
 class Vertex:
+    FIELDS = ("code", "name", "country", "continent", "timezone", "coordinates", "population", "region")
+    __slots__ = FIELDS
 
     def __init__(self, metros):
         """
         Vertex constructor for vertices
         Simple check that raises an Exception if the metros isn't proper
         Might have to change this class around later if we're to edit information
+        The class uses slots instead of a dictionary per city and interns the city code
         :param metros: a dictionary with the information of the city
         :return: nothing
         """
         if len(metros) == 8 and "code" in metros:
-            self.code = metros["code"]
+            self.code = intern(metros["code"])
             self.name = metros["name"]
             self.country = metros["country"]
             self.continent = metros["continent"]
@@ -26,3 +31,115 @@ class Vertex:
         else:
             raise Exception
 
+    def to_dict(self):
+        """
+        Gets all the information of the city, since there is no __dict__ to call vars on
+        :return: a dictionary with the information of the city
+        """
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def copy(self):
+        """
+        Copy of the city, for editing a city that another version of the graph still uses
+        :return: the new Vertex
+        """
+        return Vertex(self.to_dict())
+
+
+class LazyVertex(Vertex):
+    __slots__ = ("_fetch", "_edited")
+
+    def __init__(self, code, fetch):
+        """
+        Constructor for the LazyVertex class
+        A city that only has its code until any other field is asked for, then everything else is read in one go
+        with the fetch function, i.e. from a row of a snapshot or an offset into the json
+        Fields set before that, like with edit_city, are kept instead of the fetched ones
+        :param code: code of the city
+        :param fetch: function giving a dictionary set up like the metros in the json
+        :return: nothing
+        """
+        object.__setattr__(self, "_fetch", None)
+        object.__setattr__(self, "_edited", ())
+        self.code = intern(code)
+        self._fetch = fetch
+
+    def __setattr__(self, name, value):
+        """
+        Sets a field, remembering the ones set before the city is loaded so loading keeps them
+        :param name: name of the field
+        :param value: the value
+        :return: nothing
+        """
+        if self._fetch is not None and name in Vertex.FIELDS:
+            object.__setattr__(self, "_edited", self._edited + (name,))
+        object.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        """
+        Called only for fields that aren't set yet, which loads the city
+        :param name: name of the field
+        :return: the value
+        """
+        if name not in Vertex.FIELDS or self._fetch is None:
+            raise AttributeError(name)
+        self.load()
+        return getattr(self, name)
+
+    def load(self, metros=None):
+        """
+        Reads the fields of the city that aren't set yet
+        :param metros: the fetched dictionary if it was already read, i.e. by load_all
+        :return: nothing
+        """
+        fetch = self._fetch
+        if fetch is None:
+            return
+        if metros is None:
+            metros = fetch()
+        edited = self._edited
+        for field in Vertex.FIELDS:
+            if field != "code" and field not in edited:
+                object.__setattr__(self, field, metros[field])
+        self._fetch = None
+        self._edited = ()
+
+
+def is_loaded(vertex):
+    """
+    Whether all the fields of a city can be read without loading anything
+    :param vertex: the city
+    :return: false only for a LazyVertex that hasn't been loaded yet
+    """
+    return getattr(vertex, "_fetch", None) is None
+
+
+def load_all(vertices):
+    """
+    Loads many cities at once, i.e. every city an index was waiting on. Cities whose fetch function has a many
+    function to read several of them together, like the records of a json file, are read with it in one go
+    :param vertices: the cities, the ones already loaded are skipped
+    :return: nothing
+    """
+    waiting = {}
+    for vertex in vertices:
+        if not is_loaded(vertex):
+            waiting.setdefault(getattr(vertex._fetch, "many", None), []).append(vertex)
+    for many, group in waiting.items():
+        if many is None:
+            for vertex in group:
+                vertex.load()
+        else:
+            for vertex, metros in zip(group, many([vertex._fetch for vertex in group])):
+                vertex.load(metros)
+
+
+def intern(value):
+    """
+    Interns the value if it's a string so every copy of the same code shares one object
+    :param value: value to intern
+    :return: the interned string or the value itself
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
@@ -0,0 +1,108 @@
+"""
+Streaming JSON writer for this graph
+@author David Guan
+"""
+
+import gzip
+import io
+import json
+
+DATA_SOURCES = ["http://www.gcmap.com/",
+                "http://www.theodora.com/country_digraphs.html",
+                "http://www.citypopulation.de/world/Agglomerations.html",
+                "http://www.mongabay.com/cities_urban_01.htm",
+                "http://en.wikipedia.org/wiki/Urban_agglomeration",
+                "http://www.worldtimezone.com/standard.html"]
+
+
+class JsonWriter:
+    def __init__(self, compact=False):
+        """
+        Constructor for the JsonWriter class
+        Writes a graph in the same layout as map_data.json one record at a time instead of building
+        the whole document in memory first
+        :param compact: leave out the indentation and newlines to make the file smaller
+        :return: nothing
+        """
+        self.compact = compact
+
+    def write(self, graph, location, compress=None):
+        """
+        Writes the graph to a location or to a file object
+        :param graph: the graph to write
+        :param location: path of the file, or a file object. Paths ending in .gz are gzipped
+        :param compress: gzip the output, by default only paths ending in .gz are
+        :return: nothing
+        """
+        if isinstance(location, str):
+            if compress is None:
+                compress = location.endswith(".gz")
+            if compress:
+                with gzip.open(location, 'wt', encoding="utf-8") as file:
+                    self._write(graph, file)
+            else:
+                with open(location, 'w', encoding="utf-8") as file:
+                    self._write(graph, file)
+        elif compress:
+            # the file object belongs to the caller so only the gzip stream is closed
+            with gzip.GzipFile(fileobj=location, mode='wb') as binary:
+                file = io.TextIOWrapper(binary, encoding="utf-8")
+                self._write(graph, file)
+                file.flush()
+                file.detach()
+        else:
+            self._write(graph, location)
+
+    def _write(self, graph, file):
+        """
+        Writes the sections of the document in order
+        :param graph: the graph to write
+        :param file: text file to write to
+        :return: nothing
+        """
+        file.write("{")
+        self._array(file, "data_sources", DATA_SOURCES)
+        file.write(",")
+        self._array(file, "metros", (city.to_dict() for city in graph.vertices.values()))
+        file.write(",")
+        self._array(file, "routes", routes(graph))
+        file.write("}" if self.compact else "\n}")
+
+    def _array(self, file, key, records):
+        """
+        Writes one key of the document and its array, a record at a time
+        :param file: text file to write to
+        :param key: the key of the array
+        :param records: iterable of the records in the array
+        :return: nothing
+        """
+        if self.compact:
+            file.write(json.dumps(key) + ":[")
+            separator = ""
+            for record in records:
+                file.write(separator + json.dumps(record, separators=(",", ":")))
+                separator = ","
+            file.write("]")
+        else:
+            file.write("\n    " + json.dumps(key) + ": [")
+            separator = "\n        "
+            for record in records:
+                file.write(separator + json.dumps(record, indent=4).replace("\n", "\n        "))
+                separator = ",\n        "
+            file.write("\n    ]" if separator != "\n        " else "]")
+
+
+def routes(graph):
+    """
+    Gives every route of the graph once even though each one is stored in both directions
+    A route is skipped when the same route back was already given, which is known from the order the
+    cities are visited in so this doesn't need to remember the routes already written
+    :param graph: the graph to get the routes of
+    :return: generator of the routes as they appear in the json
+    """
+    order = {code: i for i, code in enumerate(graph.edges.keys())}
+    for code, _list in graph.edges.items():
+        for edge in _list:
+            reverse = graph.edges[edge.destination].get(code) if edge.destination in graph.edges else None
+            if reverse is None or reverse.distance != edge.distance or order[code] <= order[edge.destination]:
+                yield {"ports": [edge.start, edge.destination], "distance": edge.distance}
@@ -0,0 +1,27 @@
+from unittest import TestCase
+from adjacency import Adjacency
+from edge import Edge
+
+
+class TestAdjacency(TestCase):
+    def test_adjacency(self):
+        """
+        Tests that edges can be added, looked up and removed by destination
+        :return: true if all tests pass
+        """
+        adjacency = Adjacency()
+        adjacency.add(Edge(420, "LOL", "KEK"))
+        adjacency.add(Edge(6969, "LOL", "AYY"))
+        self.assertEqual(len(adjacency), 2)
+        self.assertTrue("KEK" in adjacency)
+        self.assertEqual(adjacency.get("AYY").distance, 6969)
+        self.assertRaises(TypeError, lambda: adjacency[0])
+        self.assertEqual([edge.destination for edge in adjacency], ["KEK", "AYY"])
+        adjacency.add(Edge(100, "LOL", "KEK"))
+        self.assertEqual(len(adjacency), 2)
+        self.assertEqual(adjacency.get("KEK").distance, 100)
+        self.assertEqual(adjacency.remove("KEK").distance, 100)
+        self.assertIsNone(adjacency.remove("KEK"))
+        self.assertIsNone(adjacency.get("KEK"))
+        self.assertEqual(list(adjacency.destinations()), ["AYY"])
+        pass
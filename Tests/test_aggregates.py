@@ -0,0 +1,98 @@
+from unittest import TestCase
+from graph import Graph
+import collections as col
+import heapq
+import random
+
+
+class TestAggregates(TestCase):
+    def check(self, graph):
+        """
+        Compares the kept up statistics with ones recomputed from scratch
+        :param graph: the graph to check
+        :return: nothing
+        """
+        distances = [edge.distance for _list in graph.edges.values() for edge in _list]
+        populations = [city.population for city in graph.vertices.values()]
+        self.assertEqual(graph.longest_flight()[2], max(distances))
+        self.assertEqual(graph.shortest_flight()[2], min(distances))
+        self.assertAlmostEqual(graph.average_distance(), sum(distances) / len(distances))
+        self.assertEqual(graph.biggest_city()[2], max(populations))
+        self.assertEqual(graph.smallest_city()[2], min(populations))
+        self.assertEqual(graph.average_city_size(), sum(populations) // len(populations))
+        degree = col.Counter({code: len(_list) for code, _list in graph.edges.items() if len(_list) > 0})
+        largest = heapq.nsmallest(5, [(-value, key) for key, value in degree.items()])
+        self.assertEqual(graph.hubs(), [(key, -value) for value, key in largest])
+
+    def test_mutations(self):
+        """
+        Tests that the statistics stay right through a long random series of changes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        self.check(graph)
+        generator = random.Random(42)
+        for step in range(400):
+            codes = list(graph.vertices.keys())
+            choice = generator.random()
+            if choice < 0.3:
+                graph.add_route(generator.randint(100, 15000), generator.choice(codes), generator.choice(codes))
+            elif choice < 0.5:
+                start = generator.choice(codes)
+                if start in graph.edges and len(graph.edges[start]) > 0:
+                    graph.remove_route(start, generator.choice(list(graph.edges[start].destinations())))
+            elif choice < 0.65:
+                graph.edit_city(generator.choice(codes), "population", generator.randint(1000, 40000000))
+            elif choice < 0.75:
+                code = generator.choice(codes)
+                graph.edit_city(code, "code", code + "X")
+            elif choice < 0.85 and len(codes) > 10:
+                graph.remove_city(generator.choice(codes))
+            else:
+                code = "N{}".format(step)
+                graph.add_city({"code": code, "name": code, "country": "US", "continent": "North America",
+                                "timezone": -6, "coordinates": {"N": 40, "W": 88},
+                                "population": generator.randint(1000, 40000000), "region": 1})
+                graph.add_route(generator.randint(100, 15000), code, generator.choice(codes))
+            self.check(graph)
+        pass
+
+    def test_rename_moves_routes(self):
+        """
+        Tests that changing the code of a city keeps its routes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        graph.edit_city("LOL", "code", "KEK")
+        self.assertFalse("LOL" in graph.edges)
+        self.assertEqual(graph.route_info(["KEK", "AYY", "LMA"])[0], 9705)
+        self.assertEqual(graph.djikstra("AYY", "LMA"), ["AYY", "KEK", "LMA"])
+        self.assertEqual(graph.hubs(), [("AYY", 2), ("KEK", 2), ("LMA", 2)])
+        pass
+
+    def test_bulk_load(self):
+        """
+        Tests that loading into an empty graph, which builds the indexes at the end, matches loading city by city
+        :return: true if all tests pass
+        """
+        bulk = Graph()
+        bulk.add_from_json('../Data/map_data.json')
+        single = Graph()
+        single.add_city({"code": "TMP", "name": "Temporary", "country": "X", "continent": "Asia", "timezone": 0,
+                         "coordinates": {"N": 1, "E": 1}, "population": 1, "region": 1})
+        single.add_from_json('../Data/map_data.json')
+        single.remove_city("TMP")
+        self.check(bulk)
+        for graph in (bulk, single):
+            graph.add_route(500, "LIM", "SCL")
+            graph.remove_route("MEX", "LIM")
+        self.check(bulk)
+        self.assertEqual(bulk.hubs(10, "weighted"), single.hubs(10, "weighted"))
+        self.assertEqual(bulk.average_distance(), single.average_distance())
+        self.assertEqual(bulk.continents_and_cities(), single.continents_and_cities())
+        self.assertEqual(bulk.nearest_cities("CHI", 5), single.nearest_cities("CHI", 5))
+        self.assertEqual(bulk.components(), single.components())
+        self.assertEqual(bulk.connectivity.bridges(), single.connectivity.bridges())
+        pass
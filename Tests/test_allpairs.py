@@ -0,0 +1,74 @@
+from unittest import TestCase
+from graph import Graph
+from allpairs import AllPairs, RouteCache
+import allpairs
+import math
+import os
+import shutil
+import tempfile
+
+
+class TestAllPairs(TestCase):
+    def test_matches_djikstra(self):
+        """
+        Tests that the precomputed routes are as short as the ones djikstra finds
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        methods = ["dijkstra"] if allpairs.np is None else ["dijkstra", "floyd"]
+        for method in methods:
+            table = AllPairs(graph, method)
+            for source in ("SCL", "CMI", "SYD"):
+                for target in graph.vertices.keys():
+                    path = table.path(source, target)
+                    self.assertEqual(path[0], source)
+                    self.assertEqual(path[-1], target)
+                    self.assertEqual(graph.route_info(path)[0], graph.route_info(graph.djikstra(source, target))[0])
+                    self.assertEqual(table.distance(source, target), graph.shortest_path_tree(source)[0][target])
+        pass
+
+    def test_save_and_load(self):
+        """
+        Tests that saved tables load back only for the same network
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        directory = tempfile.mkdtemp()
+        try:
+            location = os.path.join(directory, 'routes.bin')
+            AllPairs(graph).save(location)
+            table = AllPairs.load(location, graph)
+            self.assertEqual(table.path("AYY", "LMA"), ["AYY", "LOL", "LMA"])
+            graph.add_route(1, "AYY", "LMA")
+            self.assertFalse(table.is_current(graph))
+            self.assertRaises(ValueError, AllPairs.load, location, graph)
+        finally:
+            shutil.rmtree(directory)
+        pass
+
+
+class TestRouteCache(TestCase):
+    def test_cache(self):
+        """
+        Tests that routes are cached, evicted and thrown away when the network changes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        cache = RouteCache(graph, maxsize=2, table=AllPairs(graph))
+        self.assertEqual(cache.shortest_route("AYY", "LMA"), ["AYY", "LOL", "LMA"])
+        self.assertEqual(cache.shortest_route("AYY", "LMA"), ["AYY", "LOL", "LMA"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.shortest_route("LOL", "LMA")
+        cache.shortest_route("LMA", "LOL")
+        self.assertEqual(len(cache), 2)
+        graph.edit_city("LOL", "name", "Hi")
+        self.assertEqual(len(cache), 2)
+        graph.remove_route("AYY", "LOL")
+        self.assertEqual(cache.shortest_route("AYY", "LMA"), ["AYY", "LMA"])
+        self.assertIsNone(cache.table)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(AllPairs(graph).distance("LOL", "NOPE"), math.inf)
+        pass
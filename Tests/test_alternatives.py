@@ -0,0 +1,71 @@
+from unittest import TestCase
+from graph import Graph
+from alternatives import k_shortest_paths
+import random
+
+
+class TestAlternatives(TestCase):
+    def simple_paths(self, graph, source, target, limit):
+        """
+        Every route between two cities that doesn't visit a city twice, up to a distance
+        :param graph: the graph
+        :param source: the source city
+        :param target: the target city
+        :param limit: the longest distance to keep
+        :return: sorted list of the distances
+        """
+        distances = []
+        stack = [([source], 0)]
+        while stack:
+            path, distance = stack.pop()
+            if path[-1] == target:
+                distances.append(distance)
+                continue
+            for edge in graph.edges.get(path[-1], ()):
+                if edge.destination not in path and distance + edge.distance <= limit:
+                    stack.append((path + [edge.destination], distance + edge.distance))
+        return sorted(distances)
+
+    def test_against_enumeration(self):
+        """
+        Tests that the k shortest routes have the k shortest distances of all the loopless routes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        generator = random.Random(3)
+        codes = sorted(graph.vertices.keys())
+        for i in range(15):
+            source, target = generator.sample(codes, 2)
+            found = k_shortest_paths(graph, source, target, 6)
+            self.assertEqual(len(found), 6)
+            self.assertEqual(found[0][0], graph.djikstra(source, target))
+            self.assertEqual(len({tuple(path) for path, distance in found}), 6)
+            for path, distance in found:
+                self.assertEqual((path[0], path[-1]), (source, target))
+                self.assertEqual(len(set(path)), len(path))
+                self.assertEqual(graph.route_info(path)[0], distance)
+            self.assertEqual([distance for path, distance in found],
+                             self.simple_paths(graph, source, target, found[-1][1])[:6])
+        pass
+
+    def test_alternatives(self):
+        """
+        Tests that the alternatives come with their route_info and that the graph isn't changed
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        version = graph.version
+        routes = graph.aggregates.flights
+        found = graph.alternatives("LIM", "TYO", 4)
+        self.assertEqual(len(found), 4)
+        for path, distance, cost, time in found:
+            self.assertEqual(graph.route_info(path), (distance, cost, time))
+        self.assertEqual((graph.version, graph.aggregates.flights), (version, routes))
+        self.assertEqual(graph.alternatives("LIM", "LIM"), [(["LIM"], 0, 0, 0)])
+        self.assertEqual(graph.alternatives("LIM", "TYO", 0), [])
+        graph.add_city({"code": "ZZZ", "name": "Nowhere", "country": "X", "continent": "Asia", "timezone": 0,
+                        "coordinates": {"N": 1, "E": 1}, "population": 1, "region": 1})
+        self.assertEqual(graph.alternatives("LIM", "ZZZ"), [])
+        pass
@@ -0,0 +1,41 @@
+from unittest import TestCase, skipIf
+from graph import Graph
+import columnar
+
+
+@skipIf(columnar.np is None, "numpy is not installed")
+class TestColumnarStore(TestCase):
+    def test_statistics(self):
+        """
+        Tests that the vectorized statistics match the ones computed by the graph
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        graph.add_from_json('../Data/cmi_hub.json')
+        store = graph.columnar()
+        # both directions of a route are as long, so either one can come first
+        for flight, other in ((store.longest_flight(), graph.longest_flight()),
+                              (store.shortest_flight(), graph.shortest_flight())):
+            self.assertEqual(flight[2], other[2])
+            self.assertEqual({flight[0], flight[1]}, {other[0], other[1]})
+        self.assertEqual(store.average_distance(), graph.average_distance())
+        self.assertEqual(store.hubs(), graph.hubs())
+        self.assertEqual(store.visualize_url(), graph.visualize_url())
+        self.assertIs(graph.columnar(), store)
+        pass
+
+    def test_rebuilt_after_change(self):
+        """
+        Tests that the store is rebuilt once the graph changes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        store = graph.columnar()
+        self.assertEqual(store.longest_flight()[2], 6969)
+        graph.add_route(9000, "LOL", "KEK")
+        self.assertIsNot(graph.columnar(), store)
+        self.assertEqual(graph.columnar().longest_flight(), ("LOL", "KEK", 9000))
+        self.assertEqual(graph.columnar().hubs(2), [("LOL", 3), ("AYY", 2)])
+        pass
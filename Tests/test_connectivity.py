@@ -0,0 +1,160 @@
+from unittest import TestCase
+from graph import Graph
+from connectivity import UnionFind
+import random
+
+
+class TestConnectivity(TestCase):
+    def parts(self, graph, without=None, route=None):
+        """
+        Separate parts of the network found by walking it, leaving out a city or a route
+        :param graph: the graph
+        :param without: a city code to leave out
+        :param route: a pair of city codes to leave out
+        :return: number of parts
+        """
+        codes = set(graph.vertices.keys()) - {without}
+        seen = set()
+        count = 0
+        for code in codes:
+            if code in seen:
+                continue
+            count += 1
+            seen.add(code)
+            stack = [code]
+            while stack:
+                city = stack.pop()
+                for destination in graph.edges[city].destinations() if city in graph.edges else ():
+                    if destination == without or {city, destination} == set(route or ()):
+                        continue
+                    if destination not in seen:
+                        seen.add(destination)
+                        stack.append(destination)
+        return count
+
+    def assertMatchesWalk(self, graph):
+        """
+        Checks the components, articulation points and bridges against walks of the network
+        :param graph: the graph
+        :return: nothing
+        """
+        count = self.parts(graph)
+        self.assertEqual(len(graph.components()), count)
+        self.assertEqual(graph.connectivity.count(), count)
+        for code in graph.vertices:
+            self.assertEqual(graph.would_split(code), self.parts(graph, without=code) > count, code)
+        bridges = []
+        for code in graph.vertices:
+            for edge in graph.edges.get(code, ()):
+                if code < edge.destination and self.parts(graph, route=(code, edge.destination)) > count:
+                    bridges.append((code, edge.destination))
+        self.assertEqual(graph.connectivity.bridges(), sorted(bridges))
+
+    def test_union_find(self):
+        """
+        Tests joining sets and taking out cities that are alone
+        :return: true if all tests pass
+        """
+        sets = UnionFind()
+        for code in "ABCDE":
+            sets.add(code)
+        self.assertTrue(sets.union("A", "B"))
+        self.assertTrue(sets.union("C", "B"))
+        self.assertFalse(sets.union("A", "C"))
+        self.assertEqual(sets.count, 3)
+        self.assertEqual(sets.find("A"), sets.find("C"))
+        self.assertFalse(sets.remove("A"))
+        self.assertTrue(sets.remove("E"))
+        self.assertEqual(sets.count, 2)
+        self.assertEqual(sets.add_set(["F", "G", "H"]), "F")
+        self.assertEqual(sets.find("H"), "F")
+        self.assertEqual(sets.count, 3)
+        for code in "FGH":
+            sets.discard(code)
+        self.assertEqual(sets.count, 2)
+        self.assertNotIn("G", sets.parent)
+        pass
+
+    def test_incremental(self):
+        """
+        Tests that added routes and removed bridges keep the articulation points and bridges without working them
+        out again, and that a removed route in a cycle only leaves its own part to be worked out again
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        graph.add_city({"code": "NEW", "name": "New", "country": "X", "continent": "Asia", "timezone": 0,
+                        "coordinates": {"N": 1, "E": 1}, "population": 1, "region": 1})
+        self.assertMatchesWalk(graph)
+        generator = random.Random(3)
+        for i in range(30):
+            codes = sorted(graph.vertices.keys())
+            if i % 3:
+                graph.add_route(1000, *generator.sample(codes, 2))
+            else:
+                bridges = graph.connectivity.bridges()
+                if bridges:
+                    graph.remove_route(*generator.choice(bridges))
+            self.assertFalse(graph.connectivity._stale)
+            self.assertMatchesWalk(graph)
+        self.assertFalse(graph.route_would_split("LIM", "BOG"))
+        graph.remove_route("LIM", "BOG")
+        self.assertEqual(len(graph.connectivity._stale), 1)
+        for code in graph.vertices:
+            self.assertEqual(graph.would_split(code), self.parts(graph, without=code) > self.parts(graph), code)
+        self.assertEqual(len(graph.connectivity._stale), 1)
+        self.assertMatchesWalk(graph)
+        self.assertFalse(graph.connectivity._stale)
+        pass
+
+    def test_matches_walk(self):
+        """
+        Tests connectivity against walks of the network while cities and routes are added and removed
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        self.assertMatchesWalk(graph)
+        generator = random.Random(7)
+        for i in range(150):
+            codes = sorted(graph.vertices.keys())
+            action = generator.randrange(6)
+            if action == 0:
+                graph.add_city({"code": "N{}".format(i), "name": "New", "country": "X", "continent": "Asia",
+                                "timezone": 0, "coordinates": {"N": 1, "E": 1}, "population": 1, "region": 1})
+            elif action == 1 and len(codes) > 5:
+                graph.remove_city(generator.choice(codes))
+            elif action in (2, 3):
+                start, destination = generator.sample(codes, 2)
+                graph.add_route(generator.randrange(100, 5000), start, destination)
+            elif action == 4:
+                start = generator.choice(codes)
+                destinations = list(graph.edges[start].destinations()) if start in graph.edges else []
+                if destinations:
+                    graph.remove_route(start, generator.choice(destinations))
+            else:
+                field = generator.choice(["name", "population", "code"])
+                graph.edit_city(generator.choice(codes), field, i if field == "population" else "E{}".format(i))
+            if i % 5 == 0:
+                self.assertMatchesWalk(graph)
+        self.assertMatchesWalk(graph)
+        pass
+
+    def test_fork(self):
+        """
+        Tests that a fork keeps its own connectivity
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        self.assertTrue(graph.route_would_split("LIM", "SCL"))
+        fork = graph.fork()
+        fork.remove_route("LIM", "SCL")
+        self.assertFalse(fork.connected("LIM", "SCL"))
+        self.assertTrue(graph.connected("LIM", "SCL"))
+        self.assertTrue(graph.would_split("LIM"))
+        self.assertEqual(len(fork.components()), 2)
+        fork.add_route(1000, "SCL", "BOG")
+        self.assertTrue(fork.connected("LIM", "SCL"))
+        self.assertFalse(fork.would_split("LIM"))
+        pass
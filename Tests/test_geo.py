@@ -0,0 +1,40 @@
+from unittest import TestCase
+from geo import latitude_longitude, haversine, haversine_many
+import geo
+import unittest
+
+
+class TestGeo(TestCase):
+    def test_latitude_longitude(self):
+        """
+        Tests turning hemispheres into signed degrees
+        :return: true if all tests pass
+        """
+        self.assertEqual(latitude_longitude({"N": 40, "W": 88}), (40, -88))
+        self.assertEqual(latitude_longitude({"S": "33", "E": 71}), (-33, 71))
+        self.assertIsNone(latitude_longitude({"N": 40}))
+        pass
+
+    def test_haversine(self):
+        """
+        Tests the great circle distance
+        :return: true if all tests pass
+        """
+        self.assertEqual(haversine((10, 20), (10, 20)), 0)
+        self.assertAlmostEqual(haversine((0, 0), (0, 180)), 20015.09, places=1)
+        self.assertAlmostEqual(haversine((-34, 151), (34, -118)), haversine((34, -118), (-34, 151)))
+        pass
+
+    @unittest.skipIf(geo.np is None, "numpy is not installed")
+    def test_haversine_many(self):
+        """
+        Tests that the vectorized great circle distances match the one at a time ones
+        :return: true if all tests pass
+        """
+        start = [(10, 20), (0, 0), (-34, 151), (40, -88)]
+        destination = [(10, 20), (0, 180), (34, -118), (float("nan"), 0)]
+        distances = haversine_many(start, destination)
+        for i in range(3):
+            self.assertAlmostEqual(distances[i], haversine(start[i], destination[i]))
+        self.assertTrue(geo.np.isnan(distances[3]))
+        pass
@@ -1,8 +1,16 @@
 from unittest import TestCase
 from graph import Graph
 from edge import Edge
-from vertex import Vertex
+from vertex import Vertex, is_loaded
 import collections as col
+import graph as graph_module
+from synthetic import write_network
+import itertools
+import json
+import os
+import random
+import tempfile
+import unittest
 
 
 class TestGraph(TestCase):
@@ -161,7 +169,7 @@ class TestGraph(TestCase):
         self.assertTrue("LOL" in graph.vertices)
         self.assertTrue("LMA" in graph.vertices)
         self.assertTrue("AYY" in graph.edges)
-        self.assertTrue("AYY" in graph.edges["AYY"][0].start)
+        self.assertTrue("AYY" in next(iter(graph.edges["AYY"])).start)
         graph.remove_city("AYY")
         self.assertFalse("AYY" in graph.vertices)
         self.assertFalse("AYY" in graph.edges)
@@ -230,12 +238,12 @@ class TestGraph(TestCase):
         self.assertFalse("LOL" in graph.edges)
         graph.add_route(distance, start, destination)
         self.assertTrue("LOL" in graph.edges)
-        self.assertTrue(start == graph.edges["LOL"][0].start)
-        self.assertTrue(destination == graph.edges["LOL"][0].destination)
-        self.assertTrue(distance == graph.edges["LOL"][0].distance)
-        self.assertTrue(edge.start == graph.edges["LOL"][0].start)
-        self.assertTrue(edge.destination == graph.edges["LOL"][0].destination)
-        self.assertTrue(edge.distance == graph.edges["LOL"][0].distance)
+        self.assertTrue(start == graph.edges["LOL"].get("KEK").start)
+        self.assertTrue(destination == graph.edges["LOL"].get("KEK").destination)
+        self.assertTrue(distance == graph.edges["LOL"].get("KEK").distance)
+        self.assertTrue(edge.start == graph.edges["LOL"].get("KEK").start)
+        self.assertTrue(edge.destination == graph.edges["LOL"].get("KEK").destination)
+        self.assertTrue(edge.distance == graph.edges["LOL"].get("KEK").distance)
         pass
 
     def test_edit_city(self):
@@ -258,6 +266,31 @@ class TestGraph(TestCase):
         self.assertTrue(vertex.name == "BLAH")
         pass
 
+    def test_bad_values(self):
+        """
+        Test that changes with values of the wrong type fail before anything is stored
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        routes = sum(len(adjacency) for adjacency in graph.edges.values())
+        flights = graph.aggregates.flights
+        continent = graph.vertices["LOL"].continent
+        path = graph.djikstra("LOL", "LMA")
+        self.assertRaises(ValueError, graph.add_route, '100', "LOL", "KEK")
+        self.assertRaises(ValueError, graph.add_route, -1, "LOL", "KEK")
+        self.assertRaises(ValueError, graph.edit_city, "LOL", "population", "5")
+        self.assertRaises(KeyError, graph.edit_city, "LOL", "size", 5)
+        city = graph.vertices["LOL"].to_dict()
+        city.update(code="NEW", timezone="UTC")
+        self.assertRaises(ValueError, graph.add_city, city)
+        self.assertEqual(sum(len(adjacency) for adjacency in graph.edges.values()), routes)
+        self.assertEqual(graph.aggregates.flights, flights)
+        self.assertNotIn("NEW", graph.vertices)
+        self.assertIn("LOL", graph.cities_by(continent=continent))
+        self.assertEqual(graph.djikstra("LOL", "LMA"), path)
+        pass
+
     def test_route_info(self):
         """
         Test whether the route information is correct
@@ -292,3 +325,206 @@ class TestGraph(TestCase):
         self.assertTrue(route == ["LOL", "LMA"])
         route = graph.djikstra("LMA", "LOL")
         self.assertTrue(route == ["LMA", "LOL"])
+
+    def test_shortest_path_tree(self):
+        """
+        Test that the shortest path tree is cached and reused by djikstra
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        dist, prev = graph.shortest_path_tree("AYY")
+        self.assertEqual(dist["LMA"], 3156)
+        self.assertEqual(prev["LMA"], "LOL")
+        self.assertIs(graph.shortest_path_tree("AYY")[0], dist)
+        self.assertEqual(graph.djikstra("AYY", "LMA"), ["AYY", "LOL", "LMA"])
+        graph.remove_route("AYY", "LOL")
+        self.assertEqual(graph.djikstra("AYY", "LMA"), ["AYY", "LMA"])
+        self.assertEqual(graph.shortest_path_tree("AYY")[0]["LMA"], 6969)
+
+    def test_astar(self):
+        """
+        Test that A* finds routes as short as djikstra while expanding fewer cities
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        self.assertEqual(graph.astar("AYY", "LMA"), ["AYY", "LOL", "LMA"])
+        self.assertEqual(graph.astar("LOL", "LMA"), ["LOL", "LMA"])
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        graph.djikstra("NYC", "SYD")
+        expanded = graph.expanded
+        path = graph.astar("NYC", "SYD")
+        self.assertTrue(0 < graph.expanded < expanded)
+        self.assertEqual(graph.route_info(path)[0], graph.route_info(graph.djikstra("NYC", "SYD"))[0])
+        estimate = graph._heuristic_data()
+        graph.edit_city("NYC", "name", "Gotham")
+        graph.edit_city("NYC", "population", 1)
+        self.assertIs(graph._heuristic_data()[1], estimate[1])
+        graph.edit_city("NYC", "coordinates", {"N": 10, "W": 74})
+        self.assertEqual(graph._heuristic_data()[1]["NYC"], (10.0, -74.0))
+
+    def test_cheapest_and_fastest_route(self):
+        """
+        Test that the cheapest and fastest routes match route_info and beat the shortest route
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        graph.add_route(100, "LOL", "KEK")
+        self.assertEqual(graph.cheapest_route("AYY", "LMA"), ["AYY", "LOL", "LMA"])
+        self.assertEqual(graph.fastest_route("LOL", "AYY"), ["LOL", "AYY"])
+        # flying LOL-KEK-LOL first would make the long leg cheaper but cities aren't visited twice
+        self.assertEqual(graph.cheapest_route("LOL", "AYY"), ["LOL", "AYY"])
+        self.assertEqual(graph.cheapest_route("LOL", "NOPE"), ["NOPE"])
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        for source, target in (("SCL", "TYO"), ("CMI", "SYD"), ("LIM", "ESS")):
+            shortest = graph.route_info(graph.djikstra(source, target))
+            cheapest = graph.route_info(graph.cheapest_route(source, target))
+            fastest = graph.route_info(graph.fastest_route(source, target))
+            self.assertTrue(cheapest[1] <= shortest[1])
+            self.assertTrue(cheapest[1] <= fastest[1])
+            self.assertTrue(fastest[2] <= shortest[2])
+            self.assertTrue(fastest[2] <= cheapest[2])
+
+    def test_cheapest_route_bounded(self):
+        """
+        Tests that the cheapest route search settles no more labels than there are cities and numbers of legs
+        priced on a bigger network, and that its routes are loopless and no dearer than the shortest ones
+        :return: true if all tests pass
+        """
+        handle, location = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            write_network(location, 3000, seed=2)
+            graph = Graph()
+            graph.add_from_json(location)
+        finally:
+            os.remove(location)
+        self.assertEqual(graph_module.COST_MULTIPLIERS[-2:], [0.05, 0])
+        generator = random.Random(3)
+        codes = sorted(graph.vertices.keys())
+        for i in range(15):
+            source, target = generator.sample(codes, 2)
+            path = graph.cheapest_route(source, target)
+            self.assertLessEqual(graph.expanded, len(graph_module.COST_MULTIPLIERS) * len(codes))
+            self.assertEqual((path[0], path[-1]), (source, target))
+            self.assertEqual(len(set(path)), len(path))
+            self.assertLessEqual(graph.route_info(path)[1], graph.route_info(graph.djikstra(source, target))[1])
+        pass
+
+    def test_cheapest_route_exact(self):
+        """
+        Tests the cheapest route against the cost of every loopless route on small random networks, including one
+        where the cheapest label of a city went through a city the cheapest route needs later
+        :return: true if all tests pass
+        """
+        def cheapest(graph, path, target):
+            if path[-1] == target:
+                return graph.route_info(path)[1]
+            costs = [cheapest(graph, path + [destination], target)
+                     for destination in graph.edges[path[-1]].destinations() if destination not in path]
+            costs = [cost for cost in costs if cost is not None]
+            return min(costs) if costs else None
+
+        def city(code):
+            return {"code": code, "name": code, "country": "X", "continent": "Asia", "timezone": 0,
+                    "coordinates": {"N": 1, "E": 1}, "population": 1, "region": 1}
+
+        graph = Graph()
+        for code in "SXVT":
+            graph.add_city(city(code))
+        for distance, start, destination in ((100, "S", "X"), (200, "S", "V"), (100, "X", "V"), (10000, "X", "T")):
+            graph.add_route(distance, start, destination)
+        self.assertEqual(graph.cheapest_route("S", "T"), ["S", "V", "X", "T"])
+        generator = random.Random(4)
+        for i in range(60):
+            graph = Graph()
+            codes = ["C{}".format(j) for j in range(generator.randrange(4, 10))]
+            for code in codes:
+                graph.add_city(city(code))
+            for j in range(generator.randrange(len(codes), 3 * len(codes))):
+                distance = generator.choice([generator.randrange(50, 500), generator.randrange(1000, 20000)])
+                graph.add_route(distance, *generator.sample(codes, 2))
+            for source, target in itertools.permutations(codes[:4], 2):
+                path = graph.cheapest_route(source, target)
+                expected = cheapest(graph, [source], target)
+                self.assertEqual(graph.route_info(path)[1] if path[0] == source else None, expected)
+                self.assertEqual(len(set(path)), len(path))
+        pass
+
+    def test_hubs_ranking(self):
+        """
+        Test the other ways of ranking the hubs
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        self.assertEqual(graph.hubs(1, "weighted"), [("AYY", 9705)])
+        self.assertEqual(graph.hubs(2, "population"), [("AYY", 230200), ("LMA", 227738)])
+        self.assertEqual(graph.hubs(3, "betweenness"), [("LOL", 1), ("AYY", 0), ("LMA", 0)])
+        self.assertRaises(ValueError, graph.hubs, 3, "size")
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        exact = graph.hubs(48, "betweenness")
+        self.assertEqual(graph.hubs(48, "betweenness", samples=48), exact)
+        sampled = dict(graph.hubs(48, "betweenness", samples=24, seed=1))
+        self.assertEqual(len(sampled), 48)
+        self.assertAlmostEqual(sum(sampled.values()), sum(score for code, score in exact), delta=0.5 * sum(sampled.values()))
+        timed = dict(graph.hubs(48, "betweenness", seconds=60))
+        for code, score in exact:
+            self.assertAlmostEqual(timed[code], score)
+        self.assertEqual(len(graph.hubs(48, "betweenness", seconds=0)), 48)
+        pass
+
+    def test_missing_distances(self):
+        """
+        Tests that routes without a distance get the great circle distance between their cities
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        expected = graph.great_circle_distance("LOL", "LMA")
+        self.assertIsNone(graph.great_circle_distance("LOL", "XXX"))
+        graph.add_route(None, "LOL", "LMA")
+        self.assertEqual(graph.edges["LMA"].get("LOL").distance, expected)
+        self.assertRaises(ValueError, graph.add_route, None, "LOL", "XXX")
+        handle, location = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, 'w') as file:
+            json.dump({"metros": [], "routes": [{"ports": ["AYY", "LMA"]}, {"ports": ["AYY", "XXX"]}]}, file)
+        try:
+            graph = Graph()
+            graph.add_from_json('../Data/test.json')
+            with self.assertRaises(ValueError):
+                graph.add_from_json(location)
+            self.assertEqual(graph.edges["AYY"].get("LMA").distance, graph.great_circle_distance("AYY", "LMA"))
+            self.assertNotIn("XXX", graph.edges["AYY"])
+            lazy = Graph()
+            lazy.add_from_json('../Data/map_data.json', lazy=True)
+            with self.assertRaises(ValueError):
+                lazy.add_from_json(location)
+            self.assertFalse(any(is_loaded(city) for city in lazy.vertices.values()))
+        finally:
+            os.remove(location)
+        pass
+
+    @unittest.skipIf(graph_module.np is None, "numpy is not installed")
+    def test_validate_distances(self):
+        """
+        Tests that routes are flagged when their distance doesn't match the coordinates
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        flagged = {(start, destination) for start, destination, distance, computed in graph.validate_distances()}
+        self.assertIn(("MAD", "LON"), flagged | {(b, a) for a, b in flagged})
+        graph.add_route(graph.great_circle_distance("CMI", "SYD") * 2, "CMI", "SYD")
+        wrong = [route for route in graph.validate_distances() if {"CMI", "SYD"} == set(route[:2])]
+        self.assertEqual(len(wrong), 1)
+        self.assertEqual(wrong[0][3], graph.great_circle_distance("CMI", "SYD"))
+        distances = graph.great_circle_distances(["CMI", "XXX"], ["SYD", "CMI"])
+        self.assertAlmostEqual(distances[0], graph.great_circle_distance("CMI", "SYD"), delta=0.5)
+        self.assertTrue(graph_module.np.isnan(distances[1]))
+        pass
@@ -0,0 +1,63 @@
+from unittest import TestCase
+from graph import Graph
+from indexes import INDEXED_FIELDS
+from transaction import NUMBER_FIELDS
+import collections as col
+import random
+
+
+class TestIndexes(TestCase):
+    def assertMatchesScan(self, graph):
+        """
+        Checks every indexed field against a scan of the cities
+        :param graph: the graph
+        :return: nothing
+        """
+        for field in INDEXED_FIELDS:
+            scan = col.defaultdict(set)
+            for code, city in graph.vertices.items():
+                scan[getattr(city, field)].add(code)
+            self.assertEqual({value: set(codes) for value, codes in graph.attributes.groups(field).items()},
+                             dict(scan))
+
+    def test_matches_scan(self):
+        """
+        Tests that the indexes follow cities being added, removed, edited and renamed
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        self.assertMatchesScan(graph)
+        generator = random.Random(5)
+        for i in range(200):
+            codes = sorted(graph.vertices.keys())
+            action = generator.randrange(4)
+            if action == 0:
+                graph.add_city({"code": "N{}".format(i), "name": "New", "country": generator.choice(["US", "FR"]),
+                                "continent": generator.choice(["Europe", "Asia"]), "timezone": generator.randrange(3),
+                                "coordinates": {"N": 1, "E": 1}, "population": 1, "region": generator.randrange(4)})
+            elif action == 1 and codes:
+                graph.remove_city(generator.choice(codes))
+            elif action == 2 and codes:
+                field = generator.choice(INDEXED_FIELDS + ("name",))
+                values = [1, 2] if field in NUMBER_FIELDS else ["US", "Asia"]
+                graph.edit_city(generator.choice(codes), field, generator.choice(values))
+            elif codes:
+                graph.edit_city(generator.choice(codes), "code", "C{}".format(i))
+            self.assertMatchesScan(graph)
+        pass
+
+    def test_cities_by(self):
+        """
+        Tests filtering on several fields at once
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        expected = [code for code, city in graph.vertices.items()
+                    if city.continent == "North America" and city.region == 1]
+        self.assertEqual(sorted(graph.cities_by(continent="North America", region=1)), sorted(expected))
+        self.assertEqual(graph.cities_by(country="XX"), [])
+        self.assertRaises(ValueError, graph.cities_by, name="Chicago")
+        self.assertRaises(ValueError, graph.cities_by)
+        pass
@@ -0,0 +1,137 @@
+from unittest import TestCase
+from graph import Graph
+from loader import JsonStream, Record, read_record, read_records
+from vertex import LazyVertex, is_loaded, load_all
+import os
+import tempfile
+
+
+class TestLazy(TestCase):
+    def assertSameMetadata(self, lazy, eager):
+        """
+        Checks the statistics and the indexes of a lazily loaded graph against an eager one
+        :param lazy: the lazily loaded graph
+        :param eager: the eagerly loaded graph
+        :return: nothing
+        """
+        self.assertEqual(lazy.biggest_city(), eager.biggest_city())
+        self.assertEqual(lazy.smallest_city(), eager.smallest_city())
+        self.assertEqual(lazy.average_city_size(), eager.average_city_size())
+        self.assertEqual(lazy.continents_and_cities(), eager.continents_and_cities())
+        self.assertEqual(lazy.nearest_cities("CHI", 5), eager.nearest_cities("CHI", 5))
+        self.assertEqual({code: city.to_dict() for code, city in lazy.vertices.items()},
+                         {code: city.to_dict() for code, city in eager.vertices.items()})
+
+    def test_offsets(self):
+        """
+        Tests that every record read again from its offsets is the record that was streamed
+        :return: true if all tests pass
+        """
+        location = '../Data/map_data.json'
+        for key, record, start, end in JsonStream(location, chunk_size=64).with_offsets():
+            self.assertEqual(read_record(location, start, end), record)
+        with tempfile.TemporaryDirectory() as directory:
+            location = os.path.join(directory, 'accents.json')
+            with open(location, 'w', encoding='utf-8') as file:
+                file.write('{"metros": [{"name": "São Paulo"}, {"name": "Zürich 日本"}, {"name": "x"}]}')
+            records = list(JsonStream(location, chunk_size=8).with_offsets())
+            self.assertEqual([read_record(location, start, end) for key, record, start, end in records],
+                             [record for key, record, start, end in records])
+        pass
+
+    def test_read_records(self):
+        """
+        Tests that records read together from several files come back in the order they were asked for, and that
+        loading the cities together keeps fields set before they were loaded
+        :return: true if all tests pass
+        """
+        records, expected = [], []
+        for location in ['../Data/map_data.json', '../Data/cmi_hub.json']:
+            for key, record, start, end in JsonStream(location).with_offsets():
+                if key == "metros":
+                    records.append(Record(location, start, end))
+                    expected.append(record)
+        records.reverse()
+        expected.reverse()
+        self.assertEqual(read_records(records), expected)
+        self.assertEqual(read_records([]), [])
+        cities = [LazyVertex(record["code"], fetch) for record, fetch in zip(expected, records)]
+        cities[0].population = 5
+        load_all(cities)
+        self.assertTrue(all(is_loaded(city) for city in cities))
+        self.assertEqual(cities[0].population, 5)
+        self.assertEqual([city.name for city in cities[1:]], [record["name"] for record in expected[1:]])
+        pass
+
+    def test_lazy_json(self):
+        """
+        Tests that routing doesn't read the cities and that the metadata comes out the same once it's needed
+        :return: true if all tests pass
+        """
+        eager = Graph()
+        eager.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        lazy = Graph()
+        lazy.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'], lazy=True)
+        self.assertEqual(lazy.djikstra("CMI", "SYD"), eager.djikstra("CMI", "SYD"))
+        self.assertEqual(lazy.longest_flight(), eager.longest_flight())
+        self.assertEqual(lazy.hubs(), eager.hubs())
+        self.assertFalse(any(is_loaded(city) for city in lazy.vertices.values()))
+        self.assertEqual(lazy.vertices["CHI"].name, "Chicago")
+        self.assertEqual(sum(is_loaded(city) for city in lazy.vertices.values()), 1)
+        self.assertSameMetadata(lazy, eager)
+        pass
+
+    def test_lazy_snapshot(self):
+        """
+        Tests loading a snapshot lazily, with edits made before the cities are loaded
+        :return: true if all tests pass
+        """
+        eager = Graph()
+        eager.add_from_json('../Data/map_data.json')
+        with tempfile.TemporaryDirectory() as directory:
+            location = os.path.join(directory, 'network.snap')
+            eager.save_snapshot(location)
+            lazy = Graph()
+            lazy.add_from_snapshot(location, lazy=True)
+            self.assertEqual(lazy.djikstra("LIM", "TYO"), eager.djikstra("LIM", "TYO"))
+            for graph in (lazy, eager):
+                graph.edit_city("LIM", "population", 99999999)
+                graph.edit_city("SCL", "code", "SCX")
+                graph.remove_city("MEX")
+            self.assertFalse(any(is_loaded(city) for city in lazy.vertices.values()))
+            self.assertEqual(lazy.biggest_city(), ("LIM", "Lima", 99999999))
+            self.assertSameMetadata(lazy, eager)
+            lazy.save_snapshot(location)
+            again = Graph()
+            again.add_from_snapshot(location)
+            self.assertEqual({code: city.to_dict() for code, city in again.vertices.items()},
+                             {code: city.to_dict() for code, city in eager.vertices.items()})
+            del lazy
+        pass
+
+    def test_deferred_routes(self):
+        """
+        Tests that the route statistics are right when routes change before they are first asked for
+        :return: true if all tests pass
+        """
+        eager = Graph()
+        eager.add_from_json('../Data/map_data.json')
+        with tempfile.TemporaryDirectory() as directory:
+            location = os.path.join(directory, 'network.snap')
+            eager.save_snapshot(location)
+            lazy = Graph()
+            lazy.add_from_snapshot(location, lazy=True)
+            longest = eager.longest_flight()
+            for graph in (lazy, eager):
+                graph.remove_route(longest[0], longest[1])
+                graph.add_route(1, "LIM", "SCL")
+            fork = lazy.fork()
+            fork.add_route(30000, "LIM", "TYO")
+            self.assertEqual(lazy.longest_flight(), eager.longest_flight())
+            self.assertEqual(lazy.shortest_flight()[2], eager.shortest_flight()[2])
+            self.assertEqual(lazy.average_distance(), eager.average_distance())
+            self.assertEqual(lazy.hubs(), eager.hubs())
+            self.assertEqual(fork.longest_flight()[2], 30000)
+            self.assertFalse(any(is_loaded(city) for city in lazy.vertices.values()))
+            del lazy, fork
+        pass
@@ -0,0 +1,60 @@
+from unittest import TestCase
+from loader import JsonStream
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+
+class TestJsonStream(TestCase):
+    def test_stream_records(self):
+        """
+        Tests that streaming with a tiny chunk size gives the same records as json.load
+        :return: true if all tests pass
+        """
+        with open('../Data/map_data.json') as file:
+            data = json.load(file)
+        records = list(JsonStream('../Data/map_data.json', chunk_size=7))
+        self.assertEqual([record for key, record in records if key == "metros"], data["metros"])
+        self.assertEqual([record for key, record in records if key == "routes"], data["routes"])
+        self.assertEqual(len([key for key, record in records if key == "data sources"]), 6)
+        pass
+
+    def test_stream_gzip_and_progress(self):
+        """
+        Tests that gzip files are streamed and progress reaches the size of the file
+        :return: true if all tests pass
+        """
+        directory = tempfile.mkdtemp()
+        try:
+            location = os.path.join(directory, 'test.json.gz')
+            with open('../Data/test.json', 'rb') as source, gzip.open(location, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            seen = []
+            records = list(JsonStream(location, lambda loc, position, size: seen.append((position, size))))
+            self.assertEqual(len([key for key, record in records if key == "metros"]), 3)
+            self.assertEqual(len([key for key, record in records if key == "routes"]), 3)
+            self.assertEqual(seen[-1][0], seen[-1][1])
+        finally:
+            shutil.rmtree(directory)
+        pass
+
+    def test_stream_scalars_and_errors(self):
+        """
+        Tests that top level values that aren't arrays are skipped and broken files raise
+        :return: true if all tests pass
+        """
+        directory = tempfile.mkdtemp()
+        try:
+            location = os.path.join(directory, 'small.json')
+            with open(location, 'w') as file:
+                file.write('{"version": 123456, "routes": [{"ports": ["A", "B"], "distance": 10}], "note": "x"}')
+            self.assertEqual(list(JsonStream(location, chunk_size=3)),
+                             [("routes", {"ports": ["A", "B"], "distance": 10})])
+            with open(location, 'w') as file:
+                file.write('{"routes": [{"ports": ["A", "B"]')
+            self.assertRaises(ValueError, list, JsonStream(location, chunk_size=3))
+        finally:
+            shutil.rmtree(directory)
+        pass
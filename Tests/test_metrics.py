@@ -0,0 +1,63 @@
+from unittest import TestCase
+from graph import Graph
+import metrics
+import os
+import tempfile
+
+
+class TestMetrics(TestCase):
+    def tearDown(self):
+        metrics.disable()
+        metrics.registry.reset()
+
+    def test_enable_and_disable(self):
+        """
+        Tests that the Graph methods are only wrapped while metrics are on
+        :return: true if all tests pass
+        """
+        original = Graph.djikstra
+        metrics.enable()
+        self.assertTrue(metrics.enabled())
+        self.assertIsNot(Graph.djikstra, original)
+        metrics.disable()
+        self.assertFalse(metrics.enabled())
+        self.assertIs(Graph.djikstra, original)
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        graph.djikstra("LOL", "LMA")
+        self.assertEqual(metrics.registry.export(), "\n")
+        pass
+
+    def test_recorded(self):
+        """
+        Tests the timings and counters recorded for searches and loading
+        :return: true if all tests pass
+        """
+        metrics.enable()
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        graph.djikstra("CMI", "SYD")
+        settled = graph.expanded
+        graph.astar("CMI", "SYD")
+        counters = metrics.registry.counters
+        self.assertEqual(counters[("nodes_settled", "search")], settled)
+        self.assertEqual(counters[("nodes_settled", "astar")], graph.expanded)
+        self.assertGreater(counters[("edges_relaxed", "search")], settled)
+        self.assertEqual(counters[("bytes_parsed", "add_from_json")],
+                         os.path.getsize('../Data/map_data.json') + os.path.getsize('../Data/cmi_hub.json'))
+        histogram = metrics.registry.histograms[("graph_seconds", "add_from_json")]
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(sum(histogram.counts), 2)
+        text = metrics.registry.export()
+        self.assertIn('csair_graph_seconds_count{operation="djikstra"} 1', text)
+        self.assertIn('csair_graph_seconds_bucket{operation="djikstra",le="+Inf"} 1', text)
+        self.assertIn("# TYPE csair_nodes_settled_total counter", text)
+        handle, location = tempfile.mkstemp(suffix=".prom")
+        os.close(handle)
+        try:
+            metrics.registry.write(location)
+            with open(location) as file:
+                self.assertEqual(file.read(), metrics.registry.export())
+        finally:
+            os.remove(location)
+        pass
@@ -0,0 +1,95 @@
+from unittest import TestCase
+from graph import Graph
+from parallel import BatchRouter, snapshot_of
+from synthetic import write_network
+import parallel
+import gc
+import os
+import random
+import tempfile
+
+
+class TestParallel(TestCase):
+    def test_matches_djikstra(self):
+        """
+        Tests that the batch routes come back in order and match djikstra
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        codes = sorted(graph.vertices.keys())
+        pairs = [(codes[i % len(codes)], codes[(i * 7) % len(codes)]) for i in range(200)]
+        with BatchRouter(graph, processes=2, chunk_size=64) as router:
+            results = list(router.routes(iter(pairs)))
+        self.assertEqual(len(results), len(pairs))
+        for (source, target), (start, end, path, info) in zip(pairs, results):
+            self.assertEqual((start, end), (source, target))
+            self.assertEqual(path, graph.djikstra(source, target))
+            self.assertEqual(info, graph.route_info(path))
+        pass
+
+    def test_from_snapshot(self):
+        """
+        Tests that the workers can share an existing snapshot
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        handle, location = tempfile.mkstemp(suffix=".snap")
+        os.close(handle)
+        try:
+            graph.save_snapshot(location)
+            with BatchRouter(location, processes=1) as router:
+                results = list(router.routes([("LOL", "AYY"), ("AYY", "LMA")]))
+            self.assertEqual(results[0][2], graph.djikstra("LOL", "AYY"))
+            self.assertEqual(results[1][2], graph.djikstra("AYY", "LMA"))
+            self.assertTrue(os.path.exists(location))
+        finally:
+            os.remove(location)
+        pass
+
+    def test_snapshot_reused(self):
+        """
+        Tests that a graph is only written again once its routes change and that the file goes with the graph
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        location = snapshot_of(graph)
+        written = os.path.getmtime(location)
+        os.utime(location, (written - 100, written - 100))
+        self.assertEqual(snapshot_of(graph), location)
+        graph.edit_city("LIM", "name", "Lima!")
+        self.assertEqual(snapshot_of(graph), location)
+        self.assertEqual(os.path.getmtime(location), written - 100)
+        graph.remove_route("LIM", "SCL")
+        self.assertEqual(snapshot_of(graph), location)
+        self.assertNotEqual(os.path.getmtime(location), written - 100)
+        del graph
+        gc.collect()
+        self.assertFalse(os.path.exists(location))
+        pass
+
+    def test_routes_on_snapshot(self):
+        """
+        Tests the search over the snapshot routes against djikstra on a bigger network, in this process
+        :return: true if all tests pass
+        """
+        handle, location = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            write_network(location, 2000, seed=3)
+            graph = Graph()
+            graph.add_from_json(location)
+        finally:
+            os.remove(location)
+        parallel._load(snapshot_of(graph))
+        generator = random.Random(5)
+        codes = sorted(graph.vertices.keys())
+        for source in generator.sample(codes, 20):
+            targets = [(position, target) for position, target in enumerate(generator.sample(codes, 10))]
+            for position, path, info in parallel._route((source, targets + [(10, "???")])):
+                target = dict(targets).get(position, "???")
+                self.assertEqual(path, graph.djikstra(source, target))
+                self.assertEqual(info, graph.route_info(path))
+        pass
@@ -0,0 +1,78 @@
+from unittest import TestCase
+from persistent import PersistentMap, PersistentSortedList, own_map
+import bisect
+import random
+
+
+class TestPersistent(TestCase):
+    def test_map(self):
+        """
+        Tests a map and its copies against dictionaries through random changes to all of them
+        :return: true if all tests pass
+        """
+        generator = random.Random(3)
+        maps = [PersistentMap({i: i for i in range(1000)})]
+        dicts = [{i: i for i in range(1000)}]
+        for step in range(20000):
+            which = generator.randrange(len(maps))
+            key = generator.randrange(3000)
+            if generator.random() < 0.01:
+                maps.append(maps[which].copy())
+                dicts.append(dicts[which].copy())
+            elif generator.random() < 0.45 and key in dicts[which]:
+                del maps[which][key]
+                del dicts[which][key]
+            else:
+                maps[which][key] = step
+                dicts[which][key] = step
+        for persistent, expected in zip(maps, dicts):
+            self.assertEqual(list(persistent.items()), list(expected.items()))
+            self.assertEqual(len(persistent), len(expected))
+            self.assertEqual(persistent.get(-1, "none"), "none")
+            self.assertTrue(all(key in persistent for key in expected))
+        pass
+
+    def test_own_map(self):
+        """
+        Tests that a map inside another one is copied before it is changed after the outer map is copied
+        :return: true if all tests pass
+        """
+        mine = set()
+        cells = PersistentMap()
+        own_map(cells, "A", mine)["CHI"] = None
+        fork = cells.copy()
+        fork_mine = set()
+        own_map(fork, "A", fork_mine)["CMI"] = None
+        self.assertEqual(list(cells["A"]), ["CHI"])
+        self.assertEqual(list(fork["A"]), ["CHI", "CMI"])
+        pass
+
+    def test_sorted_list(self):
+        """
+        Tests a sorted list and its copies against sorted python lists
+        :return: true if all tests pass
+        """
+        generator = random.Random(5)
+        values = generator.sample(range(100000), 3000)
+        lists = [PersistentSortedList(values)]
+        expected = [sorted(values)]
+        for step in range(20000):
+            which = generator.randrange(len(lists))
+            if generator.random() < 0.01:
+                lists.append(lists[which].copy())
+                expected.append(list(expected[which]))
+            elif generator.random() < 0.5 and expected[which]:
+                value = generator.choice(expected[which])
+                lists[which].remove(value)
+                expected[which].remove(value)
+            else:
+                value = generator.randrange(100000) + 0.5
+                lists[which].add(value)
+                bisect.insort(expected[which], value)
+        for persistent, ordered in zip(lists, expected):
+            self.assertEqual(list(persistent), ordered)
+            self.assertEqual(len(persistent), len(ordered))
+            self.assertEqual((persistent.first(), persistent.last()), (ordered[0], ordered[-1]))
+            self.assertEqual(persistent.ceiling(500), ordered[bisect.bisect_left(ordered, 500)])
+            self.assertRaises(ValueError, persistent.remove, -1)
+        pass
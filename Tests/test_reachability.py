@@ -0,0 +1,87 @@
+from unittest import TestCase
+from graph import Graph
+from synthetic import synthetic_network
+import math
+import random
+
+
+class TestReachability(TestCase):
+    def bounded(self, graph, sources, hops, distance):
+        """
+        Shortest distances over routes of at most a number of legs, one level of every route at a time
+        :param graph: the graph
+        :param sources: list of city codes
+        :param hops: most legs
+        :param distance: furthest distance
+        :return: dictionary of every city reached to its distance
+        """
+        best = {code: 0 for code in sources}
+        for level in range(hops):
+            following = dict(best)
+            for code, total in best.items():
+                for edge in graph.edges.get(code, ()):
+                    if total + edge.distance <= distance:
+                        following[edge.destination] = min(following.get(edge.destination, math.inf),
+                                                           total + edge.distance)
+            best = following
+        return best
+
+    def network(self):
+        """
+        A synthetic network to search
+        :return: the graph
+        """
+        graph = Graph()
+        network = synthetic_network(400, seed=2)
+        for metro in network["metros"]:
+            graph.add_city(metro)
+        with graph.batch() as batch:
+            for route in network["routes"]:
+                batch.add_route(route["distance"], route["ports"][0], route["ports"][1])
+        return graph
+
+    def test_within(self):
+        """
+        Tests the hop and distance limits against a search of every level and against djikstra
+        :return: true if all tests pass
+        """
+        graph = self.network()
+        codes = sorted(graph.vertices.keys())
+        generator = random.Random(1)
+        for i in range(20):
+            sources = generator.sample(codes, generator.randrange(1, 4))
+            hops = generator.randrange(1, 5)
+            distance = generator.choice([math.inf, 2000, 8000])
+            reached = graph.reachable(sources, hops, None if distance == math.inf else distance)
+            self.assertEqual({code: entry[0] for code, entry in reached.items()},
+                             self.bounded(graph, sources, hops, distance))
+            for code, (total, legs) in reached.items():
+                self.assertTrue(legs <= hops)
+        dist, prev = graph.shortest_path_tree(codes[0])
+        reached = graph.reachable(codes[0])
+        self.assertEqual({code: entry[0] for code, entry in reached.items()}, dist)
+        for code, (total, legs) in reached.items():
+            self.assertEqual(legs, len(graph.djikstra(codes[0], code)) - 1)
+        reached = graph.reachable(codes[0], distance=3000)
+        self.assertEqual(set(reached), {code for code, total in dist.items() if total <= 3000})
+        self.assertRaises(ValueError, graph.reachable, "???")
+        pass
+
+    def test_reach_sets(self):
+        """
+        Tests that all the hubs at once reach the same cities as each one on its own, and that changes are seen
+        :return: true if all tests pass
+        """
+        graph = self.network()
+        hubs = [code for code, degree in graph.hubs(30)]
+        for hops in (0, 1, 2, 3, None):
+            sets = graph.reach_sets(hubs, hops)
+            self.assertEqual(set(sets), set(hubs))
+            for hub in hubs:
+                self.assertEqual(sets[hub], set(graph.reachable(hub, hops)))
+        graph.add_city({"code": "ZZZZ", "name": "Island", "country": "X", "continent": "Asia", "timezone": 0,
+                        "coordinates": {"N": 1, "E": 1}, "population": 1, "region": 1})
+        self.assertEqual(graph.reach_sets(["ZZZZ"]), {"ZZZZ": {"ZZZZ"}})
+        graph.add_route(100, "ZZZZ", hubs[0])
+        self.assertEqual(graph.reachable("ZZZZ", 1), {"ZZZZ": (0, 0), hubs[0]: (100, 1)})
+        pass
@@ -0,0 +1,143 @@
+from unittest import TestCase
+from graph import Graph
+from server import GraphServer, ReadWriteLock
+import asyncio
+import json
+import os
+import tempfile
+
+
+class TestServer(TestCase):
+    def test_requests(self):
+        """
+        Tests reads, mutations and errors over a real connection
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        expected = graph.djikstra("CMI", "SYD")
+        info = list(graph.route_info(expected))
+        longest = list(graph.longest_flight())
+
+        async def run():
+            server = await GraphServer(graph).start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            requests = [{"id": 1, "op": "shortest_route", "args": {"source": "CMI", "target": "SYD"}},
+                        {"id": 2, "op": "city", "args": {"code": "CMI"}},
+                        {"id": 3, "op": "longest_flight"},
+                        {"id": 4, "op": "del_route", "args": {"start": "CMI", "destination": "LAX"}},
+                        {"id": 5, "op": "city", "args": {"code": "XXX"}},
+                        {"id": 6, "op": "nothing"}]
+            for request in requests:
+                writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            writer.write(b"not json\n")
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for i in range(len(requests) + 1)]
+            writer.close()
+            await writer.wait_closed()
+            server.close()
+            await server.wait_closed()
+            return {response["id"]: response for response in responses}
+
+        responses = asyncio.run(run())
+        self.assertEqual(responses[1]["result"]["path"], expected)
+        self.assertEqual(responses[1]["result"]["info"], info)
+        self.assertEqual(responses[2]["result"]["name"], "Champaign")
+        self.assertEqual(responses[3]["result"], longest)
+        self.assertTrue(responses[4]["result"])
+        self.assertNotIn("LAX", graph.edges["CMI"])
+        self.assertIn("error", responses[5])
+        self.assertIn("error", responses[6])
+        self.assertIn("error", responses[None])
+        pass
+
+    def test_bad_values(self):
+        """
+        Tests that mutations with values of the wrong type are answered with an error and leave the graph as it was
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        server = GraphServer(graph)
+        flights = graph.aggregates.flights
+        version = graph.version
+        city = graph.vertices["LIM"].to_dict()
+        city.update(code="NEW", population="5")
+
+        def ask(op, **args):
+            return asyncio.run(server.handle({"op": op, "args": args}))
+
+        self.assertIn("distance", ask("add_route", start="LIM", destination="SYD", distance="2453")["error"])
+        self.assertIn("population", ask("edit_city", code="LIM", key="population", value="5")["error"])
+        self.assertIn("population", ask("add_city", **city)["error"])
+        self.assertIsNone(graph.edges["LIM"].get("SYD"))
+        self.assertNotIn("NEW", graph.vertices)
+        self.assertEqual(graph.vertices["LIM"].population, 9050000)
+        self.assertEqual((graph.aggregates.flights, graph.version), (flights, version))
+        self.assertIn("LIM", graph.cities_by(continent="South America"))
+        shortest = graph.route_info(graph.djikstra("LIM", "SYD"))
+        self.assertEqual(shortest[0], graph.route_info(graph.astar("LIM", "SYD"))[0])
+        self.assertNotIn("error", ask("add_route", start="LIM", destination="SYD", distance=12000))
+        self.assertEqual(graph.djikstra("LIM", "SYD"), ["LIM", "SYD"])
+        pass
+
+    def test_lock(self):
+        """
+        Tests that readers share the lock and writers hold it alone
+        :return: true if all tests pass
+        """
+        events = []
+
+        async def read(lock, name):
+            async with lock.reading():
+                events.append(("start", name))
+                await asyncio.sleep(0.01)
+                events.append(("end", name))
+
+        async def write(lock, name):
+            async with lock.writing():
+                events.append(("start", name))
+                await asyncio.sleep(0.01)
+                events.append(("end", name))
+
+        async def run():
+            lock = ReadWriteLock()
+            await asyncio.gather(read(lock, "r1"), read(lock, "r2"), write(lock, "w"), read(lock, "r3"))
+
+        asyncio.run(run())
+        self.assertEqual(events[:2], [("start", "r1"), ("start", "r2")])
+        position = events.index(("start", "w"))
+        self.assertEqual(events[position + 1], ("end", "w"))
+        self.assertLess(position, events.index(("start", "r3")))
+        pass
+
+    def test_files(self):
+        """
+        Tests that saving and loading only use the server's own locations and that loading replaces the network
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        with tempfile.TemporaryDirectory() as directory:
+            server = GraphServer(graph, os.path.join(directory, "save.json"), os.path.join(directory, "network.snap"))
+            elsewhere = os.path.join(directory, "elsewhere.json")
+
+            def ask(op, **args):
+                return asyncio.run(server.handle({"op": op, "args": args}))
+
+            self.assertIn("error", ask("save_json", location=elsewhere))
+            self.assertIn("error", ask("load_json", locations=['../Data/cmi_hub.json']))
+            self.assertFalse(os.path.exists(elsewhere))
+            self.assertIn("error", ask("load_snapshot"))
+            self.assertIn("LIM", graph.vertices)
+            self.assertNotIn("error", ask("save_snapshot"))
+            graph.add_from_json('../Data/cmi_hub.json')
+            self.assertNotIn("error", ask("load_snapshot"))
+            self.assertNotIn("CMI", graph.vertices)
+            self.assertIn("LIM", graph.vertices)
+            self.assertNotIn("error", ask("save_json", compact=True))
+            graph.add_from_json('../Data/cmi_hub.json')
+            self.assertNotIn("error", ask("load_json"))
+            self.assertNotIn("CMI", graph.vertices)
+        pass
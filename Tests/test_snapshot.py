@@ -0,0 +1,78 @@
+from unittest import TestCase
+from graph import Graph
+from snapshot import Snapshot
+import os
+import shutil
+import tempfile
+
+
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'network.snap')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        """
+        Tests that a snapshot loads back the same cities and routes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        graph.add_route(12.5, "CMI", "KEK")
+        graph.save_snapshot(self.location)
+        other = Graph()
+        other.add_from_snapshot(self.location)
+        self.assertEqual(len(other.vertices), len(graph.vertices))
+        for code, city in graph.vertices.items():
+            self.assertEqual(other.vertices[code].to_dict(), city.to_dict())
+        for code, _list in graph.edges.items():
+            self.assertEqual(len(other.edges[code]), len(_list))
+            for edge in _list:
+                self.assertEqual(other.edges[code].get(edge.destination).distance, edge.distance)
+        self.assertFalse("KEK" in other.vertices)
+        self.assertEqual(other.djikstra("SCL", "CMI"), graph.djikstra("SCL", "CMI"))
+        pass
+
+    def test_single_city(self):
+        """
+        Tests reading one city without loading the whole snapshot
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        graph.save_snapshot(self.location)
+        with Snapshot(self.location) as snapshot:
+            self.assertEqual(snapshot.codes, ["LOL", "AYY", "LMA"])
+            self.assertEqual(snapshot.city(1), graph.vertices["AYY"].to_dict())
+        pass
+
+    def test_not_a_snapshot(self):
+        """
+        Tests that other files are rejected
+        :return: true if all tests pass
+        """
+        self.assertRaises(ValueError, Snapshot, '../Data/test.json')
+        pass
+
+    def test_missing_coordinates(self):
+        """
+        Tests that cities with fewer than two coordinates don't shift the coordinates of the cities after them
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        graph.edit_city("LOL", "coordinates", {"S": 12})
+        graph.edit_city("AYY", "coordinates", {})
+        graph.save_snapshot(self.location)
+        other = Graph()
+        other.add_from_snapshot(self.location)
+        for code, city in graph.vertices.items():
+            self.assertEqual(other.vertices[code].to_dict(), city.to_dict())
+        with Snapshot(self.location) as snapshot:
+            self.assertEqual(snapshot.city(0)["coordinates"], {"S": 12})
+        graph.edit_city("LMA", "coordinates", {"N": 1, "E": 2, "W": 3})
+        self.assertRaises(ValueError, graph.save_snapshot, self.location)
+        pass
@@ -0,0 +1,77 @@
+from unittest import TestCase
+from graph import Graph
+from geo import latitude_longitude, haversine
+from spatial import SpatialIndex
+from vertex import Vertex
+import random
+
+
+class TestSpatial(TestCase):
+    def brute_force(self, graph, point, radius):
+        """
+        Scans every city like before the index
+        :param graph: the graph
+        :param point: latitude and longitude
+        :param radius: distance in km
+        :return: set of the codes within the radius
+        """
+        return {code for code, city in graph.vertices.items()
+                if haversine(point, latitude_longitude(city.coordinates)) <= radius}
+
+    def test_matches_scan(self):
+        """
+        Tests radius and nearest queries against a scan while cities are added, removed and renamed
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        generator = random.Random(3)
+        for i in range(60):
+            latitude = generator.uniform(-90, 90)
+            longitude = generator.uniform(-180, 180)
+            graph.add_city({"code": "R{}".format(i), "name": "Random", "country": "XX", "continent": "None",
+                            "timezone": 0, "population": 1, "region": 1,
+                            "coordinates": {"N" if latitude >= 0 else "S": abs(latitude),
+                                            "E" if longitude >= 0 else "W": abs(longitude)}})
+        graph.remove_city("CMI")
+        graph.edit_city("CHI", "code", "ORD")
+        graph.edit_city("LON", "coordinates", {"S": 51, "E": 179})
+        points = [(0, 0), (89, 10), (-89.5, -170), (51, 179.5), (41, -87), (-33, 151)]
+        for point in points:
+            for radius in (100, 1000, 3000, 12000, 25000):
+                self.assertEqual({code for code, distance in graph.cities_within(point, radius)},
+                                 self.brute_force(graph, point, radius))
+            nearest = graph.nearest_cities(point, 7)
+            ordered = sorted((haversine(point, latitude_longitude(city.coordinates)), code)
+                             for code, city in graph.vertices.items())
+            self.assertEqual([distance for code, distance in nearest], [distance for distance, code in ordered[:7]])
+        self.assertNotIn("CHI", graph.spatial.points)
+        self.assertNotIn("CMI", graph.spatial.points)
+        self.assertEqual(graph.spatial.points["LON"], (-51, 179))
+        self.assertNotIn("ORD", [code for code, distance in graph.nearest_cities("ORD", 3)])
+        self.assertRaises(ValueError, graph.nearest_cities, "CMI")
+        pass
+
+    def city(self, code, coordinates):
+        """
+        Makes a city with only the code and coordinates that matter here
+        :param code: the city code
+        :param coordinates: the coordinates like in the json
+        :return: the Vertex
+        """
+        return Vertex({"code": code, "name": code, "country": "XX", "continent": "None", "timezone": 0,
+                       "coordinates": coordinates, "population": 1, "region": 1})
+
+    def test_empty(self):
+        """
+        Tests queries on an empty index and cities without coordinates
+        :return: true if all tests pass
+        """
+        index = SpatialIndex()
+        self.assertEqual(index.nearest((0, 0), 3), [])
+        index.add_vertex(self.city("ABC", {"N": 5}))
+        self.assertEqual(index.within((0, 0), 30000), [])
+        index.add_vertex(self.city("DEF", {"N": 5, "E": 5}))
+        self.assertEqual([code for code, distance in index.nearest((0, 0), 3)], ["DEF"])
+        self.assertEqual(index.nearest((5, 5), 3, exclude="DEF"), [])
+        pass
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from graph import Graph
+from synthetic import synthetic_network, write_network, city_code
+import graph as graph_module
+import os
+import tempfile
+
+
+class TestSynthetic(TestCase):
+    def test_network(self):
+        """
+        Tests that the synthetic network loads like the json and looks like a hub and spoke network
+        :return: true if all tests pass
+        """
+        handle, location = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            network = write_network(location, 2000, seed=4)
+            graph = Graph()
+            graph.add_from_json(location)
+        finally:
+            os.remove(location)
+        self.assertEqual(len(graph.vertices), 2000)
+        self.assertEqual(len(graph.vertices), len({metro["code"] for metro in network["metros"]}))
+        self.assertEqual(graph.aggregates.flights, 2 * len(network["routes"]))
+        hubs = {city_code(i) for i in range(2000 // 50 + 1)}
+        self.assertTrue({code for code, degree in graph.hubs(10)} <= hubs)
+        for code, city in graph.vertices.items():
+            if code not in hubs:
+                self.assertTrue(any(edge.destination in hubs for edge in graph.edges[code]))
+        if graph_module.np is not None:
+            self.assertEqual(graph.validate_distances(0.01, 1), [])
+        self.assertEqual(synthetic_network(300, seed=4), synthetic_network(300, seed=4))
+        self.assertNotEqual(synthetic_network(300, seed=4), synthetic_network(300, seed=5))
+        pass
+
+    def test_city_code(self):
+        """
+        Tests that the codes are unique and get longer once three letters run out
+        :return: true if all tests pass
+        """
+        self.assertEqual(city_code(0), "AAA")
+        self.assertEqual(city_code(26 ** 3 - 1), "ZZZ")
+        self.assertEqual(city_code(26 ** 3), "AAAA")
+        self.assertEqual(len({city_code(i) for i in range(20000)}), 20000)
+        pass
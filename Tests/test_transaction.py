@@ -0,0 +1,174 @@
+from unittest import TestCase
+from graph import Graph
+
+
+def contents(graph):
+    """
+    Everything about the cities and routes of a graph, to compare graphs with
+    :param graph: the graph
+    :return: dictionary of the cities and set of the routes
+    """
+    cities = {code: city.to_dict() for code, city in graph.vertices.items()}
+    routes = {(edge.start, edge.destination, edge.distance) for _list in graph.edges.values() for edge in _list}
+    return cities, routes
+
+
+class TestTransaction(TestCase):
+    def changes(self, target):
+        """
+        Makes the same changes through a graph or a batch
+        :param target: the graph or the batch
+        :return: nothing
+        """
+        target.add_city({"code": "NEW", "name": "New", "country": "US", "continent": "North America",
+                         "timezone": -6, "coordinates": {"N": 41, "W": 90}, "population": 1000, "region": 1})
+        target.add_route(None, "NEW", "CHI")
+        target.add_route(300, "NEW", "CMI")
+        target.remove_route("CMI", "LAX")
+        target.edit_city("CMI", "code", "UIU")
+        target.add_route(1234, "UIU", "SYD")
+        target.edit_city("SYD", "population", 5)
+        target.remove_city("LIM")
+
+    def test_same_as_one_at_a_time(self):
+        """
+        Tests that a batch ends up with the same network as the same changes made one at a time
+        :return: true if all tests pass
+        """
+        single = Graph()
+        single.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        self.changes(single)
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        tree = graph.shortest_path_tree("SCL")
+        version = graph.version
+        with graph.batch() as batch:
+            self.changes(batch)
+            self.assertEqual(graph.version, version)
+        self.assertEqual(graph.version, version + 1)
+        self.assertIsNot(graph.shortest_path_tree("SCL"), tree)
+        self.assertEqual(contents(graph), contents(single))
+        self.assertEqual(graph.biggest_city(), single.biggest_city())
+        self.assertEqual(graph.hubs(5), single.hubs(5))
+        self.assertEqual(graph.average_distance(), single.average_distance())
+        self.assertEqual(graph.nearest_cities("NEW", 3), single.nearest_cities("NEW", 3))
+        pass
+
+    def test_nothing_applied(self):
+        """
+        Tests that a batch with a bad change or an error in the with block changes nothing
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        before = contents(graph)
+        version = graph.version
+        with self.assertRaises(ValueError) as context:
+            with graph.batch() as batch:
+                batch.remove_city("CMI")
+                batch.add_route(100, "CMI", "CHI")
+                batch.remove_route("CHI", "SYD")
+                batch.edit_city("LAX", "code", "SFO")
+                batch.add_route("far", "LAX", "SFO")
+                batch.remove_route("LAX", "SFO")
+        for problem in ("#2", "#3", "#4", "#5"):
+            self.assertIn(problem, str(context.exception))
+        self.assertNotIn("#6", str(context.exception))
+        with self.assertRaises(KeyError):
+            with graph.batch() as batch:
+                batch.remove_city("CMI")
+                raise KeyError("CMI")
+        self.assertEqual(contents(graph), before)
+        self.assertEqual(graph.version, version)
+        pass
+
+    def test_bad_values(self):
+        """
+        Tests that values the indexes can't store are caught before anything is applied
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        before = contents(graph)
+        version = graph.version
+        with self.assertRaises(ValueError) as context:
+            with graph.batch() as batch:
+                batch.remove_city("LIM")
+                batch.edit_city("SCL", "population", None)
+                batch.add_route(100, "SCL", "BOG")
+        self.assertIn("population must be a number", str(context.exception))
+        with self.assertRaises(ValueError) as context:
+            with graph.batch() as batch:
+                batch.edit_city("SCL", "coordinates", {"N": 1, "Q": 2})
+                batch.add_route(None, "SCL", "BOG")
+        self.assertIn("no distance or coordinates for SCL-BOG", str(context.exception))
+        with self.assertRaises(ValueError) as context:
+            with graph.batch() as batch:
+                batch.edit_city("SCL", "coordinates", "somewhere")
+        self.assertIn("bad coordinates", str(context.exception))
+        self.assertEqual(contents(graph), before)
+        self.assertEqual(graph.version, version)
+        pass
+
+    def test_failure_while_applying(self):
+        """
+        Tests that a change failing while the batch is applied leaves the graph as it was
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        before = contents(graph)
+        version = graph.version
+        hubs = graph.hubs(5)
+        nearest = graph.nearest_cities("CHI", 3)
+        flights = graph.aggregates.flights
+        batch = graph.batch()
+        batch.remove_city("LIM")
+        batch.operations.append(("add_route", (100, "SCL")))
+        with self.assertRaises(TypeError):
+            batch.commit()
+        self.assertEqual(contents(graph), before)
+        self.assertEqual(graph.version, version)
+        self.assertIn("LIM", graph.vertices)
+        self.assertTrue(graph.connected("LIM", "SCL"))
+        batch = graph.batch()
+        self.changes(batch)
+
+        def remove_city(code):
+            Graph.remove_city(graph, code)
+            raise RuntimeError("failed after removing {}".format(code))
+
+        # the last change fails once it has been made, so every change of the batch has to be undone
+        graph.remove_city = remove_city
+        with self.assertRaises(RuntimeError):
+            batch.commit()
+        del graph.remove_city
+        self.assertEqual(contents(graph), before)
+        self.assertEqual(graph.version, version)
+        self.assertEqual(graph.hubs(5), hubs)
+        self.assertEqual(graph.nearest_cities("CHI", 3), nearest)
+        self.assertEqual(graph.aggregates.flights, flights)
+        self.assertIn("CMI", graph.cities_by(country="US"))
+        self.assertNotIn("NEW", graph.cities_by(country="US"))
+        self.assertTrue(graph.route_would_split("LIM", "SCL"))
+        pass
+
+    def test_applied_in_place(self):
+        """
+        Tests that a batch changes the graph itself rather than a copy of it, so it costs as much as its changes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        vertices, edges, aggregates = graph.vertices, graph.edges, graph.aggregates
+        untouched = graph.vertices["SYD"]
+        with graph.batch() as batch:
+            batch.edit_city("LIM", "population", 5)
+            batch.add_route(100, "LIM", "SYD")
+        self.assertIs(graph.vertices, vertices)
+        self.assertIs(graph.edges, edges)
+        self.assertIs(graph.aggregates, aggregates)
+        self.assertIs(graph.vertices["SYD"], untouched)
+        self.assertEqual(graph.vertices["LIM"].population, 5)
+        self.assertEqual(graph.djikstra("LIM", "SYD"), ["LIM", "SYD"])
+        pass
@@ -0,0 +1,146 @@
+from unittest import TestCase
+from graph import Graph
+from versioned import VersionedGraph
+import random
+import threading
+
+
+def contents(graph):
+    """
+    Everything about the cities and routes of a graph, to compare graphs with
+    :param graph: the graph
+    :return: dictionary of the cities and set of the routes
+    """
+    cities = {code: city.to_dict() for code, city in graph.vertices.items()}
+    routes = {(edge.start, edge.destination, edge.distance) for _list in graph.edges.values() for edge in _list}
+    return cities, routes
+
+
+def mutate(graph, generator, i):
+    """
+    Makes one random change to the graph
+    :param graph: the graph
+    :param generator: random number generator
+    :param i: number of the change, used for new codes
+    :return: nothing
+    """
+    codes = sorted(graph.vertices.keys())
+    action = generator.randrange(5)
+    if action == 0:
+        graph.remove_city(generator.choice(codes))
+    elif action == 1:
+        graph.add_route(generator.randrange(100, 5000), generator.choice(codes), generator.choice(codes))
+    elif action == 2:
+        start = generator.choice(codes)
+        if len(graph.edges[start]) > 0:
+            graph.remove_route(start, generator.choice(list(graph.edges[start].destinations())))
+    elif action == 3:
+        graph.edit_city(generator.choice(codes), "population", generator.randrange(10 ** 6))
+    else:
+        graph.edit_city(generator.choice(codes), "code", "V{}".format(i))
+
+
+class TestVersioned(TestCase):
+    def test_fork(self):
+        """
+        Tests that changing a fork leaves the original alone and the other way around
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        before = contents(graph)
+        biggest = graph.biggest_city()
+        hubs = graph.hubs(3)
+        fork = graph.fork()
+        generator = random.Random(11)
+        for i in range(100):
+            mutate(fork, generator, i)
+        self.assertEqual(contents(graph), before)
+        self.assertEqual(graph.biggest_city(), biggest)
+        self.assertEqual(graph.hubs(3), hubs)
+        replay = Graph()
+        replay.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        generator = random.Random(11)
+        for i in range(100):
+            mutate(replay, generator, i)
+        self.assertEqual(contents(fork), contents(replay))
+        self.assertEqual(fork.biggest_city(), replay.biggest_city())
+        self.assertEqual(fork.average_distance(), replay.average_distance())
+        self.assertEqual(sorted(fork.cities_by(continent="Europe")), sorted(replay.cities_by(continent="Europe")))
+        forked = contents(fork)
+        graph.remove_city("CHI")
+        graph.edit_city("LAX", "name", "Somewhere")
+        self.assertEqual(contents(fork), forked)
+        pass
+
+    def test_fork_shares_indexes(self):
+        """
+        Tests that a fork shares the pieces of the indexes and an edit only copies the ones it changes
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        biggest = graph.biggest_city()
+        fork = graph.fork()
+        sydney = graph.spatial._cell(graph.spatial.points["SYD"])
+        self.assertIs(fork.aggregates._cities._pieces[0], graph.aggregates._cities._pieces[0])
+        self.assertIs(fork.spatial.points._chunks[0], graph.spatial.points._chunks[0])
+        fork.edit_city("CHI", "population", 10 ** 9)
+        self.assertIsNot(fork.aggregates._cities._pieces[-1], graph.aggregates._cities._pieces[-1])
+        self.assertIs(fork.spatial.cells[sydney], graph.spatial.cells[sydney])
+        self.assertEqual(fork.biggest_city()[0], "CHI")
+        self.assertEqual(graph.biggest_city(), biggest)
+        pass
+
+    def test_edit_and_pin(self):
+        """
+        Tests that pinned versions don't change and failed edits aren't published
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        versioned = VersionedGraph(graph)
+        pinned = versioned.pin()
+        with versioned.edit() as draft:
+            draft.remove_city("LOL")
+        self.assertIn("LOL", pinned.vertices)
+        self.assertNotIn("LOL", versioned.pin().vertices)
+        with self.assertRaises(KeyError):
+            with versioned.edit() as draft:
+                draft.remove_city("AYY")
+                raise KeyError("AYY")
+        self.assertIn("AYY", versioned.pin().vertices)
+        pass
+
+    def test_concurrent_readers(self):
+        """
+        Tests that readers never see a half finished edit while a writer keeps publishing
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json_files(['../Data/map_data.json', '../Data/cmi_hub.json'])
+        versioned = VersionedGraph(graph)
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                pinned = versioned.pin()
+                for code, _list in list(pinned.edges.items()):
+                    for edge in _list:
+                        if code not in pinned.vertices or code not in pinned.edges.get(edge.destination, ()):
+                            errors.append((code, edge.destination))
+                pinned.longest_flight()
+
+        readers = [threading.Thread(target=read) for i in range(3)]
+        for reader in readers:
+            reader.start()
+        generator = random.Random(2)
+        for i in range(200):
+            with versioned.edit() as draft:
+                mutate(draft, generator, i)
+        done.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(errors, [])
+        pass
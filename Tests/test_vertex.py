@@ -22,4 +22,16 @@ class TestVertex(TestCase):
         self.assertIs(vertex.coordinates["W"], 71)
         self.assertIs(vertex.population, 6000000)
         self.assertIs(vertex.region, 1)
+
+    def test_vertex_to_dict(self):
+        """
+        Checks that the city information is given back through the field list since vertices have no __dict__
+        :return: true if the tests pass
+        """
+        metros = {"code": "SCL", "name": "Santiago", "country": "CL", "continent": "South America", "timezone": -4,
+                  "coordinates": {"S": 33, "W": 71}, "population": 6000000, "region": 1}
+        vertex = Vertex(metros)
+        self.assertEqual(vertex.to_dict(), metros)
+        self.assertFalse(hasattr(vertex, "__dict__"))
+        self.assertRaises(AttributeError, setattr, vertex, "airport", "SCL")
     pass
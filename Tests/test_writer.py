@@ -0,0 +1,47 @@
+from unittest import TestCase
+from graph import Graph
+import io
+import json
+import os
+import shutil
+import tempfile
+
+
+class TestJsonWriter(TestCase):
+    def test_save_and_load(self):
+        """
+        Tests that every route is saved once and the file loads back into the same network
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/map_data.json')
+        directory = tempfile.mkdtemp()
+        try:
+            for name, compact in (('save.json', False), ('save.json.gz', False), ('compact.json', True)):
+                location = os.path.join(directory, name)
+                graph.save_to_json(location, compact)
+                other = Graph()
+                other.add_from_json(location)
+                self.assertEqual(len(other.vertices), 48)
+                self.assertEqual(other.average_distance(), graph.average_distance())
+                self.assertEqual(other.hubs(), graph.hubs())
+        finally:
+            shutil.rmtree(directory)
+        pass
+
+    def test_save_to_file_object(self):
+        """
+        Tests writing to a file object, with both directions of a route only written once
+        :return: true if all tests pass
+        """
+        graph = Graph()
+        graph.add_from_json('../Data/test.json')
+        file = io.StringIO()
+        graph.save_to_json(file, compact=True)
+        data = json.loads(file.getvalue())
+        self.assertNotIn("\n", file.getvalue())
+        self.assertEqual(len(data["metros"]), 3)
+        self.assertEqual(data["routes"], [{"ports": ["LOL", "AYY"], "distance": 2736},
+                                          {"ports": ["LOL", "LMA"], "distance": 420},
+                                          {"ports": ["AYY", "LMA"], "distance": 6969}])
+        pass